@@ -1,23 +1,58 @@
 #!/usr/bin/env python3
 
-import json
+import time
+# Taken before any other import so the profile can report how long module loading took
+MODULE_LOAD_STARTED = time.perf_counter()
+
 import csv
+import argparse
+import json
 import os
 import sys
-import statistics
 from pathlib import Path
 from datetime import datetime
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
 
-def log_progress(message):
-    """Print with flush to ensure immediate output in Docker"""
-    print(message, flush=True)
+from budgets import FAILED, PASSED, SKIPPED, budget_condition, budgets_config_file, evaluate_budgets, load_budgets, write_junit
+from common import log_progress
+from docker_stats import load_docker_stats, resource_efficiency
+from histogram import DEFAULT_RELATIVE_ACCURACY
+from app_config import app_ids, endpoint_urls, load_apps
+from k6_endpoints import endpoint_stats
+from k6_decompress import compression_of, k6_output_files
+from k6_follow import DEFAULT_IDLE_TIMEOUT, DEFAULT_REPORT_INTERVAL, DEFAULT_ROLLING_SECONDS, follow_k6_file
+from k6_ingest import FAST_DECODER, ingest_k6_file, ingest_k6_files_parallel
+from k6_nodes import (MAX_OFFSET_UNCERTAINTY_S, combine_nodes, flatten_node_files, k6_node_files, load_node_offsets,
+                      node_key, parse_node_offset)
+from pipeline_profile import PipelineProfile
+from prometheus import analyze_snapshots, group_snapshot_files, parse_snapshot_file, snapshot_time
+from results_index import default_index_file, record_session, session_rows
+from timeseries import detect_stages, load_curve, merge_by_kind, window_rows
+
+SERVER_REQUESTS_METRIC = 'http_requests_total'
+SERVER_LATENCY_METRIC = 'http_request_duration_seconds'
+MEMORY_METRICS = ['benchmark_memory_usage_bytes', 'go_memstats_heap_alloc_bytes']
+# Endpoints listed per app and test in the Markdown report (all of them go to the JSON summary)
+ENDPOINT_REPORT_LIMIT = 15
+# Signals listed per app in the tail-latency attribution table
+TAIL_SIGNAL_REPORT_LIMIT = 8
+# Exit status when a performance budget fails (k6_follow's aborted run is 3)
+EXIT_BUDGET_FAILED = 4
+BUDGET_STATUS_MARKERS = {PASSED: '✅ pass', FAILED: '❌ fail', SKIPPED: '⏭️ skipped'}
+NODE_OFFSET_SOURCES = {'reference': 'reference clock', 'configured': 'configured', 'estimated': 'estimated',
+                       'unaligned': '⚠️ not aligned'}
 
-def load_k6_results(results_dir):
-    """Load K6 JSON results from the benchmark session"""
+def load_k6_results(results_dir, apps, workers=1, fast=True, use_cache=True, backend='auto', endpoints=True,
+                    node_offsets=None):
+    """Stream K6 results (JSON or CSV output, chosen per test) from the benchmark session into per-test aggregates.
+    
+    With ``endpoints`` the request durations of apps that have a ``base_url`` are also broken down per endpoint.
+    Tests recorded by several load generators (``k6-results/<test>/<node>.json``) are ingested per node, aligned
+    with the configured (``node_offsets``, node_offsets.json) or estimated clock offsets and merged.
+    """
+    # The cache and CSV backends need NumPy (and pandas); keep them out of module load
+    from k6_cache import has_fresh_cache
+    from k6_csv import choose_backends, ingest_k6_csv_files, preferred_backends
+    
     k6_results = {}
     k6_dir = Path(results_dir) / "k6-results"
     
@@ -25,256 +60,438 @@ def load_k6_results(results_dir):
         log_progress(f"❌ K6 results directory not found: {k6_dir}")
         return k6_results
     
-    for json_file in k6_dir.glob("*.json"):
-        test_name = json_file.stem
-        log_progress(f"📊 Loading K6 results for {test_name}...")
-        
-        try:
-            # Process file in chunks to avoid memory issues
-            metrics_data = []
-            file_size = json_file.stat().st_size
-            
-            # Determine sampling rate based on file size
-            if file_size > 1_000_000_000:  # > 1GB
-                step = 1000  # Sample every 1000th line
-            elif file_size > 500_000_000:  # > 500MB
-                step = 500   # Sample every 500th line
-            elif file_size > 100_000_000:  # > 100MB
-                step = 100   # Sample every 100th line
-            else:
-                step = 1
-            
-            if step > 1:
-                log_progress(f"  📉 Large file detected ({file_size/1024/1024:.1f}MB), sampling every {step} lines")
-            
-            line_count = 0
-            progress_interval = 100000  # Log every 100k lines
-            with open(json_file, 'r') as f:
-                for line in f:  # Process line by line instead of loading all
-                    line_count += 1
-                    
-                    # Progress logging for large files
-                    if line_count % progress_interval == 0:
-                        log_progress(f"  📈 Processed {line_count:,} lines, collected {len(metrics_data):,} metrics")
-                    
-                    if line_count % step != 0:  # Skip lines based on sampling
-                        continue
-                    
-                    # Limit total metrics to prevent memory overflow
-                    if len(metrics_data) >= 10000:  # Max 10k samples per test
-                        log_progress(f"  🛑 Reached 10k sample limit, stopping early")
-                        break
-                        
-                    if line.strip():
-                        try:
-                            data = json.loads(line)
-                            if data.get('type') == 'Point':
-                                metrics_data.append(data)
-                        except json.JSONDecodeError:
-                            continue
-            
-            k6_results[test_name] = metrics_data
-            log_progress(f"  ✅ Loaded {len(metrics_data)} metric points from {line_count:,} total lines")
-            
-        except Exception as e:
-            log_progress(f"  ❌ Error loading {json_file}: {e}")
+    ids = app_ids(apps)
+    urls = endpoint_urls(apps) if endpoints else None
+    # k6 gzips its JSON output when the file name ends in .gz
+    json_files = k6_output_files(k6_dir, ".json")
+    csv_files = {csv_file.stem: csv_file for csv_file in sorted(k6_dir.glob("*.csv"))}
+    node_files = {'json': k6_node_files(k6_dir, ".json"),
+                  'csv': {test_name: {node: path for node, path in files.items() if not compression_of(path)}
+                          for test_name, files in k6_node_files(k6_dir, ".csv").items()}}
+    for fmt, files in (('json', json_files), ('csv', csv_files)):
+        for test_name in set(files) & set(node_files[fmt]):
+            log_progress(f"  ⚠️ {test_name}: using the per-node files in {k6_dir / test_name}, "
+                         f"not {files.pop(test_name).name}")
+        files.update(flatten_node_files(node_files[fmt]))
+    
+    # The format is picked per test, so a test recorded in only one format is never dropped
+    if backend != 'auto':
+        backends = preferred_backends(json_files, csv_files, backend)
+        for test_name, fmt in backends.items():
+            if fmt != backend:
+                log_progress(f"  ⚠️ {test_name}: no {backend.upper()} output, reading {fmt.upper()}")
+    elif use_cache and json_files and has_fresh_cache(Path(results_dir), json_files, ids, urls):
+        backends = preferred_backends(json_files, csv_files, 'json')
+    else:
+        backends = choose_backends(json_files, csv_files, ids, fast, urls)
+    csv_files = {test_name: path for test_name, path in csv_files.items() if backends[test_name] == 'csv'}
+    json_files = {test_name: path for test_name, path in json_files.items() if backends[test_name] == 'json'}
+    
+    if csv_files:
+        for test_name, csv_file in csv_files.items():
+            log_progress(f"📊 Loading K6 CSV results for {test_name} ({csv_file.stat().st_size/1024/1024:.1f}MB)...")
+        # Chunked pandas reader with vectorized per-metric aggregation
+        k6_results.update(ingest_k6_csv_files(csv_files, ids, workers, urls))
+    if json_files:
+        for test_name, json_file in json_files.items():
+            compression = compression_of(json_file)
+            size_label = f"{json_file.stat().st_size/1024/1024:.1f}MB" + (f" {compression[1:]}" if compression else "")
+            log_progress(f"📊 Loading K6 results for {test_name} ({size_label})...")
+        k6_results.update(load_k6_json_results(results_dir, json_files, ids, workers, fast, use_cache, urls))
+    k6_results = {test_name: k6_results[test_name] for test_name in sorted(k6_results)}
+    
+    # Every node is read in the format chosen for it
+    chosen_nodes = {}
+    for fmt, tests in node_files.items():
+        for test_name, files in tests.items():
+            for node, path in files.items():
+                if backends.get(node_key(test_name, node)) == fmt:
+                    chosen_nodes.setdefault(test_name, {})[node] = path
+    if chosen_nodes:
+        # One aggregate per test, with the generators' clocks aligned
+        offsets = load_node_offsets(results_dir, node_offsets)
+        k6_results = combine_nodes(k6_results, chosen_nodes, ids, urls, offsets)
+    
+    for test_name, aggregate in k6_results.items():
+        log_progress(f"  ✅ {test_name}: aggregated {aggregate.points:,} metric points from {aggregate.lines:,} total lines")
+    
+    return k6_results
+
+def load_k6_json_results(results_dir, json_files, ids, workers, fast, use_cache, urls=None):
+    """Ingest k6 NDJSON output through the cache, the process pool or a single stream"""
+    from k6_cache import load_k6_cached
+    
+    k6_results = {}
+    if fast:
+        log_progress(f"  🚀 Fast parse path enabled (memory-mapped, byte prefilter, {FAST_DECODER} decoder)")
+    
+    if use_cache and json_files:
+        # Reuse (or build) the columnar cache next to the raw k6 output
+        k6_results = load_k6_cached(Path(results_dir), json_files, ids, workers, fast, urls)
+    elif workers > 1 and json_files:
+        # Split every file into line-aligned ranges and parse them all in one process pool
+        log_progress(f"  ⚡ Parallel ingestion with {workers} workers")
+        k6_results = ingest_k6_files_parallel(json_files, ids, workers, fast=fast, endpoint_urls=urls)
+    else:
+        for test_name, json_file in json_files.items():
+            try:
+                # Every Point is read once and folded into fixed-size histograms,
+                # so memory does not grow with the file size
+                k6_results[test_name] = ingest_k6_file(json_file, test_name, ids, fast=fast, endpoint_urls=urls)
+            except Exception as e:
+                log_progress(f"  ❌ Error loading {json_file}: {e}")
     
     return k6_results
 
-def calculate_stats(times):
-    """Calculate statistical metrics for response times"""
-    if not times:
+def calculate_stats(histogram):
+    """Calculate statistical metrics for response times from a histogram"""
+    if not histogram.count:
         return {'count': 0, 'error': 'No data'}
     
     return {
-        'count': len(times),
-        'min': min(times),
-        'max': max(times),
-        'mean': statistics.mean(times),
-        'median': statistics.median(times),
-        'p95': statistics.quantiles(times, n=20)[18] if len(times) > 20 else max(times),
-        'p99': statistics.quantiles(times, n=100)[98] if len(times) > 100 else max(times)
+        'count': histogram.count,
+        'min': histogram.min,
+        'max': histogram.max,
+        'mean': histogram.mean,
+        'median': histogram.quantile(0.50),
+        'p95': histogram.quantile(0.95),
+        'p99': histogram.quantile(0.99),
+        'p999': histogram.quantile(0.999)
     }
 
-def analyze_response_times(k6_results):
-    """Analyze response times from K6 results by application"""
-    log_progress("🔍 Analyzing response times by application...")
-    analysis = {}
-    
-    for test_name, metrics in k6_results.items():
-        log_progress(f"  📊 Processing {test_name} with {len(metrics)} metrics...")
-        # Analyze by application using the new separate metrics
-        app_metrics = {
-            'go': [],
-            'csharp_ef': [],
-            'csharp_dapper': []
-        }
+def analyze_k6_results(k6_results, apps):
+    """Derive per-app steady-state response time and throughput stats plus per-second timelines.
+    
+    Also returns the steady-state latency histogram of every app per test.
+    """
+    log_progress("🔍 Analyzing response times and throughput by application...")
+    response_times = {}
+    throughput = {}
+    timelines = {}
+    latency_histograms = {}
+    ids = app_ids(apps)
+    
+    for test_name, aggregate in k6_results.items():
+        log_progress(f"  📊 Processing {test_name} with {aggregate.points:,} points across {len(aggregate.series)} series...")
         
-        for metric in metrics:
-            metric_name = metric.get('metric', '')
-            value = metric.get('data', {}).get('value')
-            
-            if value is None:
-                continue
-            
-            # Application-specific response times
-            if 'go_response_time' in metric_name or 'go_db_response_time' in metric_name or 'go_memory_response_time' in metric_name:
-                app_metrics['go'].append(value)
-            elif 'csharp_ef_response_time' in metric_name or 'csharp_ef_db_response_time' in metric_name or 'csharp_ef_memory_response_time' in metric_name:
-                app_metrics['csharp_ef'].append(value)
-            elif 'csharp_dapper_response_time' in metric_name or 'csharp_dapper_db_response_time' in metric_name or 'csharp_dapper_memory_response_time' in metric_name:
-                app_metrics['csharp_dapper'].append(value)
-        
-        # Calculate stats per-app
-        test_analysis = {}
-        for app, times in app_metrics.items():
-            test_analysis[app] = calculate_stats(times)
-        
-        analysis[test_name] = test_analysis
-    
-    return analysis
-
-def analyze_throughput(k6_results):
-    """Analyze throughput metrics by application"""
-    analysis = {}
-    
-    for test_name, metrics in k6_results.items():
-        # Per-app metrics
-        app_errors = {
-            'go': 0,
-            'csharp_ef': 0,
-            'csharp_dapper': 0
-        }
+        # Infer ramp-up / steady state / ramp-down from the per-second load curve
+        first_second, curve = load_curve(aggregate)
+        stages = detect_stages(curve)
+        if stages['steady'] is not None:
+            start, end = stages['steady']
+            duration = end - start + 1
+            plateau = [aggregate.windows[first_second + i] for i in range(start, end + 1)
+                       if first_second + i in aggregate.windows]
+            log_progress(f"    ⏱️ Steady state: {start}s-{end + 1}s of {len(curve)}s "
+                         f"(peak {stages['peak']:.0f} req/s)")
+        else:
+            # No timestamps available: fall back to whole-test totals without rates
+            duration = None
+            plateau = [aggregate.series]
         
-        app_operations = {
-            'go': 0,
-            'csharp_ef': 0,
-            'csharp_dapper': 0
-        }
+        merged = merge_by_kind(plateau, ids)
+        latency = merged['response_time']
+        latency_histograms[test_name] = latency
         
-        for metric in metrics:
-            metric_name = metric.get('metric', '')
-            value = metric.get('data', {}).get('value', 0)
-            
-            # App-specific error rates
-            if 'go_errors' in metric_name or 'go_db_errors' in metric_name or 'go_memory_errors' in metric_name:
-                app_errors['go'] += value
-            elif 'csharp_ef_errors' in metric_name or 'csharp_ef_db_errors' in metric_name or 'csharp_ef_memory_errors' in metric_name:
-                app_errors['csharp_ef'] += value
-            elif 'csharp_dapper_errors' in metric_name or 'csharp_dapper_db_errors' in metric_name or 'csharp_dapper_memory_errors' in metric_name:
-                app_errors['csharp_dapper'] += value
-            
-            # App-specific operations
-            elif 'go_operations' in metric_name or 'go_db_operations' in metric_name or 'go_memory_operations' in metric_name:
-                app_operations['go'] += value
-            elif 'csharp_ef_operations' in metric_name or 'csharp_ef_db_operations' in metric_name or 'csharp_ef_memory_operations' in metric_name:
-                app_operations['csharp_ef'] += value
-            elif 'csharp_dapper_operations' in metric_name or 'csharp_dapper_db_operations' in metric_name or 'csharp_dapper_memory_operations' in metric_name:
-                app_operations['csharp_dapper'] += value
-        
-        test_analysis = {}
-        
-        # Add per-app analysis
-        for app in ['go', 'csharp_ef', 'csharp_dapper']:
-            operations = app_operations[app]
-            errors = app_errors[app]
-            
-            test_analysis[app] = {
+        response_times[test_name] = {app: calculate_stats(latency[app]) for app in ids}
+        throughput[test_name] = {}
+        for app in ids:
+            requests = latency[app].count
+            operations = merged['operations'][app].sum
+            error_samples = merged['errors'][app]
+            throughput[test_name][app] = {
+                'requests': requests,
+                'rps': requests / duration if duration else 0,
                 'operations': operations,
-                'errors': errors,
-                'error_rate_percent': (errors / operations * 100) if operations > 0 else 0,
-                'ops_per_sec': operations / 300 if operations > 0 else 0
+                'errors': error_samples.sum,
+                # k6 Rate metrics record one 0/1 sample per check, so this is failed / total
+                'error_rate_percent': (error_samples.sum / error_samples.count * 100) if error_samples.count else 0,
+                'ops_per_sec': operations / duration if duration else 0
             }
         
-        analysis[test_name] = test_analysis
+        timelines[test_name] = {
+            'start': first_second,
+            'duration_s': len(curve),
+            'stages': stages,
+            'steady_duration_s': duration,
+            'windows': window_rows(aggregate, ids, first_second, len(curve)) if curve else []
+        }
+    
+    return response_times, throughput, timelines, latency_histograms
+
+def analyze_endpoints(k6_results, timelines):
+    """Per-test, per-app endpoint stats from the tagged request durations, slowest first"""
+    endpoints = {}
+    for test_name, aggregate in k6_results.items():
+        if aggregate.endpoints is None:
+            continue
+        breakdown = aggregate.endpoints
+        endpoints[test_name] = endpoint_stats(breakdown, timelines[test_name]['duration_s'])
+        if breakdown.unattributed:
+            log_progress(f"  ⚠️ {test_name}: {breakdown.unattributed:,} request(s) matched no app base_url")
+        log_progress(f"  🔗 {test_name}: {len(breakdown.interner.groups)} endpoint/status group(s) from "
+                     f"{breakdown.requests:,} requests")
+    return endpoints
+
+def analyze_nodes(k6_results):
+    """Per-node summaries of the tests driven by several load generators"""
+    nodes = {}
+    for test_name, aggregate in k6_results.items():
+        if not aggregate.nodes:
+            continue
+        nodes[test_name] = aggregate.nodes
+        for node, summary in aggregate.nodes.items():
+            for app, stats in summary['apps'].items():
+                if stats['saturated']:
+                    log_progress(f"  ⚠️ {test_name}: node {node} sees p99 {stats['p99']:.1f}ms for {app}, "
+                                 f"far above the other nodes (saturated generator?)")
+    return nodes
+
+def compare_latency(latency_histograms):
+    """Bootstrap confidence intervals and pairwise significance tests per test"""
+    from bootstrap import compare_apps
     
-    return analysis
+    log_progress("🎲 Bootstrapping latency confidence intervals...")
+    return {test_name: compare_apps(histograms) for test_name, histograms in latency_histograms.items()}
+
+def write_timeseries(timelines, output_dir):
+    """Write the per-second, per-app windows of every test to timeseries_<test>.csv"""
+    fields = ['second', 'timestamp', 'app', 'rps', 'error_rate_percent', 'p50', 'p95', 'p99']
+    for test_name, timeline in timelines.items():
+        if not timeline['windows']:
+            continue
+        csv_file = Path(output_dir) / f"timeseries_{test_name}.csv"
+        with open(csv_file, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(timeline['windows'])
+        log_progress(f"  📈 Time series written: {csv_file}")
 
-def load_prometheus_metrics(results_dir):
-    """Load and analyze Prometheus metrics"""
+def load_prometheus_metrics(results_dir, apps):
+    """Load every /metrics snapshot per test and app and derive rates and server-side latency.
+    
+    Snapshot files are named after each app's ``metrics_name`` (collect-metrics.sh's target name), which
+    also keys the result.
+    """
     metrics_dir = Path(results_dir) / "prometheus-metrics"
     prometheus_data = {}
     
     if not metrics_dir.exists():
-        print(f"❌ Prometheus metrics directory not found: {metrics_dir}")
+        log_progress(f"❌ Prometheus metrics directory not found: {metrics_dir}")
         return prometheus_data
     
-    # Load Go metrics
-    go_files = list(metrics_dir.glob("*go_metrics*.txt"))
-    if go_files:
-        print(f"📊 Found {len(go_files)} Go metrics files")
-        prometheus_data['go'] = parse_prometheus_file(go_files[-1])  # Use latest
-    
-    # Load C# metrics
-    csharp_files = list(metrics_dir.glob("*csharp_metrics*.txt"))
-    if csharp_files:
-        print(f"📊 Found {len(csharp_files)} C# metrics files")
-        prometheus_data['csharp'] = parse_prometheus_file(csharp_files[-1])  # Use latest
+    for (test_name, app), files in sorted(group_snapshot_files(metrics_dir, [app['metrics_name'] for app in apps]).items()):
+        snapshots = []
+        for file_path in files:
+            try:
+                snapshots.append(parse_snapshot_file(file_path, snapshot_time(file_path)))
+            except Exception as e:
+                log_progress(f"  ❌ Error parsing {file_path}: {e}")
+        
+        analysis = analyze_snapshots(snapshots)
+        analysis['snapshots'] = snapshots
+        prometheus_data.setdefault(test_name, {})[app] = analysis
+        log_progress(f"  ✅ {test_name} ({app}): {len(snapshots)} snapshots, "
+                     f"{len(analysis['intervals'])} intervals")
     
     return prometheus_data
 
-def parse_prometheus_file(file_path):
-    """Parse Prometheus metrics file format"""
-    metrics = {}
-    
+def index_session(index_file, results_dir, response_times, throughput, efficiency, timelines):
+    """Record the session's aggregated stats in the cross-session SQLite index"""
+    session_dir = Path(results_dir).resolve()
+    starts = [timeline['start'] for timeline in timelines.values() if timeline['start'] is not None]
+    started_at = min(starts) if starts else session_dir.stat().st_mtime
+    rows = session_rows(response_times, throughput, efficiency)
     try:
-        with open(file_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    if ' ' in line:
-                        metric_name, value = line.rsplit(' ', 1)
-                        try:
-                            metrics[metric_name] = float(value)
-                        except ValueError:
-                            metrics[metric_name] = value
-        
-        print(f"  ✅ Parsed {len(metrics)} metrics from {file_path.name}")
-        
+        record_session(index_file, session_dir.name, session_dir, started_at, rows)
+        log_progress(f"  🗂️ Recorded {len(rows)} stats for {session_dir.name} in {index_file}")
     except Exception as e:
-        print(f"  ❌ Error parsing {file_path}: {e}")
+        log_progress(f"  ❌ Could not update results index {index_file}: {e}")
+
+def format_metric(value, fmt):
+    """Format a numeric metric, or N/A when it was not exported"""
+    return fmt.format(value) if value is not None else 'N/A'
+
+def analyze_resource_efficiency(results_dir, timelines, apps):
+    """Line docker stats snapshots up with the k6 throughput of each test"""
+    metrics_dir = Path(results_dir) / "prometheus-metrics"
+    efficiency = {}
+    if not metrics_dir.exists():
+        return efficiency
+    
+    docker_stats = load_docker_stats(metrics_dir)
+    for test_name, container_samples in docker_stats.items():
+        if test_name not in timelines:
+            log_progress(f"  ⚠️ Docker stats for {test_name} have no matching k6 results")
+            continue
+        efficiency[test_name] = resource_efficiency(container_samples, timelines[test_name], apps)
+        for app, stats in efficiency[test_name].items():
+            if not stats['aligned']:
+                log_progress(f"  ⚠️ {test_name} ({app}): no docker stats inside the steady state, "
+                             f"averaging all {stats['samples']} samples")
+    
+    return efficiency
+
+def attribute_tail_latency(results_dir, timelines, prometheus_data, apps):
+    """Join the slowest k6 seconds of every app to its /metrics and docker stats samples"""
+    from tail_attribution import ASOF_TOLERANCE_S, attribute_tail, docker_signals, prometheus_signals
+    
+    metrics_dir = Path(results_dir) / "prometheus-metrics"
+    docker_stats = load_docker_stats(metrics_dir) if metrics_dir.exists() else {}
+    attribution = {}
     
-    return metrics
+    for test_name, timeline in timelines.items():
+        per_app = {}
+        for app in apps:
+            signals = {}
+            analysis = prometheus_data.get(test_name, {}).get(app['metrics_name'])
+            if analysis:
+                signals.update(prometheus_signals(analysis['snapshots']))
+            samples = docker_stats.get(test_name, {}).get(app['container'])
+            if samples:
+                signals.update(docker_signals(samples))
+            
+            if not signals:
+                continue
+            result = attribute_tail(timeline['windows'], app['id'], signals)
+            if result is None:
+                continue
+            if not result['signals']:
+                log_progress(f"  ⚠️ {test_name} ({app['id']}): no /metrics or docker stats sample within "
+                             f"{ASOF_TOLERANCE_S}s of any k6 second (clock or time zone mismatch?); "
+                             f"skipping tail attribution")
+                continue
+            per_app[app['id']] = result
+            spiking = [signal['signal'] for signal in result['signals'] if signal['spikes']]
+            log_progress(f"  🔥 {test_name} ({app['id']}): {result['tail_windows']} tail second(s) with p99 ≥ "
+                         f"{result['p99_threshold']:.1f}ms; spiking: {', '.join(spiking) or 'none'}")
+        if per_app:
+            attribution[test_name] = per_app
+    
+    return attribution
 
-def generate_comparison_report(response_times, throughput, prometheus_data, output_dir):
+def load_performance_budgets(config_file):
+    """Budgets from ``config_file`` (or $BENCHMARK_BUDGETS_CONFIG, or budgets.json); None without any"""
+    budgets_file = budgets_config_file(config_file)
+    if not budgets_file.exists() and budgets_file == budgets_config_file():
+        log_progress(f"🚦 No budgets file at {budgets_file}, skipping the budget gate")
+        return None
+    try:
+        budgets = load_budgets(budgets_file)
+    except (OSError, KeyError, ValueError) as e:
+        log_progress(f"❌ Cannot read performance budgets {budgets_file}: {e}")
+        sys.exit(1)
+    log_progress(f"🚦 Performance budgets: {budgets_file}")
+    return budgets
+
+def check_performance_budgets(budgets, response_times, throughput, efficiency, apps, output_dir):
+    """Evaluate the budgets against the steady-state aggregates and write them as JUnit XML"""
+    results = evaluate_budgets(budgets, response_times, throughput, efficiency, app_ids(apps))
+    for result in results:
+        if result['status'] == FAILED:
+            log_progress(f"  ❌ {result['test']} ({result['app']}): {budget_condition(result)} failed "
+                         f"({result['actual']:.2f} {result['unit']})")
+    
+    junit_file = write_junit(results, Path(output_dir) / "performance_budgets.xml")
+    failed = sum(result['status'] == FAILED for result in results)
+    log_progress(f"  🚦 {failed} of {len(results)} budget check(s) failed; JUnit report: {junit_file}")
+    return results
+
+def format_interval(value, interval):
+    """``value [low, high]`` with two decimals"""
+    if interval is None:
+        return f"{value:.2f}"
+    return f"{value:.2f} [{interval[0]:.2f}, {interval[1]:.2f}]"
+
+def format_difference(test):
+    """Signed difference with its interval, marked when significant"""
+    low, high = test['ci']
+    marker = " ✔️" if test['significant'] else ""
+    return f"{test['difference']:+.2f} [{low:+.2f}, {high:+.2f}]{marker}"
+
+def generate_comparison_report(response_times, throughput, timelines, prometheus_data, efficiency, comparisons,
+                               endpoints, tail_attribution, nodes, budgets, output_dir, apps):
     """Generate comprehensive comparison report"""
+    from bootstrap import CONFIDENCE_LEVEL
+    
     report_file = Path(output_dir) / "benchmark_comparison_report.md"
     
+    app_names = {app['id']: app['name'] for app in apps}
+    metrics_names = {app['metrics_name']: app['name'] for app in apps}
+    apps = app_ids(apps)
+    
     with open(report_file, 'w') as f:
         f.write("# Go vs C# Performance Benchmark Report\n\n")
         f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        f.write(f"Counts, min, mean and max are exact; percentiles are computed from every k6 point "
+                f"and are accurate to within ±{DEFAULT_RELATIVE_ACCURACY:.0%} relative error.\n\n")
+        f.write("Latency, throughput and error figures cover the detected steady-state window of each test "
+                "(see Test Timeline); rates use its real wall-clock duration.\n\n")
+        
+        # Load stages inferred from the per-second request curve
+        f.write("## ⏱️ Test Timeline\n\n")
+        f.write("| Test | Duration (s) | Ramp-up (s) | Steady State (s) | Ramp-down (s) | Peak Load (req/s) |\n")
+        f.write("|------|--------------|-------------|------------------|---------------|-------------------|\n")
+        
+        for test_name, timeline in timelines.items():
+            stages = timeline['stages']
+            spans = {}
+            for stage in ('ramp_up', 'steady', 'ramp_down'):
+                span = stages[stage]
+                spans[stage] = f"{span[0]}–{span[1] + 1}" if span else "-"
+            f.write(f"| {test_name} | {timeline['duration_s']} | {spans['ramp_up']} | {spans['steady']} | "
+                   f"{spans['ramp_down']} | {stages['peak']:.0f} |\n")
+        
+        f.write("\n")
+        
+        # Per-app, per-test limits from the budgets file
+        if budgets is not None:
+            failed = sum(result['status'] == FAILED for result in budgets)
+            f.write("## 🚦 Performance Budgets\n\n")
+            f.write(f"{'❌' if failed else '✅'} {failed} of {len(budgets)} budget check(s) failed. "
+                    "Checks whose figure is missing from this session are skipped.\n\n")
+            if budgets:
+                f.write("| Test | Application | Budget | Actual | Result |\n")
+                f.write("|------|-------------|--------|--------|--------|\n")
+                for result in budgets:
+                    f.write(f"| {result['test']} | {app_names[result['app']]} | {budget_condition(result)} | "
+                           f"{format_metric(result['actual'], '{:.2f} ' + result['unit'])} | "
+                           f"{BUDGET_STATUS_MARKERS[result['status']]} |\n")
+                f.write("\n")
         
         # Performance Summary by Application
         f.write("## 📊 Performance Summary by Application\n\n")
         
-        apps = ['go', 'csharp_ef', 'csharp_dapper']
-        app_names = {'go': 'Go', 'csharp_ef': 'C# Entity Framework', 'csharp_dapper': 'C# Dapper'}
+        if nodes:
+            f.write(f"Tests {', '.join(nodes)} were driven by several load generators; the figures below combine "
+                    "them (see Load Generator Nodes).\n\n")
         
         for app in apps:
             f.write(f"### {app_names[app]}\n\n")
             
             # Response times table for this app
             f.write("#### Response Times\n\n")
-            f.write("| Test | Count | Min (ms) | Mean (ms) | Median (ms) | P95 (ms) | P99 (ms) | Max (ms) |\n")
-            f.write("|------|-------|----------|-----------|-------------|----------|----------|----------|\n")
+            f.write("| Test | Count | Min (ms) | Mean (ms) | Median (ms) | P95 (ms) | P99 (ms) | P99.9 (ms) | Max (ms) |\n")
+            f.write("|------|-------|----------|-----------|-------------|----------|----------|------------|----------|\n")
             
             for test_name, test_data in response_times.items():
                 if app in test_data and 'error' not in test_data[app]:
                     stats = test_data[app]
                     f.write(f"| {test_name} | {stats['count']} | "
                            f"{stats['min']:.2f} | {stats['mean']:.2f} | {stats['median']:.2f} | "
-                           f"{stats['p95']:.2f} | {stats['p99']:.2f} | {stats['max']:.2f} |\n")
+                           f"{stats['p95']:.2f} | {stats['p99']:.2f} | {stats['p999']:.2f} | {stats['max']:.2f} |\n")
             
             # Throughput table for this app
             f.write("\n#### Throughput\n\n")
-            f.write("| Test | Operations | Errors | Error Rate (%) | Ops/sec |\n")
-            f.write("|------|------------|--------|----------------|---------|\n")
+            f.write("| Test | Operations | Errors | Error Rate (%) | Ops/sec | Requests | Req/sec |\n")
+            f.write("|------|------------|--------|----------------|---------|----------|---------|\n")
             
             for test_name, test_data in throughput.items():
                 if app in test_data:
                     stats = test_data[app]
                     f.write(f"| {test_name} | {stats['operations']} | {stats['errors']} | "
-                           f"{stats['error_rate_percent']:.2f} | {stats['ops_per_sec']:.2f} |\n")
+                           f"{stats['error_rate_percent']:.2f} | {stats['ops_per_sec']:.2f} | "
+                           f"{stats['requests']} | {stats['rps']:.2f} |\n")
             
             f.write("\n")
         
@@ -284,67 +501,220 @@ def generate_comparison_report(response_times, throughput, prometheus_data, outp
         for test_name in response_times.keys():
             f.write(f"### {test_name.replace('-', ' ').title()}\n\n")
             
-            # Response time comparison
-            f.write("#### Response Times\n\n")
-            f.write("| Application | Mean (ms) | P95 (ms) | Operations |\n")
-            f.write("|-------------|-----------|----------|-----------|\n")
+            # Response time comparison with bootstrap confidence intervals
+            intervals = comparisons.get(test_name, {}).get('intervals', {})
+            f.write(f"#### Response Times ({CONFIDENCE_LEVEL:.0%} bootstrap CI)\n\n")
+            f.write("| Application | Mean (ms) | P95 (ms) | P99 (ms) | Operations |\n")
+            f.write("|-------------|-----------|----------|----------|------------|\n")
             
             for app in apps:
                 if app in response_times[test_name] and 'error' not in response_times[test_name][app]:
                     rt_stats = response_times[test_name][app]
                     th_stats = throughput[test_name][app]
-                    f.write(f"| {app_names[app]} | {rt_stats['mean']:.2f} | {rt_stats['p95']:.2f} | {th_stats['operations']} |\n")
+                    app_intervals = intervals.get(app, {})
+                    f.write(f"| {app_names[app]} | {format_interval(rt_stats['mean'], app_intervals.get('mean'))} | "
+                           f"{format_interval(rt_stats['p95'], app_intervals.get('p95'))} | "
+                           f"{format_interval(rt_stats['p99'], app_intervals.get('p99'))} | {th_stats['operations']} |\n")
+            
+            # Pairwise differences (first minus second; negative means the first is faster)
+            pairs = comparisons.get(test_name, {}).get('pairs', {})
+            if pairs:
+                f.write("\n#### Pairwise Differences\n\n")
+                f.write("| Comparison | Δ Mean (ms) | Δ P95 (ms) | Δ P99 (ms) |\n")
+                f.write("|------------|-------------|------------|------------|\n")
+                for (first, second), tests in pairs.items():
+                    f.write(f"| {app_names[first]} − {app_names[second]} | {format_difference(tests['mean'])} | "
+                           f"{format_difference(tests['p95'])} | {format_difference(tests['p99'])} |\n")
             
             f.write("\n")
         
-        # Application Metrics Comparison
+        if comparisons:
+            f.write(f"Intervals are {CONFIDENCE_LEVEL:.0%} bootstrap percentile intervals over the steady-state "
+                    f"histograms; ✔️ marks differences whose interval excludes zero. Percentile intervals cannot "
+                    f"be narrower than the ±{DEFAULT_RELATIVE_ACCURACY:.0%} histogram resolution.\n\n")
+        
+        # Per-generator view of the tests driven by several k6 nodes
+        if nodes:
+            f.write("## 🛰️ Load Generator Nodes\n\n")
+            f.write("Each node's figures cover its own steady state. Clock offsets (added to the node's timestamps "
+                    "before merging) are configured or estimated from when each node ramps up and down, with a "
+                    "1-sigma uncertainty; the per-second windows move by the offset rounded to a whole second. "
+                    "Set uncertain offsets in node_offsets.json or with --node-offset. ⚠️ marks a node whose p99 is "
+                    "far above the other nodes' for the same app, which usually means the generator itself "
+                    "was saturated.\n\n")
+            
+            for test_name, per_node in nodes.items():
+                f.write(f"### {test_name.replace('-', ' ').title()}\n\n")
+                f.write("| Node | Clock Offset (s) | Uncertainty (s) | Windows Moved (s) | Source | Lines | Points |\n")
+                f.write("|------|------------------|-----------------|-------------------|--------|-------|--------|\n")
+                for node, summary in per_node.items():
+                    source = NODE_OFFSET_SOURCES.get(summary['offset_source'], summary['offset_source'])
+                    if summary['offset_similarity'] is not None:
+                        source += f" (similarity {summary['offset_similarity']:.3f})"
+                    uncertainty = summary['offset_uncertainty_s']
+                    marker = " ⚠️" if uncertainty is not None and uncertainty > MAX_OFFSET_UNCERTAINTY_S else ""
+                    f.write(f"| {node} | {summary['offset_s']:+.2f} | {format_metric(uncertainty, '±{:.2f}')}{marker} | "
+                           f"{summary['offset_shift_s']:+d} | {source} | {summary['lines']:,} | "
+                           f"{summary['points']:,} |\n")
+                f.write("\n")
+                
+                f.write("| Application | Node | Requests | Share | Req/sec | P50 (ms) | P95 (ms) | P99 (ms) | Error Rate (%) |\n")
+                f.write("|-------------|------|----------|-------|---------|----------|----------|----------|----------------|\n")
+                for app in apps:
+                    for node, summary in per_node.items():
+                        stats = summary['apps'].get(app)
+                        if stats is None:
+                            continue
+                        marker = " ⚠️" if stats['saturated'] else ""
+                        f.write(f"| {app_names[app]} | {node}{marker} | {stats['requests']} | "
+                               f"{format_metric(stats['share'], '{:.1%}')} | {format_metric(stats['rps'], '{:.2f}')} | "
+                               f"{stats['p50']:.2f} | {stats['p95']:.2f} | {stats['p99']:.2f} | "
+                               f"{stats['error_rate_percent']:.2f} |\n")
+                f.write("\n")
+        
+        # Per-endpoint breakdown from the k6 request tags
+        if any(endpoints.values()):
+            f.write("## 🔗 Endpoint Breakdown\n\n")
+            f.write("Built from the tags of k6's http_req_duration over the whole test, attributed to each app "
+                    "by its base URL; ids in paths are collapsed to {id}. Slowest p95 first.\n\n")
+            
+            for test_name, per_app in endpoints.items():
+                if not per_app:
+                    continue
+                f.write(f"### {test_name.replace('-', ' ').title()}\n\n")
+                for app in apps:
+                    rows = per_app.get(app)
+                    if not rows:
+                        continue
+                    f.write(f"#### {app_names[app]}\n\n")
+                    f.write("| Method | Endpoint | Requests | RPS | P50 (ms) | P95 (ms) | P99 (ms) | Status Codes | Unexpected |\n")
+                    f.write("|--------|----------|----------|-----|----------|----------|----------|--------------|------------|\n")
+                    for row in rows[:ENDPOINT_REPORT_LIMIT]:
+                        statuses = ", ".join(f"{status or '-'}: {count}" for status, count in row['statuses'].items())
+                        f.write(f"| {row['method']} | `{row['endpoint']}` | {row['requests']} | "
+                               f"{format_metric(row['rps'], '{:.2f}')} | {row['p50']:.2f} | {row['p95']:.2f} | "
+                               f"{row['p99']:.2f} | {statuses} | {row['unexpected']} |\n")
+                    if len(rows) > ENDPOINT_REPORT_LIMIT:
+                        f.write(f"\n{len(rows) - ENDPOINT_REPORT_LIMIT} faster endpoint(s) omitted "
+                                f"(see analysis_summary.json).\n")
+                    f.write("\n")
+        
+        # Application Metrics Comparison (server-side view from the /metrics snapshots)
         if prometheus_data:
             f.write("## 💾 Application Metrics Comparison\n\n")
+            f.write("Server-side figures are derived from the deltas between consecutive /metrics snapshots "
+                    "of each test; latency quantiles are interpolated within the histogram buckets.\n\n")
             
-            if 'go' in prometheus_data and 'csharp' in prometheus_data:
-                go_metrics = prometheus_data['go']
-                csharp_metrics = prometheus_data['csharp']
+            for test_name, per_app in prometheus_data.items():
+                metric_apps = [app for app in metrics_names if app in per_app]
+                summaries = [per_app[app]['summary'] for app in metric_apps]
                 
-                # Memory usage comparison
-                f.write("### Memory Usage\n\n")
-                f.write("| Metric | Go | C# |\n")
-                f.write("|--------|----|----|\\n")
+                f.write(f"### {test_name.replace('-', ' ').title()}\n\n")
+                f.write("| Metric | " + " | ".join(metrics_names[app] for app in metric_apps) + " |\n")
+                f.write("|--------|" + "|".join("----" for _ in metric_apps) + "|\n")
+                f.write("| Snapshots | " + " | ".join(str(s['snapshots']) for s in summaries) + " |\n")
                 
-                # Look for memory-related metrics
-                memory_metrics = ['benchmark_memory_usage_bytes', 'go_memstats_heap_alloc_bytes']
-                for metric in memory_metrics:
-                    go_val = next((v for k, v in go_metrics.items() if metric in k), 'N/A')
-                    cs_val = next((v for k, v in csharp_metrics.items() if metric in k), 'N/A')
-                    
-                    # Format memory values nicely
-                    if isinstance(go_val, (int, float)):
-                        go_val = f"{go_val/1024/1024:.1f} MB"
-                    if isinstance(cs_val, (int, float)):
-                        cs_val = f"{cs_val/1024/1024:.1f} MB"
-                    
-                    f.write(f"| {metric.replace('_', ' ').title()} | {go_val} | {cs_val} |\n")
+                rates = [s['counter_rates'].get(SERVER_REQUESTS_METRIC) for s in summaries]
+                f.write("| Request Rate (req/s) | " + " | ".join(format_metric(r, "{:.2f}") for r in rates) + " |\n")
+                
+                for quantile in ('p50', 'p95', 'p99'):
+                    values = [s['latency'].get(SERVER_LATENCY_METRIC, {}).get(quantile) for s in summaries]
+                    f.write(f"| Server {quantile.upper()} (ms) | "
+                            + " | ".join(format_metric(v, "{:.2f}") for v in values) + " |\n")
+                
+                # Memory gauges from the last snapshot of the test
+                for metric in MEMORY_METRICS:
+                    values = [next((v for (name, _labels), v in s['latest'].items() if name == metric), None)
+                              for s in summaries]
+                    f.write(f"| {metric.replace('_', ' ').title()} | "
+                            + " | ".join(format_metric(v and v / 1024 / 1024, "{:.1f} MB") for v in values) + " |\n")
                 
                 f.write("\n")
         
+        # Resource efficiency (docker stats over the k6 steady state)
+        if efficiency:
+            f.write("## ⚡ Resource Efficiency\n\n")
+            f.write("CPU and memory are averaged over the docker stats samples taken during the steady state "
+                    "(100% CPU = one core); network bytes are the container's rx+tx growth per k6 request.\n\n")
+            
+            for test_name, per_app in efficiency.items():
+                f.write(f"### {test_name.replace('-', ' ').title()}\n\n")
+                f.write("| Application | CPU (cores) | Memory (MB) | Req/sec | Req per CPU-second | MB per 1k RPS | Net Bytes/Req |\n")
+                f.write("|-------------|-------------|-------------|---------|--------------------|---------------|---------------|\n")
+                
+                for app in apps:
+                    if app not in per_app:
+                        continue
+                    stats = per_app[app]
+                    marker = "" if stats['aligned'] else " ⚠️"
+                    f.write(f"| {app_names[app]}{marker} | {stats['cpu_cores']:.2f} | {stats['memory_mb']:.1f} | "
+                           f"{stats['rps']:.2f} | {format_metric(stats['requests_per_cpu_second'], '{:.1f}')} | "
+                           f"{format_metric(stats['mb_per_1k_rps'], '{:.1f}')} | "
+                           f"{format_metric(stats['network_bytes_per_request'], '{:.0f}')} |\n")
+                
+                f.write("\n")
+            
+            if any(not stats['aligned'] for per_app in efficiency.values() for stats in per_app.values()):
+                f.write("⚠️ No docker stats sample fell inside the steady state (clock or time zone mismatch?); "
+                        "the whole test was averaged instead.\n\n")
+        
+        # Server-side signals sampled during the slowest k6 seconds
+        if tail_attribution:
+            f.write("## 🔥 Tail Latency Attribution\n\n")
+            f.write("The slowest seconds of each app (by k6 p99) are joined to the nearest /metrics and docker "
+                    "stats sample. Tail and baseline means compare each signal during those seconds and during "
+                    "the rest of the test; 🔺 marks signals that spike with the tail.\n\n")
+            
+            for test_name, per_app in tail_attribution.items():
+                f.write(f"### {test_name.replace('-', ' ').title()}\n\n")
+                for app in apps:
+                    result = per_app.get(app)
+                    if result is None:
+                        continue
+                    slowest = ", ".join(f"{window['second']}s ({window['p99']:.0f}ms)" for window in result['slowest'])
+                    f.write(f"#### {app_names[app]}\n\n")
+                    f.write(f"{result['tail_windows']} of {result['windows']} seconds have p99 ≥ "
+                            f"{result['p99_threshold']:.2f}ms (median p99 elsewhere {result['baseline_p99']:.2f}ms). "
+                            f"Slowest: {slowest}.\n\n")
+                    f.write("| Signal | Tail Mean | Baseline Mean | Lift | Correlation with p99 | Spikes |\n")
+                    f.write("|--------|-----------|---------------|------|----------------------|--------|\n")
+                    for signal in result['signals'][:TAIL_SIGNAL_REPORT_LIMIT]:
+                        f.write(f"| `{signal['signal']}` | {signal['tail_mean']:.4g} | {signal['baseline_mean']:.4g} | "
+                               f"{format_metric(signal['lift'], '{:.2f}×')} | "
+                               f"{format_metric(signal['correlation'], '{:+.2f}')} | "
+                               f"{'🔺' if signal['spikes'] else '-'} |\n")
+                    f.write("\n")
+        
         # Summary and Recommendations
         f.write("## 🎯 Key Findings & Recommendations\n\n")
         
         # Find best performing app per test
         f.write("### Performance Winners\n\n")
         
+        f.write("A winner is only declared when its mean latency is significantly lower than every other "
+                "application's.\n\n")
+        
         for test_name in response_times.keys():
-            best_app = None
-            best_mean = float('inf')
+            comparison = comparisons.get(test_name, {'winners': {}, 'pairs': {}})
+            winner = comparison['winners'].get('mean')
+            title = test_name.replace('-', ' ').title()
             
-            for app in apps:
-                if app in response_times[test_name] and 'error' not in response_times[test_name][app]:
-                    mean_time = response_times[test_name][app]['mean']
-                    if mean_time < best_mean:
-                        best_mean = mean_time
-                        best_app = app
+            if winner:
+                f.write(f"- **{title}**: {app_names[winner]} "
+                       f"({response_times[test_name][winner]['mean']:.2f}ms avg, significant)\n")
+                continue
             
-            if best_app:
-                f.write(f"- **{test_name.replace('-', ' ').title()}**: {app_names[best_app]} ({best_mean:.2f}ms avg)\n")
+            # Report which applications are statistically indistinguishable from the fastest one
+            candidates = [app for app in apps
+                          if app in response_times[test_name] and 'error' not in response_times[test_name][app]]
+            if not candidates:
+                continue
+            fastest = min(candidates, key=lambda app: response_times[test_name][app]['mean'])
+            tied = [app for app in candidates if app != fastest and not any(
+                tests['mean']['significant'] for pair, tests in comparison['pairs'].items()
+                if set(pair) == {fastest, app})]
+            names = ", ".join(app_names[app] for app in [fastest] + tied)
+            f.write(f"- **{title}**: no significant winner ({names} within noise)\n")
         
         # Error rate analysis
         f.write("\n### Error Rate Analysis\n\n")
@@ -371,8 +741,45 @@ def generate_comparison_report(response_times, throughput, prometheus_data, outp
     print(f"✅ Comparison report generated: {report_file}")
     return report_file
 
-def create_visualizations(response_times, throughput, output_dir):
-    """Create performance visualization charts"""
+def write_summary_json(response_times, throughput, timelines, prometheus_data, efficiency, comparisons, endpoints,
+                       tail_attribution, nodes, budgets, output_dir):
+    """Write the machine-readable results of the session to analysis_summary.json"""
+    summary = {
+        'generated_at': datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
+        'response_times': response_times,
+        'throughput': throughput,
+        'timelines': {test_name: {key: value for key, value in timeline.items() if key != 'windows'}
+                      for test_name, timeline in timelines.items()},
+        'comparisons': {test_name: {'intervals': comparison['intervals'],
+                                    'pairs': {f"{first} vs {second}": tests
+                                              for (first, second), tests in comparison['pairs'].items()},
+                                    'winners': comparison['winners']}
+                        for test_name, comparison in comparisons.items()},
+        # 'latest' holds the raw samples of the last snapshot, keyed by (name, labels)
+        'application_metrics': {test_name: {app: {key: value for key, value in analysis['summary'].items()
+                                                  if key != 'latest'}
+                                            for app, analysis in per_app.items()}
+                                for test_name, per_app in prometheus_data.items()},
+        'resource_efficiency': efficiency,
+        'endpoints': endpoints,
+        'tail_attribution': tail_attribution,
+        'nodes': nodes,
+        'budgets': budgets,
+    }
+
+    summary_file = Path(output_dir) / "analysis_summary.json"
+    with open(summary_file, 'w') as f:
+        # numpy scalars from the bootstrap are plain numbers to JSON
+        json.dump(summary, f, indent=2, default=float)
+
+    print(f"✅ JSON summary generated: {summary_file}")
+    return summary_file
+
+def create_visualizations(response_times, throughput, output_dir, apps):
+    """Create performance visualization charts.
+
+    The plotting stack is imported here, not at module level, so headless runs never load it.
+    """
     try:
         import matplotlib.pyplot as plt
         import seaborn as sns
@@ -381,14 +788,15 @@ def create_visualizations(response_times, throughput, output_dir):
         plt.style.use('seaborn-v0_8')
         fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(20, 16))
         
-        apps = ['go', 'csharp_ef', 'csharp_dapper']
-        app_names = {'go': 'Go', 'csharp_ef': 'C# EF', 'csharp_dapper': 'C# Dapper'}
-        colors = {'go': '#00ADD8', 'csharp_ef': '#512BD4', 'csharp_dapper': '#68217A'}
+        app_names = {app['id']: app['short_name'] for app in apps}
+        colors = {app['id']: app['color'] for app in apps}
+        apps = app_ids(apps)
         
         # 1. Response Time Comparison by App and Test
         test_names = list(response_times.keys())
         x = np.arange(len(test_names))
-        width = 0.25
+        width = 0.75 / max(len(apps), 1)
+        center = width * (len(apps) - 1) / 2
         
         for i, app in enumerate(apps):
             means = []
@@ -403,7 +811,7 @@ def create_visualizations(response_times, throughput, output_dir):
         ax1.set_xlabel('Test Types')
         ax1.set_ylabel('Mean Response Time (ms)')
         ax1.set_title('Response Time Comparison by Application')
-        ax1.set_xticks(x + width)
+        ax1.set_xticks(x + center)
         ax1.set_xticklabels([t.replace('-', '\n') for t in test_names])
         ax1.legend()
         ax1.set_yscale('log')  # Log scale for better visualization
@@ -422,7 +830,7 @@ def create_visualizations(response_times, throughput, output_dir):
         ax2.set_xlabel('Test Types')
         ax2.set_ylabel('Operations per Second')
         ax2.set_title('Throughput Comparison by Application')
-        ax2.set_xticks(x + width)
+        ax2.set_xticks(x + center)
         ax2.set_xticklabels([t.replace('-', '\n') for t in test_names])
         ax2.legend()
         
@@ -440,7 +848,7 @@ def create_visualizations(response_times, throughput, output_dir):
         ax3.set_xlabel('Test Types')
         ax3.set_ylabel('Error Rate (%)')
         ax3.set_title('Error Rate Comparison by Application')
-        ax3.set_xticks(x + width)
+        ax3.set_xticks(x + center)
         ax3.set_xticklabels([t.replace('-', '\n') for t in test_names])
         ax3.legend()
         
@@ -458,7 +866,7 @@ def create_visualizations(response_times, throughput, output_dir):
         ax4.set_xlabel('Test Types')
         ax4.set_ylabel('P95 Response Time (ms)')
         ax4.set_title('P95 Response Time Comparison by Application')
-        ax4.set_xticks(x + width)
+        ax4.set_xticks(x + center)
         ax4.set_xticklabels([t.replace('-', '\n') for t in test_names])
         ax4.legend()
         ax4.set_yscale('log')  # Log scale for better visualization
@@ -477,17 +885,100 @@ def create_visualizations(response_times, throughput, output_dir):
     except Exception as e:
         print(f"❌ Error generating charts: {e}")
 
-def main():
-    if len(sys.argv) != 2:
-        log_progress("Usage: python3 analyze-results.py <results_directory>")
-        sys.exit(1)
+def parse_args():
+    parser = argparse.ArgumentParser(description="Analyze Go vs C# benchmark results")
+    parser.add_argument("results_dir", help="benchmark session directory (results/benchmark_<timestamp>)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes used to parse k6 output (default: all cores, 1 disables parallelism)")
+    parser.add_argument("--apps-config", default=None,
+                        help="JSON file listing the benchmarked applications (default: apps.json)")
+    parser.add_argument("--backend", choices=("auto", "json", "csv"), default="auto",
+                        help="k6 output format to ingest per test (default: auto, benchmarks both on every test and "
+                             "picks the faster); a test without that format is read from the other")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false",
+                        help="always re-parse k6 output instead of using <results_dir>/k6-cache")
+    parser.add_argument("--no-endpoints", dest="endpoints", action="store_false",
+                        help="skip the per-endpoint breakdown (k6 request tags are then never parsed)")
+    parser.add_argument("--node-offset", dest="node_offsets", action="append", default=[], type=parse_node_offset,
+                        metavar="NODE=SECONDS",
+                        help="clock offset added to a load generator's timestamps (repeatable; overrides "
+                             "<results_dir>/node_offsets.json; unset nodes are estimated from their load curves)")
+    budgets = parser.add_mutually_exclusive_group()
+    budgets.add_argument("--budgets", default=None,
+                         help="JSON file of per-app, per-test performance budgets (default: "
+                              "$BENCHMARK_BUDGETS_CONFIG or budgets.json); any failure exits with status "
+                              f"{EXIT_BUDGET_FAILED}")
+    budgets.add_argument("--no-budgets", dest="use_budgets", action="store_false",
+                         help="do not evaluate performance budgets")
+    parser.add_argument("--no-fast-parse", dest="fast_parse", action="store_false",
+                        help="decode every k6 line with json.loads instead of the memory-mapped fast path")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--no-charts", dest="charts", action="store_false",
+                        help="skip the PNG charts and never import matplotlib/seaborn")
+    output.add_argument("--json-only", action="store_true",
+                        help="only write analysis_summary.json (plus time series and profile): no Markdown "
+                             "report and no charts")
+    parser.add_argument("--profile", action="store_true",
+                        help="run every stage under cProfile and save the slowest stage's stats as "
+                             "reports/analysis_profile_<stage>.pstats")
+    follow = parser.add_argument_group("live follow mode")
+    follow.add_argument("--follow", nargs="?", const="", default=None, metavar="TEST",
+                        help="tail k6-results/<TEST>.json or <TEST>.json.gz while k6 writes it (default: the newest "
+                             "file) and print rolling per-app stats instead of generating reports")
+    follow.add_argument("--interval", type=float, default=DEFAULT_REPORT_INTERVAL,
+                        help=f"seconds between follow-mode updates (default: {DEFAULT_REPORT_INTERVAL})")
+    follow.add_argument("--rolling-window", type=int, default=DEFAULT_ROLLING_SECONDS,
+                        help=f"seconds of data in the rolling stats (default: {DEFAULT_ROLLING_SECONDS})")
+    follow.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help=f"stop after the file stops growing for this long (default: {DEFAULT_IDLE_TIMEOUT}s)")
+    follow.add_argument("--abort-error-rate", type=float, default=None, metavar="PERCENT",
+                        help="exit with status 3 when any app's rolling error rate exceeds this")
+    follow.add_argument("--abort-p95", type=float, default=None, metavar="MS",
+                        help="exit with status 3 when any app's rolling p95 exceeds this")
+    follow.add_argument("--abort-p99", type=float, default=None, metavar="MS",
+                        help="exit with status 3 when any app's rolling p99 exceeds this")
+    follow.add_argument("--abort-pid", type=int, default=None,
+                        help="send SIGINT to this process (e.g. k6) when aborting")
+    parser.add_argument("--index", default=None,
+                        help="SQLite cross-session index to record this session in (default: "
+                             "$BENCHMARK_RESULTS_INDEX or benchmark_index.sqlite next to the session)")
+    parser.add_argument("--no-index", dest="use_index", action="store_false",
+                        help="do not record this session in the cross-session index")
+    return parser.parse_args()
+
+def follow_results(results_dir, args):
+    """Run live follow mode on one k6 JSON file and return the exit status"""
+    k6_dir = Path(results_dir) / "k6-results"
+    json_files = k6_output_files(k6_dir, ".json") if k6_dir.exists() else {}
+    if args.follow:
+        # run-benchmarks.sh writes <test>.json.gz; follow that until k6 creates the file
+        json_file = json_files.get(args.follow, k6_dir / f"{args.follow}.json.gz")
+    else:
+        candidates = sorted(json_files.values(), key=lambda path: path.stat().st_mtime)
+        if not candidates:
+            log_progress(f"❌ No k6 JSON output to follow in {k6_dir}")
+            return 1
+        json_file = candidates[-1]
+    if compression_of(json_file) not in (None, '.gz'):
+        log_progress(f"❌ Cannot follow {json_file.name}: only .json and .json.gz are read incrementally")
+        return 1
     
-    results_dir = sys.argv[1]
+    return follow_k6_file(json_file, load_apps(args.apps_config), interval=args.interval,
+                          rolling_seconds=args.rolling_window, max_error_rate=args.abort_error_rate,
+                          max_p95=args.abort_p95, max_p99=args.abort_p99, abort_pid=args.abort_pid,
+                          idle_timeout=args.idle_timeout, fast=args.fast_parse)
+
+def main():
+    args = parse_args()
+    results_dir = args.results_dir
     
     if not os.path.exists(results_dir):
         log_progress(f"❌ Results directory does not exist: {results_dir}")
         sys.exit(1)
     
+    if args.follow is not None:
+        sys.exit(follow_results(results_dir, args))
+    
     log_progress("🔍 Analyzing benchmark results...")
     log_progress(f"Results directory: {results_dir}")
     log_progress("")
@@ -497,33 +988,106 @@ def main():
     reports_dir = Path(results_dir) / "reports"
     reports_dir.mkdir(exist_ok=True)
     
+    profile = PipelineProfile(profile=args.profile, imports_started=MODULE_LOAD_STARTED)
+    
     # Load and analyze K6 results
     log_progress("📊 Starting K6 results analysis...")
-    k6_results = load_k6_results(results_dir)
+    apps = load_apps(args.apps_config)
+    log_progress(f"🧩 Applications: {', '.join(app['name'] for app in apps)}")
+    budgets = load_performance_budgets(args.budgets) if args.use_budgets else None
+    with profile.stage("load_k6_results") as stage:
+        k6_results = load_k6_results(results_dir, apps, workers=max(1, args.workers), fast=args.fast_parse,
+                                     use_cache=args.use_cache, backend=args.backend, endpoints=args.endpoints,
+                                     node_offsets=dict(args.node_offsets))
+        stage['lines'] = sum(aggregate.lines for aggregate in k6_results.values())
+        stage['points'] = sum(aggregate.points for aggregate in k6_results.values())
     
-    log_progress("📈 Analyzing response times...")
-    response_times = analyze_response_times(k6_results)
-    
-    log_progress("🚀 Analyzing throughput...")
-    throughput = analyze_throughput(k6_results)
+    log_progress("📈 Analyzing response times and throughput...")
+    with profile.stage("analyze_k6_results") as stage:
+        response_times, throughput, timelines, latency_histograms = analyze_k6_results(k6_results, apps)
+        stage['points'] = sum(aggregate.points for aggregate in k6_results.values())
+    with profile.stage("analyze_endpoints"):
+        endpoints = analyze_endpoints(k6_results, timelines)
+    nodes = analyze_nodes(k6_results)
+    with profile.stage("compare_latency"):
+        comparisons = compare_latency(latency_histograms)
+    with profile.stage("write_timeseries"):
+        write_timeseries(timelines, reports_dir)
     
     # Load Prometheus metrics
     log_progress("📊 Loading Prometheus metrics...")
-    prometheus_data = load_prometheus_metrics(results_dir)
+    with profile.stage("load_prometheus_metrics") as stage:
+        prometheus_data = load_prometheus_metrics(results_dir, apps)
+        stage['snapshots'] = sum(len(analysis['snapshots']) for per_app in prometheus_data.values()
+                                 for analysis in per_app.values())
+    
+    # Resource efficiency from docker stats
+    log_progress("⚡ Computing resource efficiency...")
+    with profile.stage("analyze_resource_efficiency"):
+        efficiency = analyze_resource_efficiency(results_dir, timelines, apps)
+    
+    # Server-side signals behind the slowest k6 seconds
+    log_progress("🔥 Attributing tail latency to server-side signals...")
+    with profile.stage("attribute_tail_latency"):
+        tail_attribution = attribute_tail_latency(results_dir, timelines, prometheus_data, apps)
+    
+    budget_results = None
+    if budgets is not None:
+        log_progress("🚦 Checking performance budgets...")
+        with profile.stage("check_performance_budgets"):
+            budget_results = check_performance_budgets(budgets, response_times, throughput, efficiency, apps,
+                                                       reports_dir)
     
     # Generate reports
-    log_progress("📝 Generating comparison report...")
-    report_file = generate_comparison_report(response_times, throughput, prometheus_data, reports_dir)
+    with profile.stage("write_summary_json"):
+        summary_file = write_summary_json(response_times, throughput, timelines, prometheus_data, efficiency,
+                                          comparisons, endpoints, tail_attribution, nodes, budget_results,
+                                          reports_dir)
+    
+    report_file = summary_file
+    if not args.json_only:
+        log_progress("📝 Generating comparison report...")
+        with profile.stage("generate_comparison_report"):
+            report_file = generate_comparison_report(response_times, throughput, timelines, prometheus_data,
+                                                     efficiency, comparisons, endpoints, tail_attribution, nodes,
+                                                     budget_results, reports_dir, apps)
     
     # Create visualizations
-    log_progress("📊 Creating visualizations...")
-    create_visualizations(response_times, throughput, reports_dir)
+    if args.charts and not args.json_only:
+        log_progress("📊 Creating visualizations...")
+        with profile.stage("create_visualizations"):
+            create_visualizations(response_times, throughput, reports_dir, apps)
+        log_progress("📊 Rendering latency distribution charts...")
+        from distribution_charts import create_distribution_charts
+        with profile.stage("create_distribution_charts"):
+            create_distribution_charts(k6_results, latency_histograms, timelines, reports_dir, apps,
+                                       workers=max(1, args.workers))
+    
+    if args.use_index:
+        log_progress("🗂️ Updating cross-session results index...")
+        with profile.stage("index_session"):
+            index_session(args.index or default_index_file(results_dir), results_dir, response_times, throughput,
+                          efficiency, timelines)
+    
+    log_progress("")
+    log_progress(f"⏱️ Stage timings (module load {profile.startup_s:.2f}s):")
+    for line in profile.summary_lines():
+        log_progress(line)
+    profile_file = profile.write(reports_dir)
+    log_progress(f"  Profile written: {profile_file}")
+    if args.profile:
+        log_progress(f"  cProfile stats for the slowest stage ({profile.hottest_stage()}): "
+                     f"{reports_dir / f'analysis_profile_{profile.hottest_stage()}.pstats'}")
     
     log_progress("")
     log_progress("📊 Analysis Complete!")
     log_progress(f"📂 Reports generated in: {reports_dir}")
     log_progress(f"📈 Main report: {report_file}")
     log_progress("")
+    
+    if budget_results and any(result['status'] == FAILED for result in budget_results):
+        log_progress("🚦 Performance budgets failed")
+        sys.exit(EXIT_BUDGET_FAILED)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""Application list and k6 metric-name dispatch for the benchmark analysis."""
+
+import json
+import os
+from pathlib import Path
+
+DEFAULT_APPS_CONFIG = Path(__file__).with_name("apps.json")
+APPS_CONFIG_ENV = "BENCHMARK_APPS_CONFIG"
+
+# Per-app k6 metrics are named <app>_[<scope>_]<kind>, e.g. go_response_time,
+# csharp_ef_db_errors or csharp_dapper_memory_operations
+METRIC_KINDS = ('response_time', 'errors', 'operations')
+# k6's built-in request duration carries the request tags used for the per-endpoint breakdown
+ENDPOINT_METRIC = 'http_req_duration'
+ENDPOINT_KEY = (None, ENDPOINT_METRIC, '')
+
+
+def load_apps(config_file=None):
+    """Load the benchmarked applications from ``apps.json`` (or $BENCHMARK_APPS_CONFIG)"""
+    config_file = Path(config_file or os.environ.get(APPS_CONFIG_ENV) or DEFAULT_APPS_CONFIG)
+    with open(config_file, 'r') as f:
+        apps = json.load(f)['apps']
+
+    for app in apps:
+        app.setdefault('name', app['id'])
+        app.setdefault('short_name', app['name'])
+        app.setdefault('color', None)
+        # docker-compose names every app container benchmark_<id>_app
+        app.setdefault('container', f"benchmark_{app['id']}_app")
+        # URL prefix k6 sends the app's requests to; without it the app has no endpoint breakdown
+        app.setdefault('base_url', None)
+        # Name collect-metrics.sh gives the app's /metrics snapshots (<test>_<name>_metrics_*.txt)
+        app.setdefault('metrics_name', app['id'])
+    return apps
+
+
+def app_ids(apps):
+    return [app['id'] for app in apps]
+
+
+def endpoint_urls(apps):
+    """``{app id: base_url}`` of the apps that have one"""
+    return {app['id']: app['base_url'] for app in apps if app.get('base_url')}
+
+
+class MetricDispatch:
+    """Resolve k6 metric names to ``(app, kind, scope)`` keys, once per distinct name.
+
+    ``scope`` is the script-specific infix (``'db'``, ``'memory'``, or ``''``
+    for api-load-test). Names that do not belong to a configured app resolve
+    to None. The lookup table is filled lazily, so the hot loop pays one dict
+    lookup per point no matter how many apps are configured. With
+    ``endpoints`` set, k6's ``http_req_duration`` resolves to ENDPOINT_KEY.
+    """
+
+    def __init__(self, ids, endpoints=False):
+        # Longest id first so an app named "go_fiber" never resolves as "go"
+        self.app_ids = sorted(ids, key=len, reverse=True)
+        self.prefixes = tuple(f"{app}_" for app in self.app_ids)
+        self.table = {ENDPOINT_METRIC: ENDPOINT_KEY} if endpoints else {}
+
+    def resolve(self, metric_name):
+        try:
+            return self.table[metric_name]
+        except KeyError:
+            key = self.table[metric_name] = self._classify(metric_name)
+            return key
+
+    def _classify(self, metric_name):
+        if not metric_name.startswith(self.prefixes):
+            return None
+
+        for app in self.app_ids:
+            if not metric_name.startswith(app + '_'):
+                continue
+            rest = metric_name[len(app) + 1:]
+            for kind in METRIC_KINDS:
+                if rest == kind:
+                    return (app, kind, '')
+                if rest.endswith('_' + kind):
+                    return (app, kind, rest[:-len(kind) - 1])
+        return None
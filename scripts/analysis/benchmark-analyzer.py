@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""Benchmark the analyzer on synthetic k6 output with known ground truth.
+
+For every requested size a synthetic session is generated once (and reused
+afterwards). Each ingestion path then runs in a fresh process, which records
+its own throughput and peak memory and checks every per-app series and the
+detected steady state against the exact ground truth. Steady-state
+detection is also checked on load curves from a few to thousands of req/s.
+Finally the whole analyze-results.py pipeline runs end to end, with charts
+and with --json-only, and its analysis_profile.json stage timings are
+collected together with the cold-start cost of the analyzer and of the
+libraries it only imports on demand.
+
+Exits 1 when a path loses accuracy (wrong counts, quantiles outside the
+histogram's relative accuracy, or a misplaced steady state) or when its
+throughput dropped by more than --threshold percent against a --baseline
+results file.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from app_config import app_ids, endpoint_urls, load_apps
+from common import log_progress
+from histogram import DEFAULT_RELATIVE_ACCURACY
+from k6_cache import CACHE_DIR_NAME, load_k6_cached
+from k6_csv import ingest_k6_csv_files
+from k6_ingest import FAST_DECODER, ingest_k6_file, ingest_k6_files_parallel
+from k6_synthetic import (DEFAULT_DURATION_S, TEST_SCOPES, expected_steady, generate_session, load_ground_truth,
+                          parse_byte_size, synthetic_load_curve)
+from pipeline_profile import PROFILE_FILE_NAME, max_rss_mb
+from timeseries import STEADY_STATE_FRACTION, detect_stages, load_curve, smoothing_width
+
+PATHS = ('json_fast', 'json_reference', 'json_parallel', 'json_gz', 'csv', 'cache_build', 'cache_hit')
+DEFAULT_PATHS = ('json_fast', 'json_parallel', 'json_gz', 'csv', 'cache_build', 'cache_hit')
+DEFAULT_SIZES = "10MB,100MB"
+DEFAULT_THRESHOLD_PERCENT = 15.0
+# Quantile errors are checked against the histogram accuracy plus float noise
+ACCURACY_TOLERANCE = DEFAULT_RELATIVE_ACCURACY * (1 + 1e-9)
+
+ANALYZER_SCRIPT = Path(__file__).resolve().with_name("analyze-results.py")
+STARTUP_REPEATS = 5
+# Libraries analyze-results.py imports only in the code paths that need them
+LAZY_IMPORTS = {'plotting': 'matplotlib.pyplot, seaborn', 'pandas': 'pandas', 'numpy': 'numpy'}
+# analyze-results.py flags of each end-to-end mode
+END_TO_END_MODES = {'charts': (), 'json_only': ("--json-only",)}
+
+# Plateau rates (req/s) of the load curves the steady-state detection is checked on, low rates included
+STAGE_CHECK_RATES = (5, 20, 200, 2000)
+STAGE_CHECK_SEEDS = 20
+# Smallest steady-state edge error tolerated, in seconds (the 80% crossing moves with the noise of the peak)
+STAGE_TOLERANCE_S = 10
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+
+
+def _ingest(path, session_dir, app_ids, workers, urls):
+    """Run one ingestion path over every test of a session and return ``{test: aggregate}``"""
+    k6_dir = session_dir / "k6-results"
+    json_files = {test: k6_dir / f"{test}.json" for test in TEST_SCOPES if (k6_dir / f"{test}.json").exists()}
+    csv_files = {test: k6_dir / f"{test}.csv" for test in TEST_SCOPES if (k6_dir / f"{test}.csv").exists()}
+
+    if path == 'json_fast':
+        return {test: ingest_k6_file(json_file, test, app_ids, fast=True, endpoint_urls=urls) for test, json_file in json_files.items()}
+    if path == 'json_reference':
+        return {test: ingest_k6_file(json_file, test, app_ids, fast=False, endpoint_urls=urls) for test, json_file in json_files.items()}
+    if path == 'json_parallel':
+        return ingest_k6_files_parallel(json_files, app_ids, workers, endpoint_urls=urls)
+    if path == 'json_gz':
+        return {test: ingest_k6_file(k6_dir / f"{test}.json.gz", test, app_ids, fast=True, endpoint_urls=urls)
+                for test in json_files}
+    if path == 'csv':
+        return ingest_k6_csv_files(csv_files, app_ids, workers=1, endpoint_urls=urls)
+    if path in ('cache_build', 'cache_hit'):
+        return load_k6_cached(session_dir, json_files, app_ids, workers, endpoint_urls=urls)
+    raise ValueError(f"unknown path: {path}")
+
+
+def steady_state_error(counts, first_second, start_epoch, duration_s):
+    """``(error_s, tolerance_s)``: worst edge distance between the detected and the profile's steady state.
+
+    An edge may be off by one smoothing width, the resolution the detection works at, or STAGE_TOLERANCE_S.
+    """
+    start, end = detect_stages(counts)['steady']
+    offset = first_second - start_epoch
+    expected_start, expected_end = expected_steady(duration_s, STEADY_STATE_FRACTION)
+    error = max(abs(start + offset - expected_start), abs(end + offset - expected_end))
+    return error, max(STAGE_TOLERANCE_S, smoothing_width(counts))
+
+
+def check_stage_detection(rates=STAGE_CHECK_RATES, seeds=STAGE_CHECK_SEEDS, duration_s=DEFAULT_DURATION_S):
+    """Detect the steady state of Poisson load curves with known plateaus, from a few to thousands of req/s"""
+    results = {}
+    for rate in rates:
+        errors = [steady_state_error(synthetic_load_curve(rate, duration_s, seed), 0, 0, duration_s)
+                  for seed in range(seeds)]
+        results[str(rate)] = {
+            'max_edge_error_s': max(error for error, _tolerance in errors),
+            'failures': sum(error > tolerance for error, tolerance in errors),
+        }
+    return {'rates': results, 'passed': not any(result['failures'] for result in results.values())}
+
+
+def check_accuracy(aggregates, truths):
+    """Compare every ground-truth series and steady state with the analyzer's whole-test aggregate"""
+    worst = {'count_mismatches': 0, 'missing_series': 0, 'max_sum_error': 0.0, 'max_quantile_error': 0.0,
+             'quantile_errors': {}, 'endpoint_mismatches': 0, 'steady_state_mismatches': 0}
+    for test, truth in truths.items():
+        aggregate = aggregates.get(test)
+        if aggregate is not None and aggregate.windows:
+            first_second, counts = load_curve(aggregate)
+            error, tolerance = steady_state_error(counts, first_second, truth['start_epoch'], truth['duration_s'])
+            worst['steady_state_mismatches'] += error > tolerance
+        if aggregate is not None and aggregate.endpoints is not None and 'endpoints' in truth:
+            counts = {}
+            for (app, method, endpoint, status, _expected), histogram in zip(aggregate.endpoints.interner.groups,
+                                                                             aggregate.endpoints.histograms):
+                name = f"{app}|{method}|{endpoint}|{status}"
+                counts[name] = counts.get(name, 0) + histogram.count
+            worst['endpoint_mismatches'] += len(set(counts.items()) ^ set(truth['endpoints'].items()))
+        for name, expected in truth['series'].items():
+            app, kind, scope = name.split('|')
+            histogram = aggregate.series.get((app, kind, scope)) if aggregate else None
+            if histogram is None:
+                worst['missing_series'] += 1
+                continue
+            if histogram.count != expected['count']:
+                worst['count_mismatches'] += 1
+            if expected['sum']:
+                worst['max_sum_error'] = max(worst['max_sum_error'],
+                                             abs(histogram.sum - expected['sum']) / abs(expected['sum']))
+            if kind != 'response_time':
+                continue
+            for q, exact in expected['quantiles'].items():
+                error = abs(histogram.quantile(float(q)) - exact) / exact if exact else 0.0
+                worst['quantile_errors'][q] = max(worst['quantile_errors'].get(q, 0.0), error)
+                worst['max_quantile_error'] = max(worst['max_quantile_error'], error)
+
+    worst['passed'] = (worst['count_mismatches'] == 0 and worst['missing_series'] == 0
+                       and worst['endpoint_mismatches'] == 0 and worst['steady_state_mismatches'] == 0
+                       and worst['max_sum_error'] < 1e-6 and worst['max_quantile_error'] <= ACCURACY_TOLERANCE)
+    return worst
+
+
+def run_path(path, session_dir, app_ids, workers, urls=None):
+    """Measure one ingestion path; meant to run in a fresh process so peak RSS is its own"""
+    truths = load_ground_truth(session_dir)
+    # Throughput of the compressed path is counted in uncompressed JSON bytes, so it compares with json_fast
+    input_bytes = sum((session_dir / "k6-results" / f"{test}.{'csv' if path == 'csv' else 'json'}").stat().st_size
+                      for test in truths)
+
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    aggregates = _ingest(path, session_dir, app_ids, workers, urls)
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+
+    lines = sum(aggregate.lines for aggregate in aggregates.values())
+    points = sum(aggregate.points for aggregate in aggregates.values())
+    return {
+        'path': path,
+        'input_mb': input_bytes / 1e6,
+        'wall_s': wall,
+        'cpu_s': cpu,
+        'mb_per_s': input_bytes / 1e6 / wall if wall > 0 else None,
+        'lines_per_s': lines / wall if wall > 0 else None,
+        'points_per_s': points / wall if wall > 0 else None,
+        'peak_rss_mb': max_rss_mb(resource.RUSAGE_SELF),
+        'workers_peak_rss_mb': max_rss_mb(resource.RUSAGE_CHILDREN),
+        'accuracy': check_accuracy(aggregates, truths),
+    }
+
+
+def run_end_to_end(session_dir, workers, extra_args=()):
+    """Run analyze-results.py on the session and return its stage profile"""
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, str(ANALYZER_SCRIPT), str(session_dir), "--no-index", "--no-cache",
+                                "--backend", "json", "--workers", str(workers), *extra_args],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall = time.perf_counter() - started
+    if completed.returncode != 0:
+        return {'wall_s': wall, 'error': completed.stderr[-2000:]}
+
+    with open(session_dir / "reports" / PROFILE_FILE_NAME) as f:
+        profile = json.load(f)
+    return {'wall_s': wall, 'startup_s': profile.get('startup_s'),
+            'stages': {stage['stage']: stage['wall_s'] for stage in profile['stages']},
+            'peak_rss_mb': profile['peak_rss_mb']}
+
+
+def _median_seconds(command, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True,
+                       cwd=ANALYZER_SCRIPT.parent)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def measure_startup(repeats=STARTUP_REPEATS):
+    """Cold-start cost of the analyzer and of the libraries only charts and CSV ingestion import"""
+    startup = {'analyzer_s': _median_seconds([sys.executable, str(ANALYZER_SCRIPT), "--help"], repeats)}
+    for name, modules in LAZY_IMPORTS.items():
+        try:
+            startup[f'{name}_import_s'] = _median_seconds([sys.executable, "-c", f"import {modules}"], repeats)
+        except subprocess.CalledProcessError:
+            startup[f'{name}_import_s'] = None
+    return startup
+
+
+def prepare_session(work_dir, size_text, seed):
+    """Generate (or reuse) the synthetic session for one size"""
+    session_dir = work_dir / f"k6-synthetic-{size_text.lower()}"
+    if (session_dir / "ground-truth").exists() and len(load_ground_truth(session_dir)) == len(TEST_SCOPES):
+        log_progress(f"♻️ Reusing {session_dir}")
+        return session_dir
+
+    log_progress(f"🏭 Generating {size_text} of k6 output per test in {session_dir}...")
+    started = time.perf_counter()
+    generate_session(session_dir, parse_byte_size(size_text), seed=seed)
+    log_progress(f"  Generated in {time.perf_counter() - started:.1f}s")
+    return session_dir
+
+
+def compare_with_baseline(results, baseline, threshold_percent):
+    """Throughput regressions of every (size, path) against a previous results file"""
+    previous = {(entry['size'], entry['path']): entry for entry in baseline.get('paths', [])}
+    regressions = []
+    for entry in results['paths']:
+        before = previous.get((entry['size'], entry['path']))
+        if not before or not before.get('mb_per_s') or not entry.get('mb_per_s'):
+            continue
+        change = (entry['mb_per_s'] - before['mb_per_s']) / before['mb_per_s'] * 100
+        entry['baseline_mb_per_s'] = before['mb_per_s']
+        entry['change_percent'] = change
+        if change < -threshold_percent:
+            regressions.append(entry)
+    return regressions
+
+
+def compress_session(session_dir):
+    """Write a gzip copy of every JSON output that lacks one, like ``k6 run --out json=<test>.json.gz``"""
+    for json_file in sorted((session_dir / "k6-results").glob("*.json")):
+        gz_file = json_file.with_name(json_file.name + ".gz")
+        if gz_file.exists() and gz_file.stat().st_mtime >= json_file.stat().st_mtime:
+            continue
+        log_progress(f"  🗜️ Compressing {json_file.name}...")
+        with open(json_file, 'rb') as source, gzip.open(gz_file, 'wb', compresslevel=6) as target:
+            shutil.copyfileobj(source, target, 1024 * 1024)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the k6 analyzer on synthetic data with ground truth")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"comma-separated JSON size per test, 10MB to 5GB (default: {DEFAULT_SIZES})")
+    parser.add_argument("--paths", default=",".join(DEFAULT_PATHS),
+                        help=f"ingestion paths to measure, from {', '.join(PATHS)} (default: {','.join(DEFAULT_PATHS)})")
+    parser.add_argument("--work-dir", default="k6-benchmark",
+                        help="where synthetic sessions are generated and kept (default: ./k6-benchmark)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes for the parallel paths (default: all cores)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed of the generator (default: 1)")
+    parser.add_argument("--no-endpoints", dest="endpoints", action="store_false",
+                        help="measure ingestion without the per-endpoint breakdown")
+    parser.add_argument("--no-end-to-end", dest="end_to_end", action="store_false",
+                        help="skip the full analyze-results.py run")
+    parser.add_argument("--output", default=None,
+                        help="results JSON file (default: <work-dir>/analyzer_benchmark.json)")
+    parser.add_argument("--baseline", default=None, help="previous results JSON to compare throughput against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD_PERCENT,
+                        help=f"throughput drop flagged as a regression, in percent (default: {DEFAULT_THRESHOLD_PERCENT:g})")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    work_dir = Path(args.work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    paths = [path.strip() for path in args.paths.split(",") if path.strip()]
+    unknown = [path for path in paths if path not in PATHS]
+    if unknown:
+        log_progress(f"❌ Unknown paths: {', '.join(unknown)}")
+        return EXIT_FAILED
+
+    apps = load_apps()
+    ids = app_ids(apps)
+    urls = endpoint_urls(apps) if args.endpoints else None
+    results = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'decoder': FAST_DECODER,
+        'cpus': os.cpu_count(),
+        'workers': args.workers,
+        'endpoints': args.endpoints,
+        'paths': [],
+        'stage_detection': check_stage_detection(),
+        'startup': {},
+        'end_to_end': {},
+    }
+
+    if args.end_to_end:
+        startup = results['startup'] = measure_startup()
+        log_progress(f"🚀 Startup: analyzer {startup['analyzer_s']:.2f}s; imported only when needed: "
+                     + ", ".join(f"{name} {startup[f'{name}_import_s']:.2f}s" for name in LAZY_IMPORTS
+                                 if startup[f'{name}_import_s'] is not None))
+
+    stage_detection = results['stage_detection']
+    log_progress(f"{'✅' if stage_detection['passed'] else '❌'} Steady-state detection, worst edge error per plateau "
+                 f"rate: " + ", ".join(f"{rate} req/s {result['max_edge_error_s']}s"
+                                      for rate, result in stage_detection['rates'].items()))
+
+    for size_text in [size.strip() for size in args.sizes.split(",") if size.strip()]:
+        session_dir = prepare_session(work_dir, size_text, args.seed)
+        shutil.rmtree(session_dir / CACHE_DIR_NAME, ignore_errors=True)
+        if 'json_gz' in paths:
+            compress_session(session_dir)
+
+        for path in paths:
+            if path == 'cache_hit' and not (session_dir / CACHE_DIR_NAME).exists():
+                # A hit needs a built cache; build it outside the measurement
+                with ProcessPoolExecutor(max_workers=1) as pool:
+                    pool.submit(run_path, 'cache_build', session_dir, ids, args.workers, urls).result()
+
+            # A fresh process per measurement keeps peak RSS and warm caches independent
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                entry = pool.submit(run_path, path, session_dir, ids, args.workers, urls).result()
+            entry['size'] = size_text
+            results['paths'].append(entry)
+            accuracy = entry['accuracy']
+            status = "✅" if accuracy['passed'] else "❌"
+            log_progress(f"  {status} {size_text:>7} {path:<15} {entry['mb_per_s']:8.1f} MB/s  "
+                         f"{entry['points_per_s']:>12,.0f} points/s  {entry['peak_rss_mb']:8.1f} MB peak  "
+                         f"max quantile error {accuracy['max_quantile_error']:.3%}")
+
+        if args.end_to_end:
+            shutil.rmtree(session_dir / CACHE_DIR_NAME, ignore_errors=True)
+            runs = results['end_to_end'][size_text] = {}
+            endpoint_args = () if args.endpoints else ("--no-endpoints",)
+            for mode, extra_args in END_TO_END_MODES.items():
+                end_to_end = runs[mode] = run_end_to_end(session_dir, args.workers, extra_args + endpoint_args)
+                if 'error' in end_to_end:
+                    log_progress(f"  ❌ analyze-results.py ({mode}) failed: {end_to_end['error']}")
+                    continue
+                stage_summary = ', '.join(f'{stage} {wall:.1f}s' for stage, wall in end_to_end['stages'].items())
+                log_progress(f"  ⏱️ {size_text:>7} end to end ({mode}) {end_to_end['wall_s']:.1f}s, "
+                             f"module load {end_to_end['startup_s']:.2f}s ({stage_summary})")
+
+    failed = [entry for entry in results['paths'] if not entry['accuracy']['passed']]
+    if not stage_detection['passed']:
+        failed.append({'size': None, 'path': 'stage_detection'})
+    failed += [{'size': size, 'path': f'end_to_end_{mode}'} for size, runs in results['end_to_end'].items()
+               for mode, entry in runs.items() if 'error' in entry]
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_with_baseline(results, json.load(f), args.threshold)
+        for entry in regressions:
+            log_progress(f"  ❌ {entry['size']} {entry['path']}: {entry['mb_per_s']:.1f} MB/s, "
+                         f"{entry['change_percent']:+.1f}% vs baseline {entry['baseline_mb_per_s']:.1f} MB/s")
+
+    output = Path(args.output) if args.output else work_dir / "analyzer_benchmark.json"
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    log_progress(f"📄 Results written: {output}")
+
+    if failed or regressions:
+        log_progress(f"❌ {len(failed)} failed run(s), {len(regressions)} throughput regression(s)")
+        return EXIT_FAILED
+    log_progress("✅ All paths accurate" + (" and within the baseline threshold" if args.baseline else ""))
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
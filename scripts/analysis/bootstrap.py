@@ -0,0 +1,118 @@
+"""Vectorized bootstrap confidence intervals and pairwise latency comparisons.
+
+Resampling works on a weighted support ``(values, counts)`` instead of the
+raw samples: one bootstrap replicate is a multinomial draw of ``n`` samples
+over the support, so the cost depends on the number of histogram buckets,
+never on ``n``. Histograms use their bucket representatives (±1%).
+"""
+
+import numpy as np
+
+BOOTSTRAP_RESAMPLES = 2000
+CONFIDENCE_LEVEL = 0.95
+# Fixed seed so the same results always produce the same report
+BOOTSTRAP_SEED = 20240101
+
+STATISTICS = {'mean': None, 'p95': 0.95, 'p99': 0.99}
+
+
+def bootstrap_distribution(values, counts, exact_mean=None, resamples=BOOTSTRAP_RESAMPLES, rng=None):
+    """Bootstrap replicates of every statistic in STATISTICS, as ``{name: array[resamples]}``.
+
+    ``exact_mean`` (e.g. the histogram's exact sum / count) recentres the
+    mean replicates, removing the small bias of bucket representatives.
+    """
+    rng = rng if rng is not None else np.random.default_rng(BOOTSTRAP_SEED)
+    total = int(counts.sum())
+    draws = rng.multinomial(total, counts / total, size=resamples)
+
+    replicates = {}
+    means = draws @ values / total
+    if exact_mean is not None:
+        means += exact_mean - float(values @ counts) / total
+    replicates['mean'] = means
+
+    cumulative = np.cumsum(draws, axis=1)
+    for name, q in STATISTICS.items():
+        if q is None:
+            continue
+        # Same rank convention as LatencyHistogram.quantile
+        rank = q * (total - 1)
+        replicates[name] = values[np.argmax(cumulative > rank, axis=1)]
+    return replicates
+
+
+def histogram_bootstrap(histogram, resamples=BOOTSTRAP_RESAMPLES, rng=None):
+    """Bootstrap replicates for a LatencyHistogram, or None when it is empty"""
+    if not histogram.count:
+        return None
+    values, counts = histogram.support()
+    return bootstrap_distribution(values, counts, histogram.mean, resamples, rng)
+
+
+def confidence_interval(replicates, level=CONFIDENCE_LEVEL):
+    """Percentile interval ``(low, high)`` of a replicate array"""
+    tail = (1 - level) / 2 * 100
+    low, high = np.percentile(replicates, [tail, 100 - tail])
+    return float(low), float(high)
+
+
+def compare_replicates(first, second, level=CONFIDENCE_LEVEL):
+    """Difference ``first - second`` of one statistic with its interval and two-sided p-value.
+
+    The difference is significant when its confidence interval excludes zero.
+    """
+    difference = first - second
+    low, high = confidence_interval(difference, level)
+    below = float(np.mean(difference <= 0))
+    above = float(np.mean(difference >= 0))
+    p_value = min(1.0, 2 * min(below, above))
+    return {
+        'difference': float(np.median(difference)),
+        'ci': (low, high),
+        # A p-value of 0 only means "smaller than one replicate can resolve"
+        'p_value': max(p_value, 1 / difference.size),
+        'significant': low > 0 or high < 0,
+    }
+
+
+def _significantly_lower(pairs, app, other, name):
+    if (app, other) in pairs:
+        test = pairs[(app, other)][name]
+        return test['significant'] and test['ci'][1] < 0
+    test = pairs[(other, app)][name]
+    return test['significant'] and test['ci'][0] > 0
+
+
+def compare_apps(histograms, level=CONFIDENCE_LEVEL, resamples=BOOTSTRAP_RESAMPLES):
+    """Confidence intervals per app and pairwise difference tests for one test.
+
+    ``histograms`` maps app id to its latency histogram. Returns
+    ``{'intervals': {app: {stat: (low, high)}}, 'pairs': {(a, b): {stat: test}},
+    'winners': {stat: app or None}}``. An app wins a statistic only when it is
+    significantly lower than every other app, so no multiple-comparison
+    correction is needed for the winner itself.
+    """
+    rng = np.random.default_rng(BOOTSTRAP_SEED)
+    replicates = {}
+    for app, histogram in histograms.items():
+        distribution = histogram_bootstrap(histogram, resamples, rng)
+        if distribution is not None:
+            replicates[app] = distribution
+
+    apps = list(replicates)
+    intervals = {app: {name: confidence_interval(values, level) for name, values in replicates[app].items()}
+                 for app in apps}
+    pairs = {}
+    for i, first in enumerate(apps):
+        for second in apps[i + 1:]:
+            pairs[(first, second)] = {name: compare_replicates(replicates[first][name], replicates[second][name], level)
+                                      for name in STATISTICS}
+
+    winners = {}
+    for name in STATISTICS:
+        winners[name] = next((app for app in apps if len(apps) > 1 and
+                              all(_significantly_lower(pairs, app, other, name) for other in apps if other != app)),
+                             None)
+
+    return {'intervals': intervals, 'pairs': pairs, 'winners': winners}
@@ -0,0 +1,144 @@
+"""Declarative per-app, per-test performance budgets checked against the aggregated results.
+
+``budgets.json`` (or $BENCHMARK_BUDGETS_CONFIG) maps test name, then app id,
+to limits; ``*`` matches any test or app and the most specific entry wins
+per limit (test and app, then test, then app, then ``*``/``*``)::
+
+    {"budgets": {"api-load-test": {"*": {"p95_ms": 500}, "go": {"p95_ms": 200}}}}
+
+Budgets are evaluated from the steady-state stats the analyzer already
+computed, never from the raw k6 output. A limit whose figure is unavailable
+(e.g. no docker stats for MB per 1k RPS, or no latency for an app that
+served nothing) is skipped, not failed; ``min_rps`` still fails at zero.
+"""
+
+import json
+import os
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+DEFAULT_BUDGETS_CONFIG = Path(__file__).with_name("budgets.json")
+BUDGETS_CONFIG_ENV = "BENCHMARK_BUDGETS_CONFIG"
+WILDCARD = '*'
+
+# limit -> (description, unit, 'max' or 'min')
+LIMITS = {
+    'p95_ms': ('P95 latency', 'ms', 'max'),
+    'p99_ms': ('P99 latency', 'ms', 'max'),
+    'max_error_rate_percent': ('Error rate', '%', 'max'),
+    'min_rps': ('Steady-state RPS', 'req/s', 'min'),
+    'max_mb_per_1k_rps': ('Memory per 1k RPS', 'MB', 'max'),
+}
+
+PASSED = 'pass'
+FAILED = 'fail'
+SKIPPED = 'skipped'
+
+
+def budgets_config_file(config_file=None):
+    return Path(config_file or os.environ.get(BUDGETS_CONFIG_ENV) or DEFAULT_BUDGETS_CONFIG)
+
+
+def load_budgets(config_file):
+    """Read and validate a budgets file into ``{test: {app: {limit: value}}}``"""
+    with open(config_file, 'r') as f:
+        budgets = json.load(f)['budgets']
+
+    for test_name, per_app in budgets.items():
+        for app, limits in per_app.items():
+            unknown = sorted(set(limits) - set(LIMITS))
+            if unknown:
+                raise ValueError(f"{test_name}/{app}: unknown limit(s) {', '.join(unknown)} "
+                                 f"(choose from {', '.join(LIMITS)})")
+            for limit, value in limits.items():
+                if not isinstance(value, (int, float)) or isinstance(value, bool):
+                    raise ValueError(f"{test_name}/{app}: {limit} must be a number, got {value!r}")
+    return budgets
+
+
+def resolve_limits(budgets, test_name, app):
+    """Limits that apply to one app in one test, most specific entry winning"""
+    limits = {}
+    for test_key, app_key in ((WILDCARD, WILDCARD), (WILDCARD, app), (test_name, WILDCARD), (test_name, app)):
+        limits.update(budgets.get(test_key, {}).get(app_key, {}))
+    return limits
+
+
+def _actual(limit, stats, rates, efficiency):
+    if limit == 'p95_ms':
+        return stats.get('p95')
+    if limit == 'p99_ms':
+        return stats.get('p99')
+    if limit == 'max_error_rate_percent':
+        return rates.get('error_rate_percent')
+    if limit == 'min_rps':
+        # Without timestamps there is no steady state and the rate reads 0 even though requests were made
+        return None if rates.get('requests') and not rates.get('rps') else rates.get('rps')
+    return efficiency.get('mb_per_1k_rps')
+
+
+def evaluate_budgets(budgets, response_times, throughput, efficiency, app_ids):
+    """One result per (test, app, limit): threshold, actual figure and pass/fail/skipped status"""
+    results = []
+    for test_name in response_times:
+        for app in app_ids:
+            limits = resolve_limits(budgets, test_name, app)
+            stats = response_times[test_name].get(app, {})
+            rates = throughput.get(test_name, {}).get(app, {})
+            resources = efficiency.get(test_name, {}).get(app, {})
+            for limit, threshold in limits.items():
+                description, unit, bound = LIMITS[limit]
+                actual = _actual(limit, stats, rates, resources)
+                if actual is None:
+                    status = SKIPPED
+                elif bound == 'max':
+                    status = PASSED if actual <= threshold else FAILED
+                else:
+                    status = PASSED if actual >= threshold else FAILED
+                results.append({
+                    'test': test_name,
+                    'app': app,
+                    'limit': limit,
+                    'description': description,
+                    'unit': unit,
+                    'bound': bound,
+                    'threshold': threshold,
+                    'actual': actual,
+                    'status': status,
+                })
+    return results
+
+
+def budget_condition(result):
+    """``P95 latency <= 500 ms``"""
+    operator = '<=' if result['bound'] == 'max' else '>='
+    return f"{result['description']} {operator} {result['threshold']:,.10g} {result['unit']}"
+
+
+def write_junit(results, junit_file):
+    """Write one JUnit testsuite per test and one testcase per (app, limit)"""
+    suites = ET.Element('testsuites', name='performance-budgets')
+    per_test = {}
+    for result in results:
+        per_test.setdefault(result['test'], []).append(result)
+
+    for test_name, test_results in per_test.items():
+        suite = ET.SubElement(suites, 'testsuite', name=test_name, tests=str(len(test_results)),
+                              failures=str(sum(result['status'] == FAILED for result in test_results)),
+                              skipped=str(sum(result['status'] == SKIPPED for result in test_results)))
+        for result in test_results:
+            case = ET.SubElement(suite, 'testcase', classname=f"{test_name}.{result['app']}",
+                                 name=budget_condition(result))
+            if result['status'] == FAILED:
+                ET.SubElement(case, 'failure', type='BudgetExceeded',
+                              message=f"{result['description']} was {result['actual']:.2f} {result['unit']}")
+            elif result['status'] == SKIPPED:
+                ET.SubElement(case, 'skipped', message="figure not available for this session")
+
+    suites.set('tests', str(len(results)))
+    suites.set('failures', str(sum(result['status'] == FAILED for result in results)))
+    suites.set('skipped', str(sum(result['status'] == SKIPPED for result in results)))
+    tree = ET.ElementTree(suites)
+    ET.indent(tree)
+    tree.write(junit_file, encoding='utf-8', xml_declaration=True)
+    return junit_file
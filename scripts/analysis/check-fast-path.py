@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Check that the fast k6 ingestion path matches the reference json.loads path.
+
+The fixture in ``fixtures/k6-edge-cases.json`` covers what the byte-level
+fast path has to get right: reordered keys, tags before the value, spaced
+JSON, null, integer and exponent values, UTC offsets and nanosecond
+timestamps, escaped quotes and braces in tags, non-ASCII tags, blank and
+truncated lines and the tagged http_req_duration points of every app. The
+fixture is ingested through the reference path and through the fast path
+(memory-mapped, and from a gzipped copy), and every series, per-second
+window and endpoint group must be identical.
+
+Exits 1 on any difference.
+"""
+
+import argparse
+import gzip
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from app_config import app_ids, endpoint_urls, load_apps
+from common import log_progress
+from k6_ingest import FAST_DECODER, ingest_k6_file
+
+DEFAULT_FIXTURE = Path(__file__).parent / "fixtures" / "k6-edge-cases.json"
+EXIT_OK = 0
+EXIT_FAILED = 1
+
+
+def _histogram_state(histogram):
+    return (histogram.count, histogram.sum, histogram.min, histogram.max, histogram.zero_count,
+            sorted(histogram.buckets.items()))
+
+
+def aggregate_state(aggregate):
+    """Everything an aggregate reports, in a form that compares with ``==``"""
+    endpoints = {}
+    if aggregate.endpoints is not None:
+        for gid, group in enumerate(aggregate.endpoints.interner.groups):
+            endpoints[group] = _histogram_state(aggregate.endpoints.histograms[gid])
+    return {
+        'lines': aggregate.lines,
+        'points': aggregate.points,
+        'series': {key: _histogram_state(histogram) for key, histogram in aggregate.series.items()},
+        'windows': {second: {key: _histogram_state(histogram) for key, histogram in window.items()}
+                    for second, window in aggregate.windows.items()},
+        'endpoints': endpoints,
+        'unattributed': aggregate.endpoints.unattributed if aggregate.endpoints is not None else 0,
+    }
+
+
+def differences(expected, actual):
+    """Names of the parts of two aggregate states that differ"""
+    diffs = []
+    for part in expected:
+        if part in ('series', 'windows', 'endpoints'):
+            for key in sorted(set(expected[part]) | set(actual[part]), key=repr):
+                if expected[part].get(key) != actual[part].get(key):
+                    diffs.append(f"{part}[{key}]")
+        elif expected[part] != actual[part]:
+            diffs.append(f"{part}: {expected[part]} != {actual[part]}")
+    return diffs
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check the fast k6 ingestion path against the reference path")
+    parser.add_argument("fixture", nargs="?", default=str(DEFAULT_FIXTURE),
+                        help="k6 NDJSON file to check (default: fixtures/k6-edge-cases.json)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    fixture = Path(args.fixture)
+    apps = load_apps()
+    ids = app_ids(apps)
+    urls = endpoint_urls(apps)
+
+    reference = aggregate_state(ingest_k6_file(fixture, fixture.stem, ids, fast=False, endpoint_urls=urls))
+    log_progress(f"📄 {fixture.name}: {reference['lines']} lines, {reference['points']} app points, "
+                 f"{len(reference['endpoints'])} endpoint groups (reference path)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        compressed = Path(tmp) / f"{fixture.name}.gz"
+        with open(fixture, 'rb') as src, gzip.open(compressed, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        candidates = {
+            f'fast ({FAST_DECODER}, mmap)': ingest_k6_file(fixture, fixture.stem, ids, fast=True, endpoint_urls=urls),
+            f'fast ({FAST_DECODER}, gzip)': ingest_k6_file(compressed, fixture.stem, ids, fast=True, endpoint_urls=urls),
+        }
+
+    failed = False
+    for name, aggregate in candidates.items():
+        diffs = differences(reference, aggregate_state(aggregate))
+        if diffs:
+            failed = True
+            log_progress(f"❌ {name} differs from the reference path: {'; '.join(diffs)}")
+        else:
+            log_progress(f"✅ {name} matches the reference path")
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+"""Helpers shared by the benchmark analysis modules."""
+
+from datetime import datetime, timezone
+
+# collect-metrics.sh stamps snapshot files with `date -u +"%Y%m%d_%H%M%S"`
+FILE_STAMP_FORMAT = '%Y%m%d_%H%M%S'
+
+
+def log_progress(message):
+    """Print with flush to ensure immediate output in Docker"""
+    print(message, flush=True)
+
+
+def file_stamp_to_epoch(stamp):
+    """Epoch seconds of a ``YYYYmmdd_HHMMSS`` file stamp, which the collector writes in UTC.
+
+    The analysis container's own time zone plays no part, so snapshots line up
+    with the k6 timestamps whatever zone the benchmark host is in.
+    """
+    return datetime.strptime(stamp, FILE_STAMP_FORMAT).replace(tzinfo=timezone.utc).timestamp()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Compare an indexed benchmark session with a baseline session or the rolling median of earlier runs.
+
+A session is a directory, or a bare session name looked up in the default
+results directory (``<repo>/results``).
+
+Exits 0 when nothing regressed, 1 when at least one metric regressed beyond
+the threshold and 2 when the comparison could not be made.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from common import log_progress
+from results_index import (DEFAULT_RESULTS_DIR, DEFAULT_ROLLING_WINDOW, DEFAULT_THRESHOLD_PERCENT, REGRESSION_METRICS,
+                           connect, default_index_file, find_regressions, list_sessions, rolling_baseline,
+                           session_stats)
+
+EXIT_OK = 0
+EXIT_REGRESSION = 1
+EXIT_NO_DATA = 2
+
+
+def session_dir(session):
+    """A session path as given, or a bare session name inside DEFAULT_RESULTS_DIR"""
+    path = Path(session)
+    if len(path.parts) > 1 or path.is_dir():
+        return path
+    return DEFAULT_RESULTS_DIR / session
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Flag performance regressions between benchmark sessions")
+    parser.add_argument("session", nargs="?",
+                        help=f"session directory (results/benchmark_<timestamp>) or session name in "
+                             f"{DEFAULT_RESULTS_DIR}; not needed with --list")
+    baseline = parser.add_mutually_exclusive_group()
+    baseline.add_argument("--baseline", help="session to compare against (default: rolling median)")
+    baseline.add_argument("--rolling", type=int, default=DEFAULT_ROLLING_WINDOW,
+                          help=f"number of earlier sessions in the rolling median (default: {DEFAULT_ROLLING_WINDOW})")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD_PERCENT,
+                        help=f"regression threshold in percent (default: {DEFAULT_THRESHOLD_PERCENT:g})")
+    parser.add_argument("--metrics", default=",".join(REGRESSION_METRICS),
+                        help=f"comma-separated metrics to check (default: {','.join(REGRESSION_METRICS)})")
+    parser.add_argument("--index", default=None,
+                        help="SQLite index file (default: $BENCHMARK_RESULTS_INDEX or benchmark_index.sqlite "
+                             "next to the session)")
+    parser.add_argument("--list", action="store_true", help="list indexed sessions and exit")
+    args = parser.parse_args()
+    if args.session is None and not args.list:
+        parser.error("the session argument is required unless --list is given")
+    return args
+
+
+def main():
+    args = parse_args()
+    results_dir = session_dir(args.session) if args.session else None
+    session = results_dir.name if results_dir else None
+    index_file = Path(args.index) if args.index else default_index_file(results_dir)
+
+    if not index_file.exists():
+        log_progress(f"❌ Results index not found: {index_file} (run analyze-results.py first)")
+        return EXIT_NO_DATA
+
+    unknown = [metric for metric in args.metrics.split(",") if metric not in REGRESSION_METRICS]
+    if unknown:
+        log_progress(f"❌ Unsupported metrics: {', '.join(unknown)} (choose from {', '.join(REGRESSION_METRICS)})")
+        return EXIT_NO_DATA
+    metrics = {metric: REGRESSION_METRICS[metric] for metric in args.metrics.split(",")}
+
+    conn = connect(index_file)
+    try:
+        if args.list:
+            for name, _started_at in list_sessions(conn):
+                log_progress(name)
+            return EXIT_OK
+
+        current = session_stats(conn, session)
+        if not current:
+            log_progress(f"❌ Session {session} is not in {index_file}")
+            return EXIT_NO_DATA
+
+        if args.baseline:
+            baseline_name = Path(args.baseline).name
+            baseline = session_stats(conn, baseline_name)
+            description = f"session {baseline_name}"
+        else:
+            baseline, used = rolling_baseline(conn, session, args.rolling)
+            description = f"rolling median of {len(used)} earlier session(s)"
+    finally:
+        conn.close()
+
+    if not baseline:
+        log_progress(f"❌ No baseline data for {session} ({description})")
+        return EXIT_NO_DATA
+
+    results = find_regressions(current, baseline, metrics, args.threshold)
+    if not results:
+        log_progress("❌ The session and its baseline have no test/app/metric in common")
+        return EXIT_NO_DATA
+
+    log_progress(f"📊 {session} vs {description} (threshold {args.threshold:g}%)\n")
+    log_progress("| Test | Application | Metric | Baseline | Current | Change (%) | Status |")
+    log_progress("|------|-------------|--------|----------|---------|------------|--------|")
+    for result in results:
+        status = "❌ regression" if result['regression'] else "✅"
+        log_progress(f"| {result['test']} | {result['app']} | {result['metric']} | {result['baseline']:.2f} | "
+                     f"{result['current']:.2f} | {result['change_percent']:+.1f} | {status} |")
+
+    regressions = [result for result in results if result['regression']]
+    log_progress("")
+    if regressions:
+        log_progress(f"❌ {len(regressions)} regression(s) above {args.threshold:g}%")
+        return EXIT_REGRESSION
+
+    log_progress("✅ No regressions")
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
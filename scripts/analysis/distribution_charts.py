@@ -0,0 +1,210 @@
+"""Latency distribution charts drawn from histograms and per-second windows, never from raw points.
+
+Every figure is reduced to small arrays in the parent process first: a
+handful of quantiles per app for the percentile spectrum, one point per
+histogram bucket for the CDF overlays and a fixed grid of latency bins by
+second for the heatmaps. Rendering cost therefore depends on the bucket
+and window counts only, and the independent figures are drawn in a process
+pool. matplotlib is imported inside the workers.
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from common import log_progress
+
+SPECTRUM_QUANTILES = (0.5, 0.75, 0.9, 0.95, 0.99, 0.995, 0.999, 0.9999)
+HEATMAP_LATENCY_BINS = 60
+CHART_DPI = 150
+
+
+def _nines(q):
+    """Position of quantile ``q`` on a "number of nines" axis (p90 -> 1, p99 -> 2, ...)"""
+    return -math.log10(1 - q)
+
+
+def _percent_label(q):
+    return f"p{q * 100:g}"
+
+
+def percentile_spectrum(latency_histograms, app_ids):
+    """``{test: {app: [value per SPECTRUM_QUANTILES]}}`` for apps with data"""
+    return {test_name: {app: [histograms[app].quantile(q) for q in SPECTRUM_QUANTILES]
+                        for app in app_ids if app in histograms and histograms[app].count}
+            for test_name, histograms in latency_histograms.items()}
+
+
+def cdf_points(histogram):
+    """``(values, cumulative_fraction)`` with one point per non-empty bucket"""
+    values, counts = histogram.support()
+    return values, np.cumsum(counts) / histogram.count
+
+
+def latency_heatmap(aggregate, app_ids, first_second, length, bins=HEATMAP_LATENCY_BINS):
+    """Request counts per (latency bin, second) for every app of one test.
+
+    Returns ``(edges, {app: counts})`` where ``counts`` has shape
+    ``(bins, length)`` and ``edges`` are ``bins + 1`` log-spaced bin edges
+    in milliseconds, or ``(None, {})`` without data.
+    """
+    rows = {app: ([], [], []) for app in app_ids}
+    for second, window in aggregate.windows.items():
+        offset = second - first_second
+        if not 0 <= offset < length:
+            continue
+        for (app, kind, _scope), histogram in window.items():
+            if kind != 'response_time' or app not in rows or not histogram.count:
+                continue
+            values, counts = histogram.support()
+            app_seconds, app_values, app_counts = rows[app]
+            app_seconds.append(np.full(values.size, offset))
+            app_values.append(values)
+            app_counts.append(counts)
+
+    columns = {app: tuple(np.concatenate(column) for column in app_rows)
+               for app, app_rows in rows.items() if app_rows[0]}
+    if not columns:
+        return None, {}
+
+    positive = np.concatenate([values[values > 0] for _seconds, values, _counts in columns.values()])
+    if not positive.size:
+        return None, {}
+    low, high = positive.min(), positive.max()
+    if high <= low:
+        high = low * 1.01
+    edges = np.geomspace(low, high, bins + 1)
+
+    heatmaps = {}
+    for app, (seconds, values, counts) in columns.items():
+        # Zero latencies fall into the lowest bin
+        rows_index = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, bins - 1)
+        grid = np.zeros((bins, length), dtype=np.int64)
+        np.add.at(grid, (rows_index, seconds), counts)
+        heatmaps[app] = grid
+    return edges, heatmaps
+
+
+def _pyplot():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def render_spectrum(chart_file, spectrum, names, colors):
+    """Percentile spectrum, one panel per test"""
+    plt = _pyplot()
+    tests = list(spectrum)
+    fig, axes = plt.subplots(1, len(tests), figsize=(6 * len(tests), 5), squeeze=False)
+    x = [_nines(q) for q in SPECTRUM_QUANTILES]
+    for ax, test_name in zip(axes[0], tests):
+        for app, values in spectrum[test_name].items():
+            ax.plot(x, values, marker='o', label=names[app], color=colors.get(app))
+        ax.set_xticks(x)
+        ax.set_xticklabels([_percent_label(q) for q in SPECTRUM_QUANTILES], rotation=45)
+        ax.set_yscale('log')
+        ax.set_ylabel('Response Time (ms)')
+        ax.set_title(test_name)
+        ax.grid(True, which='both', alpha=0.3)
+        ax.legend()
+    fig.suptitle('Latency Percentile Spectrum (steady state)')
+    fig.tight_layout()
+    fig.savefig(chart_file, dpi=CHART_DPI)
+    plt.close(fig)
+    return chart_file
+
+
+def render_cdf(chart_file, test_name, curves, names, colors):
+    """CDF of every app of one test on a log latency axis"""
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(9, 5))
+    for app, (values, fractions) in curves.items():
+        ax.step(values, fractions, where='post', label=names[app], color=colors.get(app))
+    ax.set_xscale('log')
+    ax.set_xlabel('Response Time (ms)')
+    ax.set_ylabel('Fraction of requests')
+    ax.set_ylim(0, 1.01)
+    ax.grid(True, which='both', alpha=0.3)
+    ax.legend(loc='lower right')
+    ax.set_title(f'{test_name}: latency CDF (steady state)')
+    fig.tight_layout()
+    fig.savefig(chart_file, dpi=CHART_DPI)
+    plt.close(fig)
+    return chart_file
+
+
+def render_heatmap(chart_file, test_name, edges, heatmaps, steady, names):
+    """Latency-over-time heatmap of one test, one panel per app"""
+    from matplotlib.colors import LogNorm
+
+    plt = _pyplot()
+    apps = list(heatmaps)
+    fig, axes = plt.subplots(len(apps), 1, figsize=(12, 3 * len(apps)), sharex=True, squeeze=False)
+    peak = max(int(grid.max()) for grid in heatmaps.values())
+    for ax, app in zip(axes[:, 0], apps):
+        grid = np.ma.masked_equal(heatmaps[app], 0)
+        seconds = np.arange(grid.shape[1] + 1)
+        mesh = ax.pcolormesh(seconds, edges, grid, norm=LogNorm(vmin=1, vmax=max(peak, 1)), cmap='viridis',
+                             shading='flat')
+        ax.set_yscale('log')
+        ax.set_ylabel(f'{names[app]}\nms')
+        if steady is not None:
+            for boundary in (steady[0], steady[1] + 1):
+                ax.axvline(boundary, color='white', linestyle='--', linewidth=0.8)
+        fig.colorbar(mesh, ax=ax, label='requests')
+    axes[-1, 0].set_xlabel('Seconds since start')
+    fig.suptitle(f'{test_name}: latency over time')
+    fig.tight_layout()
+    fig.savefig(chart_file, dpi=CHART_DPI)
+    plt.close(fig)
+    return chart_file
+
+
+def create_distribution_charts(k6_results, latency_histograms, timelines, output_dir, apps, workers=1):
+    """Render the percentile spectrum, per-test CDF overlays and heatmaps; return the chart files"""
+    output_dir = Path(output_dir)
+    ids = [app['id'] for app in apps]
+    names = {app['id']: app['short_name'] for app in apps}
+    colors = {app['id']: app['color'] for app in apps}
+
+    jobs = []
+    spectrum = percentile_spectrum(latency_histograms, ids)
+    if any(spectrum.values()):
+        jobs.append((render_spectrum, output_dir / "latency_percentile_spectrum.png", spectrum, names, colors))
+
+    for test_name, histograms in latency_histograms.items():
+        curves = {app: cdf_points(histograms[app]) for app in ids if app in histograms and histograms[app].count}
+        if curves:
+            jobs.append((render_cdf, output_dir / f"latency_cdf_{test_name}.png", test_name, curves, names, colors))
+
+    for test_name, aggregate in k6_results.items():
+        timeline = timelines.get(test_name)
+        if not timeline or not timeline['duration_s']:
+            continue
+        edges, heatmaps = latency_heatmap(aggregate, ids, timeline['start'], timeline['duration_s'])
+        if heatmaps:
+            jobs.append((render_heatmap, output_dir / f"latency_heatmap_{test_name}.png", test_name, edges,
+                         heatmaps, timeline['stages']['steady'], names))
+
+    chart_files = []
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            futures = [pool.submit(render, *args) for render, *args in jobs]
+            for (_render, chart_file, *_args), future in zip(jobs, futures):
+                try:
+                    chart_files.append(future.result())
+                except Exception as e:
+                    log_progress(f"  ❌ Error rendering {chart_file.name}: {e}")
+    else:
+        for render, chart_file, *args in jobs:
+            try:
+                chart_files.append(render(chart_file, *args))
+            except Exception as e:
+                log_progress(f"  ❌ Error rendering {chart_file.name}: {e}")
+
+    for chart_file in chart_files:
+        log_progress(f"  📊 Distribution chart: {chart_file}")
+    return chart_files
@@ -0,0 +1,155 @@
+"""``docker stats`` snapshots and per-request resource efficiency.
+
+``collect-metrics.sh`` writes ``<test>_docker_stats_<YYYYmmdd_HHMMSS>.json`` (UTC)
+every 15 seconds; despite the extension each file is ``docker stats`` table
+output with the columns ``Container,CPUPerc,MemUsage,NetIO,BlockIO``.
+"""
+
+import re
+
+from common import file_stamp_to_epoch
+
+_STATS_FILE_RE = re.compile(r'(?P<test>.+)_docker_stats_(?P<stamp>\d{8}_\d{6})$')
+_SIZE_RE = re.compile(r'\s*([0-9.]+)\s*([a-zA-Z]*)\s*$')
+
+# docker prints memory in binary units (MiB) and network/block IO in decimal units (MB)
+SIZE_UNITS = {
+    '': 1, 'b': 1,
+    'kb': 1e3, 'mb': 1e6, 'gb': 1e9, 'tb': 1e12,
+    'kib': 1024, 'mib': 1024 ** 2, 'gib': 1024 ** 3, 'tib': 1024 ** 4,
+}
+BYTES_PER_MB = 1024 * 1024
+
+
+def parse_size(text):
+    """Bytes in a docker size string such as ``45.6MiB`` or ``1.2kB`` (None if unparseable)"""
+    match = _SIZE_RE.match(text)
+    if match is None:
+        return None
+    factor = SIZE_UNITS.get(match.group(2).lower())
+    if factor is None:
+        return None
+    return float(match.group(1)) * factor
+
+
+def parse_size_pair(text):
+    """Both sides of ``used / limit`` or ``rx / tx``"""
+    left, _, right = text.partition('/')
+    return parse_size(left), parse_size(right)
+
+
+def parse_percent(text):
+    try:
+        return float(text.strip().rstrip('%'))
+    except ValueError:
+        return None
+
+
+def parse_stats_file(file_path, timestamp):
+    """Parse one ``docker stats`` table dump into per-container samples"""
+    samples = []
+    with open(file_path, 'r') as f:
+        for line in f:
+            fields = [field.strip() for field in line.split(',')]
+            if len(fields) < 5 or fields[0].upper() in ('CONTAINER', 'NAME'):
+                continue
+            cpu_percent = parse_percent(fields[1])
+            memory_bytes, _limit = parse_size_pair(fields[2])
+            net_rx, net_tx = parse_size_pair(fields[3])
+            block_read, block_write = parse_size_pair(fields[4])
+            if cpu_percent is None or memory_bytes is None:
+                continue
+            samples.append({
+                'timestamp': timestamp,
+                'container': fields[0],
+                'cpu_percent': cpu_percent,
+                'memory_bytes': memory_bytes,
+                'net_rx': net_rx,
+                'net_tx': net_tx,
+                'block_read': block_read,
+                'block_write': block_write,
+            })
+    return samples
+
+
+def load_docker_stats(metrics_dir):
+    """Return ``{test: {container: [samples in time order]}}`` for every stats dump"""
+    stats = {}
+    for file_path in sorted(metrics_dir.glob("*_docker_stats_*.json")):
+        match = _STATS_FILE_RE.match(file_path.stem)
+        if match is None:
+            continue
+        timestamp = file_stamp_to_epoch(match.group('stamp'))
+        per_container = stats.setdefault(match.group('test'), {})
+        for sample in parse_stats_file(file_path, timestamp):
+            per_container.setdefault(sample['container'], []).append(sample)
+
+    for per_container in stats.values():
+        for samples in per_container.values():
+            samples.sort(key=lambda sample: sample['timestamp'])
+    return stats
+
+
+def _requests_between(per_second, start, end):
+    """k6 requests in ``[start, end)`` from ``{epoch_second: requests}``"""
+    return sum(count for second, count in per_second.items() if start <= second < end)
+
+
+def resource_efficiency(container_samples, timeline, apps):
+    """Cost per request of each app's container over the steady-state window of one test.
+
+    Docker samples are matched to the k6 per-second throughput by wall-clock
+    time. When none fall inside the steady state (e.g. the collector's clock
+    or time zone differs) all samples of the test are averaged instead and
+    ``aligned`` is False; network bytes per request then cannot be computed.
+    Apps sharing a container are charged its resources jointly.
+    """
+    per_second = {}
+    for row in timeline['windows']:
+        per_second.setdefault(row['app'], {})[row['timestamp']] = row['rps']
+
+    steady = timeline['stages']['steady']
+    if timeline['start'] is None or steady is None:
+        return {}
+    span_start = timeline['start'] + steady[0]
+    span_end = timeline['start'] + steady[1] + 1
+
+    results = {}
+    for app in apps:
+        samples = container_samples.get(app['container'])
+        if not samples:
+            continue
+
+        sharing = [other['id'] for other in apps if other['container'] == app['container']]
+        rps = sum(_requests_between(per_second.get(other, {}), span_start, span_end)
+                  for other in sharing) / (span_end - span_start)
+
+        in_span = [s for s in samples if span_start <= s['timestamp'] <= span_end]
+        aligned = bool(in_span)
+        used = in_span or samples
+
+        cpu_cores = sum(s['cpu_percent'] for s in used) / len(used) / 100
+        memory_mb = sum(s['memory_bytes'] for s in used) / len(used) / BYTES_PER_MB
+
+        network_bytes_per_request = None
+        if aligned and len(in_span) >= 2 and None not in (in_span[0]['net_rx'], in_span[-1]['net_rx']):
+            first, last = in_span[0], in_span[-1]
+            transferred = (last['net_rx'] + last['net_tx']) - (first['net_rx'] + first['net_tx'])
+            requests = sum(_requests_between(per_second.get(other, {}), first['timestamp'], last['timestamp'])
+                           for other in sharing)
+            # A negative delta means the container restarted and its counters were reset
+            if transferred >= 0 and requests:
+                network_bytes_per_request = transferred / requests
+
+        results[app['id']] = {
+            'container': app['container'],
+            'samples': len(used),
+            'aligned': aligned,
+            'cpu_cores': cpu_cores,
+            'memory_mb': memory_mb,
+            'rps': rps,
+            'requests_per_cpu_second': rps / cpu_cores if cpu_cores > 0 else None,
+            'mb_per_1k_rps': memory_mb / (rps / 1000) if rps > 0 else None,
+            'network_bytes_per_request': network_bytes_per_request,
+        }
+    return results
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Generate a synthetic benchmark session of k6 output with exact ground truth.
+
+The session directory can be passed straight to analyze-results.py; the
+exact per-series counts, sums and quantiles are written to
+``<session>/ground-truth/<test>.json``.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from common import log_progress
+from k6_synthetic import DEFAULT_DURATION_S, TEST_SCOPES, generate_session, parse_byte_size
+
+MIN_SIZE_BYTES = 10 * 1000 * 1000
+MAX_SIZE_BYTES = 5 * 1000 * 1000 * 1000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate synthetic k6 JSON/CSV output with ground truth")
+    parser.add_argument("session_dir", help="session directory to create")
+    parser.add_argument("--size", default="100MB", help="approximate JSON size per test, 10MB to 5GB (default: 100MB)")
+    parser.add_argument("--tests", default=",".join(TEST_SCOPES),
+                        help=f"comma-separated tests to generate (default: {','.join(TEST_SCOPES)})")
+    parser.add_argument("--duration", type=int, default=DEFAULT_DURATION_S,
+                        help=f"simulated test duration in seconds (default: {DEFAULT_DURATION_S})")
+    parser.add_argument("--seed", type=int, default=1, help="random seed (default: 1)")
+    parser.add_argument("--no-csv", dest="with_csv", action="store_false", help="only write the NDJSON output")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    try:
+        target_bytes = parse_byte_size(args.size)
+    except ValueError as e:
+        log_progress(f"❌ {e}")
+        return 1
+    if not MIN_SIZE_BYTES <= target_bytes <= MAX_SIZE_BYTES:
+        log_progress(f"❌ --size must be between 10MB and 5GB, got {args.size}")
+        return 1
+
+    tests = [test.strip() for test in args.tests.split(",") if test.strip()]
+    unknown = [test for test in tests if test not in TEST_SCOPES]
+    if unknown:
+        log_progress(f"❌ Unknown tests: {', '.join(unknown)} (choose from {', '.join(TEST_SCOPES)})")
+        return 1
+
+    session_dir = Path(args.session_dir)
+    log_progress(f"🏭 Generating {args.size} of k6 output per test in {session_dir}...")
+    started = time.perf_counter()
+    truths = generate_session(session_dir, target_bytes, tests, args.duration, args.with_csv, args.seed)
+    for test_name, truth in truths.items():
+        log_progress(f"  {test_name}: {truth['requests']:,} requests")
+    log_progress(f"✅ Done in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Mergeable, constant-memory latency histogram used by the k6 analysis."""
+
+import math
+
+# Default relative accuracy of reported quantiles (±1%)
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+# Values at or below this threshold are counted in the zero bucket
+MIN_TRACKABLE_VALUE = 1e-9
+
+
+class LatencyHistogram:
+    """Log-bucketed histogram with a bounded relative error (DDSketch-style).
+
+    Every positive value lands in bucket ``ceil(log(v) / log(gamma))`` with
+    ``gamma = (1 + a) / (1 - a)``, so any quantile returned by ``quantile`` is
+    within ``a`` (relative) of the true value at that rank. The bucket count
+    depends only on the dynamic range of the data (about 1,200 buckets cover
+    1 microsecond to 1 hour at 1%), never on how many values were added.
+    Count, sum, min and max are tracked exactly.
+    """
+
+    __slots__ = ('relative_accuracy', '_log_gamma', '_gamma',
+                 'buckets', 'zero_count', 'count', 'sum', 'min', 'max')
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"relative_accuracy must be in (0, 1), got {relative_accuracy}")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        """Record a single value"""
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+        if value > MIN_TRACKABLE_VALUE:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            buckets = self.buckets
+            buckets[index] = buckets.get(index, 0) + 1
+        else:
+            self.zero_count += 1
+
+    def add_many(self, values):
+        """Record an array of values at once (vectorized with NumPy)"""
+        import numpy as np
+
+        values = np.asarray(values, dtype=np.float64)
+        if not values.size:
+            return self
+
+        total = float(values.sum())
+        # Keep integer sums for counters, as repeated ``add`` calls would
+        if total.is_integer() and np.array_equal(values, np.floor(values)):
+            total = int(total)
+        self.count += int(values.size)
+        self.sum += total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        positive = values[values > MIN_TRACKABLE_VALUE]
+        self.zero_count += int(values.size - positive.size)
+        if positive.size:
+            indexes = np.ceil(np.log(positive) / self._log_gamma).astype(np.int64)
+            unique, counts = np.unique(indexes, return_counts=True)
+            buckets = self.buckets
+            for index, bucket_count in zip(unique.tolist(), counts.tolist()):
+                buckets[index] = buckets.get(index, 0) + bucket_count
+        return self
+
+    def merge(self, other):
+        """Fold another histogram with the same accuracy into this one"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge histograms with different relative accuracy")
+
+        buckets = self.buckets
+        for index, bucket_count in other.buckets.items():
+            buckets[index] = buckets.get(index, 0) + bucket_count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        """Return the value at quantile ``q`` (0..1), or None when empty"""
+        if self.count == 0:
+            return None
+
+        rank = q * (self.count - 1)
+        cumulative = self.zero_count
+        if cumulative > rank:
+            return max(self.min, 0.0)
+
+        for index in sorted(self.buckets):
+            cumulative += self.buckets[index]
+            if cumulative > rank:
+                return min(max(self._representative(index), self.min), self.max)
+
+        return self.max
+
+    def _representative(self, index):
+        # Midpoint (in relative terms) of (gamma^(i-1), gamma^i]
+        return 2 * self._gamma ** index / (self._gamma + 1)
+
+    def support(self):
+        """Return ``(values, counts)`` NumPy arrays: each bucket's representative value and count, ascending.
+
+        Values are clamped to the exact min/max like ``quantile``; the zero
+        bucket comes first when it is not empty.
+        """
+        import numpy as np
+
+        indexes = sorted(self.buckets)
+        values = np.array([self._representative(index) for index in indexes], dtype=np.float64)
+        counts = np.array([self.buckets[index] for index in indexes], dtype=np.int64)
+        if values.size:
+            np.clip(values, self.min, self.max, out=values)
+        if self.zero_count:
+            values = np.concatenate(([max(self.min, 0.0)], values))
+            counts = np.concatenate(([self.zero_count], counts))
+        return values, counts
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    def __len__(self):
+        return self.count
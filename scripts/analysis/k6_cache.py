@@ -0,0 +1,372 @@
+"""Columnar on-disk cache of the parsed k6 points of a benchmark session.
+
+The first analysis of a session writes every app point of each k6 file to
+``<session>/k6-cache/<test>/`` as one raw file per column (timestamp, app
+id, metric id, value, tag id) plus ``meta.json``. Only the request
+durations used by the per-endpoint breakdown carry a tag id, that of their
+endpoint group; app points, whose tags are never read, carry NO_TAG_ID.
+The cache is keyed on the source file's size and mtime and on the
+configured apps and base URLs, and is rebuilt automatically when any of
+them change.
+
+Points are spooled to the column files in fixed-size blocks, and every
+block is folded into the histograms as it is written, so building the cache
+needs no more memory than a plain ingest; later runs rebuild the histograms
+from the column files block by block with vectorized reads.
+"""
+
+import json
+import os
+import shutil
+from array import array
+
+import numpy as np
+
+from app_config import MetricDispatch
+from common import log_progress
+from k6_endpoints import GROUP_FIELDS, EndpointGroups
+from k6_ingest import (K6TestAggregate, ingest_k6_file, ingest_k6_files_parallel, iter_k6_range, map_k6_ranges,
+                       parse_k6_time)
+
+CACHE_DIR_NAME = "k6-cache"
+CACHE_VERSION = 3
+META_FILE_NAME = "meta.json"
+# Column name -> dtype of its raw file
+COLUMNS = (('timestamp', np.float64), ('app_id', np.uint8), ('metric_id', np.uint16),
+           ('value', np.float64), ('tag_id', np.uint32))
+BLOCK_POINTS = 1 << 20  # Points buffered before a block is written out and folded (about 23 MB)
+# app_id of http_req_duration points, which belong to an app through their endpoint group
+ENDPOINT_APP_ID = 255
+# tag_id of app points, which are never attributed by their tags
+NO_TAG_ID = np.iinfo(np.uint32).max
+
+
+def _new_buffers():
+    return {'timestamp': array('d'), 'app_id': array('B'), 'metric_id': array('H'),
+            'value': array('d'), 'tag_id': array('I')}
+
+
+class K6PointColumns:
+    """Parsed app points of one k6 file (or byte range), spooled to column files in ``directory``.
+
+    Every ``block_points`` points the buffered block is appended to the
+    column files and folded into ``aggregate``, so memory is bounded by the
+    block size and the metric and tag tables, never by the file size.
+    """
+
+    def __init__(self, directory, test_name, app_ids, endpoint_urls=None, block_points=BLOCK_POINTS):
+        self.directory = directory
+        self.test_name = test_name
+        self.app_ids = list(app_ids)
+        self.dispatch = MetricDispatch(self.app_ids, endpoints=bool(endpoint_urls))
+        self.endpoint_groups = EndpointGroups(endpoint_urls) if endpoint_urls else None
+        self.aggregate = K6TestAggregate(test_name, app_ids, endpoint_urls)
+        self.block_points = block_points
+        self.lines = 0
+        self.points = 0
+        self.unattributed = 0
+        self.metrics = []   # metric id -> (app, kind, scope)
+        self.tag_sets = []  # tag id -> endpoint group as (field, value) tags
+        self._app_index = {app: index for index, app in enumerate(self.app_ids)}
+        self._metric_index = {}
+        self._tag_index = {}
+        self._buffers = _new_buffers()
+        directory.mkdir(parents=True, exist_ok=True)
+        self._files = {name: open(directory / f"{name}.bin", 'wb') for name, _dtype in COLUMNS}
+
+    def add_point(self, key, timestamp, value, tags):
+        app_id = self._app_index.get(key[0])
+        tag_id = NO_TAG_ID
+        if app_id is None:
+            # Endpoint points keep only their interned group, as (field, value) tags
+            gid = self.endpoint_groups.group_id(tags)
+            if gid is None:
+                self.unattributed += 1
+                return
+            group_tags = tuple(zip(GROUP_FIELDS, self.endpoint_groups.groups[gid]))
+            tag_id = self._intern(self.tag_sets, self._tag_index, group_tags)
+            app_id = ENDPOINT_APP_ID
+
+        metric_id = self._intern(self.metrics, self._metric_index, key)
+
+        buffers = self._buffers
+        buffers['timestamp'].append(parse_k6_time(timestamp) if timestamp else float('nan'))
+        buffers['app_id'].append(app_id)
+        buffers['metric_id'].append(metric_id)
+        buffers['value'].append(value)
+        buffers['tag_id'].append(tag_id)
+        self.points += 1
+        if len(buffers['value']) >= self.block_points:
+            self._flush()
+
+    def _flush(self):
+        buffers = self._buffers
+        if not buffers['value']:
+            return
+        for name, _dtype in COLUMNS:
+            buffers[name].tofile(self._files[name])
+        arrays = {name: np.frombuffer(buffers[name], dtype=dtype) for name, dtype in COLUMNS}
+        fold_block(self.aggregate, self.metrics, self.tag_sets, arrays)
+        self._buffers = _new_buffers()
+
+    def close(self):
+        """Write the last block and close the column files; the aggregate is then complete"""
+        if self._files is None:
+            return self
+        try:
+            self._flush()
+        finally:
+            for f in self._files.values():
+                f.close()
+            self._files = None
+        self.aggregate.lines = self.lines
+        if self.aggregate.endpoints is not None:
+            self.aggregate.endpoints.unattributed += self.unattributed
+        return self
+
+    def append_part(self, part):
+        """Append a closed part (e.g. one byte range parsed by a worker), remapping its ids onto this table.
+
+        The part's rows are copied block by block and its directory removed;
+        its already folded aggregate is merged into this one.
+        """
+        self._flush()
+        metric_map = np.asarray([self._intern(self.metrics, self._metric_index, tuple(key)) for key in part.metrics],
+                                dtype=np.uint16)
+        tag_map = np.asarray([self._intern(self.tag_sets, self._tag_index, tags) for tags in part.tag_sets],
+                             dtype=np.uint32)
+        for block in iter_column_blocks(part.directory, part.points):
+            block['metric_id'] = metric_map[block['metric_id']]
+            tagged = block['app_id'] == ENDPOINT_APP_ID
+            block['tag_id'][tagged] = tag_map[block['tag_id'][tagged]]
+            for name, dtype in COLUMNS:
+                block[name].astype(dtype, copy=False).tofile(self._files[name])
+
+        self.lines += part.lines
+        self.points += part.points
+        self.unattributed += part.unattributed
+        self.aggregate.merge(part.aggregate)
+        shutil.rmtree(part.directory, ignore_errors=True)
+        return self
+
+    def discard(self):
+        if self._files is not None:
+            for f in self._files.values():
+                f.close()
+            self._files = None
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __getstate__(self):
+        # Workers hand back closed parts; only the tables and the aggregate travel
+        state = dict(self.__dict__)
+        state['_files'] = None
+        state['_buffers'] = None
+        return state
+
+    @staticmethod
+    def _intern(table, index, item):
+        position = index.get(item)
+        if position is None:
+            position = index[item] = len(table)
+            table.append(item)
+        return position
+
+
+def fold_block(aggregate, metrics, tag_sets, arrays):
+    """Fold one block of cached columns into ``aggregate``, one vectorized pass per metric"""
+    metric_ids = arrays['metric_id']
+    values = arrays['value']
+    timestamps = arrays['timestamp']
+    for metric_id, key in enumerate(metrics):
+        selected = metric_ids == metric_id
+        if key[0] is not None:
+            aggregate.add_values(tuple(key), values[selected], timestamps[selected])
+        elif aggregate.endpoints is not None:
+            _add_endpoint_values(aggregate.endpoints, tag_sets, values[selected], arrays['tag_id'][selected])
+    return aggregate
+
+
+def _add_endpoint_values(endpoints, tag_sets, values, tag_ids):
+    """Fold cached endpoint points into the breakdown, one vectorized add per group"""
+    order = np.argsort(tag_ids, kind='stable')
+    sorted_ids = tag_ids[order]
+    unique, starts = np.unique(sorted_ids, return_index=True)
+    for tag_id, group_values in zip(unique.tolist(), np.split(values[order], starts[1:])):
+        endpoints.add_group_values([value for _field, value in tag_sets[tag_id]], group_values)
+
+
+def iter_column_blocks(directory, points, block_points=BLOCK_POINTS):
+    """Yield ``{column: array}`` blocks of at most ``block_points`` rows read from the column files"""
+    if not points:
+        return
+    columns = {name: np.memmap(directory / f"{name}.bin", dtype=dtype, mode='r', shape=(points,))
+               for name, dtype in COLUMNS}
+    for start in range(0, points, block_points):
+        yield {name: np.array(column[start:start + block_points]) for name, column in columns.items()}
+
+
+def cache_dir_for(results_dir, test_name):
+    return results_dir / CACHE_DIR_NAME / test_name
+
+
+def cache_signature(json_file, app_ids, endpoint_urls=None):
+    """Everything that must match for a cache entry to be reused"""
+    stat = json_file.stat()
+    return {
+        'version': CACHE_VERSION,
+        'source': json_file.name,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'apps': list(app_ids),
+        'endpoints': dict(endpoint_urls or {}),
+    }
+
+
+def has_fresh_cache(results_dir, json_files, app_ids, endpoint_urls=None):
+    """True when every k6 file already has an up-to-date cache entry"""
+    return all(read_cache(cache_dir_for(results_dir, test_name),
+                          cache_signature(json_file, app_ids, endpoint_urls)) is not None
+               for test_name, json_file in json_files.items())
+
+
+def write_cache(cache_dir, signature, columns):
+    """Atomically publish the spooled ``columns`` as the cache entry ``cache_dir``"""
+    meta = dict(signature,
+                lines=columns.lines,
+                points=columns.points,
+                unattributed=columns.unattributed,
+                metrics=[list(key) for key in columns.metrics],
+                tags=[list(map(list, tags)) for tags in columns.tag_sets])
+    with open(columns.directory / META_FILE_NAME, 'w') as f:
+        json.dump(meta, f)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(columns.directory, cache_dir)
+    # Entries of the single-file format (version 2 and older) are superseded
+    legacy_file = cache_dir.parent / f"{cache_dir.name}.npz"
+    if legacy_file.exists():
+        legacy_file.unlink()
+
+
+def read_cache(cache_dir, signature):
+    """Return the metadata of a cache entry, or None when missing, stale or incomplete"""
+    meta_file = cache_dir / META_FILE_NAME
+    if not meta_file.exists():
+        return None
+
+    try:
+        with open(meta_file) as f:
+            meta = json.load(f)
+        if any(meta.get(field) != expected for field, expected in signature.items()):
+            return None
+        for name, dtype in COLUMNS:
+            size = (cache_dir / f"{name}.bin").stat().st_size
+            if size != meta['points'] * np.dtype(dtype).itemsize:
+                raise ValueError(f"{name}.bin has {size:,} bytes for {meta['points']:,} points")
+    except (OSError, ValueError, KeyError) as e:
+        log_progress(f"  ⚠️ Ignoring unreadable cache {cache_dir.name}: {e}")
+        return None
+
+    return meta
+
+
+def aggregate_from_cache(cache_dir, test_name, app_ids, meta, endpoint_urls=None):
+    """Rebuild a K6TestAggregate from a cache entry, one block of columns at a time"""
+    aggregate = K6TestAggregate(test_name, app_ids, endpoint_urls)
+    aggregate.lines = meta['lines']
+    for block in iter_column_blocks(cache_dir, meta['points']):
+        fold_block(aggregate, meta['metrics'], meta['tags'], block)
+    if aggregate.endpoints is not None:
+        aggregate.endpoints.unattributed += meta['unattributed']
+    return aggregate
+
+
+def _spool_range(columns, json_file, start, end, fast, progress):
+    try:
+        for point in iter_k6_range(json_file, columns, start, end, fast, progress, with_tags=True):
+            columns.add_point(*point)
+        return columns.close()
+    except BaseException:
+        columns.discard()
+        raise
+
+
+def collect_k6_range(json_file, test_name, app_ids, fast, endpoint_urls, parts_dir, start, end):
+    """Worker entry point: spool one byte range into a closed K6PointColumns under ``parts_dir``"""
+    columns = K6PointColumns(parts_dir / f"{test_name}-{start}", test_name, app_ids, endpoint_urls)
+    return _spool_range(columns, json_file, start, end, fast, progress=False)
+
+
+def _build_dir(results_dir, test_name):
+    return results_dir / CACHE_DIR_NAME / f"{test_name}.tmp"
+
+
+def load_k6_cached(results_dir, json_files, app_ids, workers=1, fast=True, endpoint_urls=None):
+    """Load every k6 file through the columnar cache, rebuilding stale entries.
+
+    Returns per-test K6TestAggregates, like the uncached ingestion paths.
+    """
+    results = {}
+    signatures = {}
+    stale = {}
+
+    for test_name, json_file in json_files.items():
+        signature = signatures[test_name] = cache_signature(json_file, app_ids, endpoint_urls)
+        cache_dir = cache_dir_for(results_dir, test_name)
+        meta = read_cache(cache_dir, signature)
+        if meta is None:
+            stale[test_name] = json_file
+            continue
+        log_progress(f"  ♻️ {test_name}: using columnar cache {CACHE_DIR_NAME}/{cache_dir.name}")
+        results[test_name] = aggregate_from_cache(cache_dir, test_name, app_ids, meta, endpoint_urls)
+
+    if not stale:
+        return results
+
+    try:
+        (results_dir / CACHE_DIR_NAME).mkdir(exist_ok=True)
+    except OSError as e:
+        log_progress(f"  ⚠️ Cannot create {CACHE_DIR_NAME} ({e}); parsing without the cache")
+        if workers > 1:
+            results.update(ingest_k6_files_parallel(stale, app_ids, workers, fast, endpoint_urls))
+        else:
+            for test_name, json_file in stale.items():
+                try:
+                    results[test_name] = ingest_k6_file(json_file, test_name, app_ids, fast, endpoint_urls)
+                except Exception as e:
+                    log_progress(f"  ❌ Error loading {json_file}: {e}")
+        return {test_name: results[test_name] for test_name in json_files if test_name in results}
+
+    log_progress(f"  🧱 Building columnar cache for {len(stale)} file(s)...")
+    parsed = {}
+    if workers > 1:
+        parts_dir = results_dir / CACHE_DIR_NAME / "parts.tmp"
+        try:
+            for test_name, parts in map_k6_ranges(stale, workers, collect_k6_range, app_ids, fast,
+                                                  endpoint_urls, parts_dir).items():
+                columns = K6PointColumns(_build_dir(results_dir, test_name), test_name, app_ids, endpoint_urls)
+                for part in parts:
+                    columns.append_part(part)
+                parsed[test_name] = columns.close()
+        finally:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+    else:
+        for test_name, json_file in stale.items():
+            try:
+                columns = K6PointColumns(_build_dir(results_dir, test_name), test_name, app_ids, endpoint_urls)
+                parsed[test_name] = _spool_range(columns, json_file, 0, json_file.stat().st_size, fast,
+                                                 progress=True)
+            except Exception as e:
+                log_progress(f"  ❌ Error loading {json_file}: {e}")
+
+    for test_name, columns in parsed.items():
+        cache_dir = cache_dir_for(results_dir, test_name)
+        try:
+            write_cache(cache_dir, signatures[test_name], columns)
+            log_progress(f"  💾 {test_name}: cached {columns.points:,} points to {CACHE_DIR_NAME}/{cache_dir.name}")
+        except OSError as e:
+            log_progress(f"  ⚠️ Could not write cache {cache_dir}: {e}")
+            columns.discard()
+        results[test_name] = columns.aggregate
+
+    # Keep the session's file order regardless of which entries were cached
+    return {test_name: results[test_name] for test_name in json_files if test_name in results}
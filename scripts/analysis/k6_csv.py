@@ -0,0 +1,167 @@
+"""Chunked ingestion of k6 CSV output (``k6 run --out csv=...``) with pandas.
+
+pandas is imported on first use so JSON-only runs never pay for it.
+"""
+
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from common import log_progress
+from k6_decompress import compression_of, read_sample
+from k6_ingest import (K6TestAggregate, iter_k6_range, ingest_points, iter_points_blocks, iter_points_json,
+                       split_byte_ranges)
+
+CSV_CHUNK_ROWS = 1_000_000
+CSV_USECOLS = ['metric_name', 'timestamp', 'metric_value']
+CSV_DTYPES = {'metric_name': 'category', 'timestamp': np.float64, 'metric_value': np.float64}
+# Request tag columns read for the per-endpoint breakdown
+CSV_ENDPOINT_COLUMNS = ['name', 'method', 'status', 'url', 'expected_response']
+
+# Bytes of each format parsed when benchmarking the backends
+BENCHMARK_SAMPLE_BYTES = 4 * 1024 * 1024
+
+
+def _aggregate_chunk(chunk, aggregate):
+    """Fold one DataFrame chunk into ``aggregate`` with one vectorized group-by per metric"""
+    names = chunk['metric_name'].cat.categories
+    codes = chunk['metric_name'].cat.codes.to_numpy()
+    values = chunk['metric_value'].to_numpy()
+    # k6 writes Unix seconds (sub-second timeFormat variants are floored into the same window)
+    timestamps = chunk['timestamp'].to_numpy()
+    resolve = aggregate.dispatch.resolve
+
+    wanted = [(code, resolve(name)) for code, name in enumerate(names)]
+    wanted = [(code, key) for code, key in wanted if key is not None]
+    if not wanted:
+        return
+
+    # Sort once so every metric's values are a contiguous slice
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    sorted_values = values[order]
+    sorted_timestamps = timestamps[order]
+    for code, key in wanted:
+        start, end = np.searchsorted(sorted_codes, [code, code + 1])
+        series_values = sorted_values[start:end]
+        valid = ~np.isnan(series_values)
+        if key[0] is None:
+            _aggregate_endpoints(chunk, order[start:end][valid], series_values[valid], aggregate.endpoints)
+        else:
+            aggregate.add_values(key, series_values[valid], sorted_timestamps[start:end][valid])
+
+
+def _aggregate_endpoints(chunk, rows, values, endpoints):
+    """Group request durations by their distinct tag combination and add each group at once"""
+    columns = [chunk[column] for column in CSV_ENDPOINT_COLUMNS]
+    codes = np.stack([column.cat.codes.to_numpy()[rows] for column in columns], axis=1)
+    combos, inverse = np.unique(codes, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    order = np.argsort(inverse, kind='stable')
+    starts = np.searchsorted(inverse[order], np.arange(len(combos)))
+    for combo, group_values in zip(combos, np.split(values[order], starts[1:])):
+        tags = tuple(sorted((name, str(column.cat.categories[code]) if code >= 0 else '')
+                            for name, column, code in zip(CSV_ENDPOINT_COLUMNS, columns, combo)))
+        endpoints.add_values(tags, group_values)
+
+
+def ingest_k6_csv(source, test_name, app_ids, chunk_rows=CSV_CHUNK_ROWS, endpoint_urls=None):
+    """Stream a k6 CSV file (path or file object) into a new K6TestAggregate"""
+    import pandas as pd
+
+    aggregate = K6TestAggregate(test_name, app_ids, endpoint_urls)
+    usecols, dtypes = CSV_USECOLS, CSV_DTYPES
+    if endpoint_urls:
+        usecols = usecols + CSV_ENDPOINT_COLUMNS
+        dtypes = dict(dtypes, **{column: 'category' for column in CSV_ENDPOINT_COLUMNS})
+    reader = pd.read_csv(source, usecols=usecols, dtype=dtypes,
+                         chunksize=chunk_rows, on_bad_lines='skip')
+    with reader:
+        for chunk in reader:
+            aggregate.lines += len(chunk)
+            _aggregate_chunk(chunk, aggregate)
+    return aggregate
+
+
+def ingest_k6_csv_files(csv_files, app_ids, workers=1, endpoint_urls=None):
+    """Ingest several k6 CSV files, one process per file when ``workers > 1``"""
+    results = {}
+    if workers > 1 and len(csv_files) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(csv_files))) as pool:
+            futures = {test_name: pool.submit(ingest_k6_csv, csv_file, test_name, app_ids,
+                                              endpoint_urls=endpoint_urls)
+                       for test_name, csv_file in csv_files.items()}
+            for test_name, future in futures.items():
+                try:
+                    results[test_name] = future.result()
+                except Exception as e:
+                    log_progress(f"  ❌ Error loading {csv_files[test_name]}: {e}")
+        return results
+
+    for test_name, csv_file in csv_files.items():
+        try:
+            results[test_name] = ingest_k6_csv(csv_file, test_name, app_ids, endpoint_urls=endpoint_urls)
+        except Exception as e:
+            log_progress(f"  ❌ Error loading {csv_file}: {e}")
+    return results
+
+
+def _seconds_per_byte_json(json_file, app_ids, fast, endpoint_urls):
+    aggregate = K6TestAggregate(json_file.stem, app_ids, endpoint_urls)
+    if compression_of(json_file):
+        # Seconds per compressed byte, inflating included, on about BENCHMARK_SAMPLE_BYTES of inflated JSON
+        started = time.perf_counter()
+        sample, compressed_bytes = read_sample(json_file, BENCHMARK_SAMPLE_BYTES)
+        if fast:
+            points = iter_points_blocks([sample], aggregate, progress=False, with_tags=bool(endpoint_urls))
+        else:
+            points = iter_points_json(sample.splitlines(), aggregate, progress=False,
+                                      with_tags=bool(endpoint_urls))
+        ingest_points(points, aggregate)
+        return (time.perf_counter() - started) / max(compressed_bytes, 1)
+
+    start, end = split_byte_ranges(json_file, BENCHMARK_SAMPLE_BYTES)[0]
+    started = time.perf_counter()
+    points = iter_k6_range(json_file, aggregate, start, end, fast, progress=False, with_tags=bool(endpoint_urls))
+    ingest_points(points, aggregate)
+    return (time.perf_counter() - started) / max(end - start, 1)
+
+
+def _seconds_per_byte_csv(csv_file, app_ids, endpoint_urls):
+    with open(csv_file, 'rb') as f:
+        sample = f.read(BENCHMARK_SAMPLE_BYTES)
+    sample = sample[:sample.rfind(b'\n') + 1] or sample
+    started = time.perf_counter()
+    ingest_k6_csv(io.BytesIO(sample), csv_file.stem, app_ids, endpoint_urls=endpoint_urls)
+    return (time.perf_counter() - started) / max(len(sample), 1)
+
+
+def preferred_backends(json_files, csv_files, preferred='json'):
+    """``{test: 'json' or 'csv'}``: the ``preferred`` format for every test that has it, the other one otherwise"""
+    files = {'json': json_files, 'csv': csv_files}
+    other = 'csv' if preferred == 'json' else 'json'
+    backends = {}
+    for test_name in sorted(set(json_files) | set(csv_files)):
+        backends[test_name] = preferred if test_name in files[preferred] else other
+    return backends
+
+
+def choose_backends(json_files, csv_files, app_ids, fast=True, endpoint_urls=None):
+    """Benchmark both formats on a sample of each test that has both and pick the faster one per test.
+
+    The estimate for a format is its measured seconds-per-byte times the
+    size of the file it would read. A test with one format is read from it.
+    """
+    backends = preferred_backends(json_files, csv_files)
+    for test_name in sorted(set(json_files) & set(csv_files)):
+        json_file, csv_file = json_files[test_name], csv_files[test_name]
+        estimates = {
+            'json': _seconds_per_byte_json(json_file, app_ids, fast, endpoint_urls) * json_file.stat().st_size,
+            'csv': _seconds_per_byte_csv(csv_file, app_ids, endpoint_urls) * csv_file.stat().st_size,
+        }
+        backends[test_name] = min(estimates, key=estimates.get)
+        log_progress(f"  ⏱️ {test_name}: estimated ingestion time JSON {estimates['json']:.1f}s, "
+                     f"CSV {estimates['csv']:.1f}s -> using {backends[test_name].upper()}")
+    return backends
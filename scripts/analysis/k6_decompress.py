@@ -0,0 +1,167 @@
+"""Pipelined reading of compressed k6 output (``--out json=<test>.json.gz``).
+
+A compressed file cannot be memory-mapped or cut into byte ranges, so it is
+read front to back: a background thread reads the raw file, inflates it and
+cuts the output at the last newline, handing blocks of whole lines to the
+parser through a bounded queue. zlib and zstandard release the GIL while
+inflating, so reading, inflating and parsing overlap, and the queue bound
+keeps memory flat however far the parser falls behind. ``.zst`` needs the
+optional ``zstandard`` package.
+"""
+
+import queue
+import threading
+import zlib
+from pathlib import Path
+
+from common import log_progress
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSED_SUFFIXES = ('.gz', '.zst')
+# When a test has several copies, read the cheapest one: plain, then zstd, then gzip
+_SUFFIX_PREFERENCE = ('', '.zst', '.gz')
+RAW_READ_BYTES = 256 * 1024  # Compressed bytes inflated per step (a few MB of NDJSON)
+QUEUE_DEPTH = 8  # Decompressed blocks buffered ahead of the parser
+SAMPLE_READ_BYTES = 16 * 1024  # Smaller steps for samples, so one step never inflates far past the cap
+_GZIP_WBITS = zlib.MAX_WBITS | 16
+_END = object()
+
+
+def compression_of(path):
+    """``'.gz'`` or ``'.zst'`` for a compressed file, None otherwise"""
+    suffix = Path(path).suffix
+    return suffix if suffix in COMPRESSED_SUFFIXES else None
+
+
+def k6_output_files(k6_dir, extension):
+    """``{test: path}`` of the k6 outputs with ``extension`` (e.g. ``.json``), plain or compressed.
+
+    Files whose compression cannot be read here are skipped with a warning.
+    """
+    candidates = {}
+    for path in sorted(Path(k6_dir).glob(f"*{extension}*")):
+        compression = compression_of(path) or ''
+        name = path.name[:-len(compression)] if compression else path.name
+        if not name.endswith(extension) or name == extension:
+            continue
+        if compression == '.zst' and zstandard is None:
+            log_progress(f"  ⚠️ Skipping {path.name}: reading .zst needs the zstandard package")
+            continue
+        candidates.setdefault(name[:-len(extension)], []).append((_SUFFIX_PREFERENCE.index(compression), path))
+    return {test_name: min(paths)[1] for test_name, paths in candidates.items()}
+
+
+def _gzip_chunks(raw, read_bytes=RAW_READ_BYTES):
+    """Inflate a gzip stream, including files made of several concatenated members"""
+    inflater = zlib.decompressobj(_GZIP_WBITS)
+    pending = False
+    while True:
+        data = raw.read(read_bytes)
+        if not data:
+            break
+        while data:
+            pending = True
+            yield inflater.decompress(data)
+            if not inflater.eof:
+                break
+            data = inflater.unused_data
+            inflater = zlib.decompressobj(_GZIP_WBITS)
+            pending = False
+    if pending:
+        yield inflater.flush()
+        # A k6 run that was killed never writes the gzip trailer; keep what was written
+        log_progress(f"  ⚠️ {Path(raw.name).name} is truncated; using the data before the cut")
+
+
+def _zstd_chunks(raw, read_bytes=RAW_READ_BYTES):
+    if zstandard is None:
+        raise RuntimeError("reading .zst files needs the zstandard package")
+    reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+    while True:
+        data = reader.read(read_bytes * 8)
+        if not data:
+            break
+        yield data
+
+
+def _put(blocks, item, stop):
+    """Block until ``item`` is queued; False when the consumer went away first"""
+    while not stop.is_set():
+        try:
+            blocks.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _chunks(path, raw, read_bytes=RAW_READ_BYTES):
+    return _zstd_chunks(raw, read_bytes) if compression_of(path) == '.zst' else _gzip_chunks(raw, read_bytes)
+
+
+def read_sample(path, max_output_bytes):
+    """``(lines, compressed_bytes)``: the whole lines of about the first ``max_output_bytes`` inflated bytes.
+
+    ``compressed_bytes`` is how much of the file was read to inflate them.
+    """
+    with open(path, 'rb') as raw:
+        inflated = []
+        size = 0
+        chunks = _chunks(path, raw, SAMPLE_READ_BYTES)
+        for chunk in chunks:
+            inflated.append(chunk)
+            size += len(chunk)
+            if size >= max_output_bytes:
+                break
+        chunks.close()
+        compressed_bytes = raw.tell()
+    sample = b''.join(inflated)
+    return sample[:sample.rfind(b'\n') + 1], compressed_bytes
+
+
+def _produce(path, blocks, stop):
+    try:
+        with open(path, 'rb') as raw:
+            partial = b''
+            for chunk in _chunks(path, raw):
+                cut = chunk.rfind(b'\n') + 1
+                if cut:
+                    if not _put(blocks, partial + chunk[:cut], stop):
+                        return
+                    partial = chunk[cut:]
+                else:
+                    partial += chunk
+            if partial and not _put(blocks, partial, stop):
+                return
+    except Exception as e:
+        _put(blocks, e, stop)
+        return
+    _put(blocks, _END, stop)
+
+
+def iter_line_blocks(path, queue_depth=QUEUE_DEPTH):
+    """Yield the decompressed content of ``path`` as blocks of whole lines.
+
+    A reader thread inflates up to ``queue_depth`` blocks ahead of the
+    caller. Errors of the reader thread are raised here.
+    """
+    blocks = queue.Queue(maxsize=queue_depth)
+    stop = threading.Event()
+    reader = threading.Thread(target=_produce, args=(path, blocks, stop),
+                              name=f"inflate-{Path(path).name}", daemon=True)
+    reader.start()
+    try:
+        while True:
+            block = blocks.get()
+            if block is _END:
+                return
+            if isinstance(block, Exception):
+                raise block
+            yield block
+    finally:
+        stop.set()
+        reader.join()
@@ -0,0 +1,187 @@
+"""Per-endpoint and per-status latency breakdown from the tags of k6's built-in http_req_duration.
+
+k6 tags every request with ``name`` (the URL unless the script sets one),
+``method``, ``status`` and ``expected_response``. A point is attributed to
+the app whose ``base_url`` in apps.json has the same port and path prefix,
+and its URL is reduced to an endpoint template (no query string, ids as
+``{id}``). Each distinct (app, method, endpoint, status, expected_response)
+tuple is interned once into a small integer group id that indexes a list
+of histograms, so memory depends on the number of endpoints and status
+codes, not on the number of points or distinct URLs.
+"""
+
+import re
+from urllib.parse import urlsplit
+
+from histogram import LatencyHistogram
+
+# Numeric ids, UUIDs and long hex/ObjectId-like path segments
+_ID_SEGMENT_RE = re.compile(r'^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'
+                            r'|[0-9a-fA-F]{16,})$')
+# Bound on the raw-tags -> group id cache; unique URLs (e.g. DELETE /users/<id>) would grow it forever
+TAG_CACHE_LIMIT = 50_000
+# Fields of an endpoint group tuple
+GROUP_FIELDS = ('app', 'method', 'endpoint', 'status', 'expected_response')
+
+
+def _url_port(parts):
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    if port is None:
+        port = 443 if parts.scheme == 'https' else 80
+    return port
+
+
+def endpoint_template(path):
+    """``/api/v1/users/42?x=1`` -> ``/api/v1/users/{id}``"""
+    segments = ['{id}' if _ID_SEGMENT_RE.match(segment) else segment for segment in path.split('/')]
+    return '/'.join(segments) or '/'
+
+
+class EndpointGroups:
+    """Interns request tags into integer group ids.
+
+    ``app_urls`` maps app id to the base URL its requests are sent to.
+    ``groups[gid]`` is the ``(app, method, endpoint, status, expected_response)``
+    tuple of group ``gid``; points that match no app have no group.
+    """
+
+    def __init__(self, app_urls):
+        self.app_urls = dict(app_urls)
+        # Longest base path first so /api/v2 is never claimed by /api
+        self._bases = sorted(((app, _url_port(urlsplit(url)), urlsplit(url).path.rstrip('/'))
+                              for app, url in self.app_urls.items() if url),
+                             key=lambda base: len(base[2]), reverse=True)
+        self.groups = []
+        self._ids = {}
+        self._by_tags = {}
+
+    def _attribute(self, url):
+        """``(app, endpoint)`` for a request URL, or None when it belongs to no configured app"""
+        parts = urlsplit(url)
+        port = _url_port(parts)
+        for app, base_port, base_path in self._bases:
+            if port == base_port and (parts.path == base_path or parts.path.startswith(base_path + '/')):
+                return app, endpoint_template(parts.path[len(base_path):])
+        return None
+
+    def intern_group(self, group):
+        gid = self._ids.get(group)
+        if gid is None:
+            gid = self._ids[group] = len(self.groups)
+            self.groups.append(group)
+        return gid
+
+    def group_id(self, tags):
+        """Group id of a canonical tags tuple (sorted ``(name, value)`` pairs), or None"""
+        try:
+            return self._by_tags[tags]
+        except KeyError:
+            pass
+
+        values = dict(tags)
+        url = values.get('url') or values.get('name', '')
+        attributed = self._attribute(url)
+        gid = None
+        if attributed is not None:
+            app, endpoint = attributed
+            name = values.get('name')
+            # A name set by the script (not the URL itself) is already a deliberate grouping
+            if name and name != url:
+                endpoint = name
+            gid = self.intern_group((app, values.get('method', ''), endpoint, values.get('status', ''),
+                                     values.get('expected_response', '')))
+
+        if len(self._by_tags) >= TAG_CACHE_LIMIT:
+            self._by_tags.clear()
+        self._by_tags[tags] = gid
+        return gid
+
+    def __getstate__(self):
+        # The raw-tags cache is only useful to the process that filled it
+        return dict(self.__dict__, _by_tags={})
+
+
+class EndpointBreakdown:
+    """Latency histogram per endpoint group of one test"""
+
+    def __init__(self, app_urls):
+        self.interner = EndpointGroups(app_urls)
+        self.histograms = []
+        self.unattributed = 0
+
+    def _histogram(self, gid):
+        histograms = self.histograms
+        while len(histograms) <= gid:
+            histograms.append(LatencyHistogram())
+        return histograms[gid]
+
+    def add(self, tags, value):
+        gid = self.interner.group_id(tags)
+        if gid is None:
+            self.unattributed += 1
+            return
+        self._histogram(gid).add(value)
+
+    def add_values(self, tags, values):
+        """Vectorized ``add`` of a NumPy array of values that share one tags tuple"""
+        gid = self.interner.group_id(tags)
+        if gid is None:
+            self.unattributed += int(values.size)
+            return
+        self._histogram(gid).add_many(values)
+
+    def add_group_values(self, group, values):
+        """Vectorized add of values already resolved to a group tuple (e.g. from the columnar cache)"""
+        self._histogram(self.interner.intern_group(tuple(group))).add_many(values)
+
+    def merge(self, other):
+        for group, histogram in zip(other.interner.groups, other.histograms):
+            self._histogram(self.interner.intern_group(group)).merge(histogram)
+        self.unattributed += other.unattributed
+        return self
+
+    @property
+    def requests(self):
+        return sum(histogram.count for histogram in self.histograms)
+
+
+def endpoint_stats(breakdown, duration_s=None):
+    """Per-app endpoint rows, slowest p95 first.
+
+    Returns ``{app: [{'method', 'endpoint', 'requests', 'rps', 'p50', 'p95',
+    'p99', 'max', 'statuses': {status: count}, 'unexpected'}]}``; ``rps`` is
+    None without a test duration.
+    """
+    merged = {}
+    for (app, method, endpoint, status, expected), histogram in zip(breakdown.interner.groups,
+                                                                      breakdown.histograms):
+        if not histogram.count:
+            continue
+        entry = merged.setdefault((app, method, endpoint), {'latency': LatencyHistogram(), 'statuses': {},
+                                                             'unexpected': 0})
+        entry['latency'].merge(histogram)
+        entry['statuses'][status] = entry['statuses'].get(status, 0) + histogram.count
+        if expected == 'false':
+            entry['unexpected'] += histogram.count
+
+    stats = {}
+    for (app, method, endpoint), entry in merged.items():
+        latency = entry['latency']
+        stats.setdefault(app, []).append({
+            'method': method,
+            'endpoint': endpoint,
+            'requests': latency.count,
+            'rps': latency.count / duration_s if duration_s else None,
+            'p50': latency.quantile(0.50),
+            'p95': latency.quantile(0.95),
+            'p99': latency.quantile(0.99),
+            'max': latency.max,
+            'statuses': dict(sorted(entry['statuses'].items())),
+            'unexpected': entry['unexpected'],
+        })
+    for rows in stats.values():
+        rows.sort(key=lambda row: row['p95'], reverse=True)
+    return stats
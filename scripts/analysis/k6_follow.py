@@ -0,0 +1,206 @@
+"""Live analysis of a k6 JSON output file (plain or gzipped) while the test is still writing it."""
+
+import os
+import signal
+import time
+import zlib
+
+from app_config import app_ids
+from common import log_progress
+from k6_decompress import compression_of
+from k6_ingest import K6TestAggregate, ingest_points, iter_points_json, iter_points_mapped
+from timeseries import merge_by_kind
+
+DEFAULT_REPORT_INTERVAL = 5
+DEFAULT_ROLLING_SECONDS = 10
+# Stop once the file has not grown for this long (k6 writes no end marker)
+DEFAULT_IDLE_TIMEOUT = 60
+# Rolling windows with fewer requests than this never trigger an abort
+ABORT_MIN_REQUESTS = 100
+# Below normal priority so the follower never competes with k6 for CPU
+FOLLOW_NICENESS = 10
+
+# Upper bound on memory per read when catching up with a large existing file
+FOLLOW_READ_BYTES = 16 * 1024 * 1024
+_GZIP_WBITS = zlib.MAX_WBITS | 16
+
+EXIT_ABORTED = 3
+
+
+class K6Follower:
+    """Incrementally fold a growing k6 JSON file into one K6TestAggregate.
+
+    Each ``poll`` reads only the bytes appended since the previous one, up to
+    the last complete line, so the cost per poll is proportional to the new
+    output. A ``.json.gz`` file is inflated incrementally: every compressed
+    byte is fed to one running decompressor and the inflated text after the
+    last newline waits for the next poll. k6's gzip writer emits whole deflate
+    blocks, so a gzipped file lags the test by up to one block. A file that
+    shrinks (k6 restarted) resets the state.
+    """
+
+    def __init__(self, json_file, test_name, app_ids, fast=True):
+        if compression_of(json_file) not in (None, '.gz'):
+            raise ValueError(f"cannot follow {json_file.name}: only .json and .json.gz are read incrementally")
+        self.json_file = json_file
+        self.test_name = test_name
+        self.app_ids = list(app_ids)
+        self.fast = fast
+        self.compressed = compression_of(json_file) == '.gz'
+        self._reset()
+
+    def _reset(self):
+        self.offset = 0
+        self.aggregate = K6TestAggregate(self.test_name, self.app_ids)
+        self.inflater = zlib.decompressobj(_GZIP_WBITS) if self.compressed else None
+        self.partial = b''
+
+    def _inflate(self, data):
+        """Inflate newly read gzip bytes, starting a new decompressor at every member boundary"""
+        inflated = []
+        while data:
+            inflated.append(self.inflater.decompress(data))
+            if not self.inflater.eof:
+                break
+            data = self.inflater.unused_data
+            self.inflater = zlib.decompressobj(_GZIP_WBITS)
+        return b''.join(inflated)
+
+    def _ingest(self, data, end):
+        if self.fast:
+            points = iter_points_mapped(data, 0, end, self.aggregate, progress=False)
+        else:
+            points = iter_points_json(data[:end].splitlines(), self.aggregate, progress=False)
+        ingest_points(points, self.aggregate)
+
+    def poll(self):
+        """Ingest newly completed lines; return the number of bytes consumed"""
+        try:
+            size = self.json_file.stat().st_size
+        except FileNotFoundError:
+            return 0
+        if size < self.offset:
+            log_progress(f"  ⚠️ {self.json_file.name} was truncated, restarting")
+            self._reset()
+        if size == self.offset:
+            return 0
+
+        consumed = 0
+        with open(self.json_file, 'rb') as f:
+            f.seek(self.offset)
+            while self.offset < size:
+                data = f.read(min(FOLLOW_READ_BYTES, size - self.offset))
+                if self.compressed:
+                    # The decompressor keeps its own state, so every compressed byte is consumed now
+                    self.offset += len(data)
+                    consumed += len(data)
+                    data = self.partial + self._inflate(data)
+                    end = data.rfind(b'\n') + 1
+                    self.partial = data[end:]
+                    if end:
+                        self._ingest(data, end)
+                    continue
+
+                # Leave a partially written last line for the next poll
+                end = data.rfind(b'\n') + 1
+                if end == 0:
+                    break
+                self._ingest(data, end)
+                self.offset += end
+                consumed += end
+                f.seek(self.offset)
+        return consumed
+
+    def rolling_stats(self, seconds=DEFAULT_ROLLING_SECONDS):
+        """Per-app RPS, error rate and p95/p99 over the last ``seconds`` complete seconds of data"""
+        windows = self.aggregate.windows
+        if not windows:
+            return None, {}
+
+        # The newest second is probably still being written
+        last = max(windows) - 1
+        first = last - seconds + 1
+        merged = merge_by_kind([windows[second] for second in range(first, last + 1) if second in windows],
+                               self.app_ids)
+        stats = {}
+        for app in self.app_ids:
+            latency = merged['response_time'][app]
+            errors = merged['errors'][app]
+            stats[app] = {
+                'requests': latency.count,
+                'rps': latency.count / seconds,
+                'error_rate_percent': (errors.sum / errors.count * 100) if errors.count else 0,
+                'p95': latency.quantile(0.95),
+                'p99': latency.quantile(0.99),
+            }
+        return last - min(windows) + 1, stats
+
+
+def threshold_breaches(stats, max_error_rate=None, max_p95=None, max_p99=None):
+    """Human-readable list of abort thresholds crossed by any app with enough requests"""
+    breaches = []
+    for app, app_stats in stats.items():
+        if app_stats['requests'] < ABORT_MIN_REQUESTS:
+            continue
+        if max_error_rate is not None and app_stats['error_rate_percent'] > max_error_rate:
+            breaches.append(f"{app} error rate {app_stats['error_rate_percent']:.2f}% > {max_error_rate:g}%")
+        if max_p95 is not None and app_stats['p95'] > max_p95:
+            breaches.append(f"{app} p95 {app_stats['p95']:.2f}ms > {max_p95:g}ms")
+        if max_p99 is not None and app_stats['p99'] > max_p99:
+            breaches.append(f"{app} p99 {app_stats['p99']:.2f}ms > {max_p99:g}ms")
+    return breaches
+
+
+def _format_latency(value):
+    return f"{value:.2f}ms" if value is not None else "-"
+
+
+def follow_k6_file(json_file, apps, interval=DEFAULT_REPORT_INTERVAL, rolling_seconds=DEFAULT_ROLLING_SECONDS,
+                   max_error_rate=None, max_p95=None, max_p99=None, abort_pid=None,
+                   idle_timeout=DEFAULT_IDLE_TIMEOUT, fast=True):
+    """Tail ``json_file`` and print rolling per-app stats every ``interval`` seconds.
+
+    Returns 0 when the file stops growing for ``idle_timeout`` seconds, or
+    EXIT_ABORTED once a threshold is crossed (after sending SIGINT to
+    ``abort_pid``, which makes k6 stop gracefully).
+    """
+    try:
+        os.nice(FOLLOW_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+    names = {app['id']: app['short_name'] for app in apps}
+    test_name = json_file.name.split('.json')[0]
+    follower = K6Follower(json_file, test_name, app_ids(apps), fast)
+    log_progress(f"👀 Following {json_file} (report every {interval}s, rolling {rolling_seconds}s window)")
+
+    last_growth = time.monotonic()
+    while True:
+        time.sleep(interval)
+        if follower.poll():
+            last_growth = time.monotonic()
+        elif time.monotonic() - last_growth > idle_timeout:
+            log_progress(f"⏹️ No new output for {idle_timeout}s, stopping "
+                         f"({follower.aggregate.points:,} points from {follower.aggregate.lines:,} lines)")
+            return 0
+
+        elapsed, stats = follower.rolling_stats(rolling_seconds)
+        if not stats:
+            continue
+
+        log_progress(f"[{elapsed:>5}s] {follower.test_name}")
+        for app, app_stats in stats.items():
+            log_progress(f"  {names[app]:<12} {app_stats['rps']:>9.1f} req/s  "
+                         f"errors {app_stats['error_rate_percent']:6.2f}%  "
+                         f"p95 {_format_latency(app_stats['p95']):>10}  p99 {_format_latency(app_stats['p99']):>10}")
+
+        breaches = threshold_breaches(stats, max_error_rate, max_p95, max_p99)
+        if breaches:
+            log_progress(f"🛑 Early abort: {'; '.join(breaches)}")
+            if abort_pid:
+                try:
+                    os.kill(abort_pid, signal.SIGINT)
+                    log_progress(f"  Sent SIGINT to process {abort_pid}")
+                except OSError as e:
+                    log_progress(f"  ❌ Could not signal process {abort_pid}: {e}")
+            return EXIT_ABORTED
@@ -0,0 +1,511 @@
+"""Streaming ingestion of k6 NDJSON output into per-metric histograms."""
+
+import json
+import math
+import mmap
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+from app_config import MetricDispatch
+from common import log_progress
+from histogram import LatencyHistogram
+from k6_decompress import compression_of, iter_line_blocks
+from k6_endpoints import TAG_CACHE_LIMIT, EndpointBreakdown
+
+try:
+    import orjson
+    _fast_loads = orjson.loads
+    FAST_DECODER = 'orjson'
+except ImportError:
+    _fast_loads = json.loads
+    FAST_DECODER = 'json'
+
+PROGRESS_INTERVAL = 1_000_000  # Log every 1M lines
+CHUNK_BYTES = 32 * 1024 * 1024  # Target size of one parallel work unit
+
+# Byte patterns of k6's compact JSON output used by the fast path
+_POINT_MARKER = b'"type":"Point"'
+_TYPE_KEY = b'"type":"'
+_METRIC_KEY = b'"metric":"'
+_TIME_KEY = b'"time":"'
+_VALUE_KEY = b'"value":'
+_TAGS_KEY = b'"tags":'
+# A flat tags object (string values may contain escaped quotes or braces)
+_TAGS_RE = re.compile(rb'"tags":(\{(?:[^"{}]|"(?:[^"\\]|\\.)*")*\}|null)')
+
+# RFC3339 timestamps as written by k6, e.g. 2025-01-01T12:00:00.123456789Z
+_TIME_RE = re.compile(r'(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(\.\d+)?(Z|[+-]\d\d:?\d\d)?$')
+_epoch_seconds = {}
+_window_seconds = {}
+
+
+class K6TestAggregate:
+    """Constant-memory summary of every app-specific k6 Point recorded for one test.
+
+    With ``endpoint_urls`` (``{app: base_url}``) the tagged ``http_req_duration``
+    points also feed a per-endpoint breakdown in ``endpoints``.
+    """
+
+    def __init__(self, test_name, app_ids, endpoint_urls=None):
+        self.test_name = test_name
+        self.app_ids = list(app_ids)
+        self.dispatch = MetricDispatch(self.app_ids, endpoints=bool(endpoint_urls))
+        self.lines = 0
+        self.points = 0
+        self.series = {}   # (app, kind, scope) -> LatencyHistogram for the whole test
+        self.windows = {}  # epoch second -> {(app, kind, scope) -> LatencyHistogram}
+        self.endpoints = EndpointBreakdown(endpoint_urls) if endpoint_urls else None
+        self.nodes = {}    # load generator -> summary of its own output, for tests driven by several
+
+    def add_point(self, key, value, second=None):
+        histogram = self.series.get(key)
+        if histogram is None:
+            histogram = self.series[key] = LatencyHistogram()
+        histogram.add(value)
+        self.points += 1
+
+        if second is not None:
+            window = self.windows.get(second)
+            if window is None:
+                window = self.windows[second] = {}
+            histogram = window.get(key)
+            if histogram is None:
+                histogram = window[key] = LatencyHistogram()
+            histogram.add(value)
+
+    def add_values(self, key, values, timestamps=None):
+        """Vectorized ``add_point`` for NumPy arrays of values and epoch timestamps (NaN = unknown)"""
+        import numpy as np
+
+        if not values.size:
+            return
+        histogram = self.series.get(key)
+        if histogram is None:
+            histogram = self.series[key] = LatencyHistogram()
+        histogram.add_many(values)
+        self.points += int(values.size)
+
+        if timestamps is None:
+            return
+        timed = ~np.isnan(timestamps)
+        seconds = np.floor(timestamps[timed]).astype(np.int64)
+        order = np.argsort(seconds, kind='stable')
+        sorted_seconds = seconds[order]
+        sorted_values = values[timed][order]
+        unique, starts = np.unique(sorted_seconds, return_index=True)
+        for second, window_values in zip(unique.tolist(), np.split(sorted_values, starts[1:])):
+            window = self.windows.setdefault(second, {})
+            histogram = window.get(key)
+            if histogram is None:
+                histogram = window[key] = LatencyHistogram()
+            histogram.add_many(window_values)
+
+    def shift_windows(self, seconds):
+        """Move every per-second window by a whole number of seconds (e.g. to correct a generator's clock)"""
+        if seconds:
+            self.windows = {second + seconds: window for second, window in self.windows.items()}
+        return self
+
+    def merge(self, other):
+        """Fold a partial aggregate (e.g. from another chunk) into this one"""
+        self.lines += other.lines
+        self.points += other.points
+        _merge_series(self.series, other.series)
+        for second, window in other.windows.items():
+            if second in self.windows:
+                _merge_series(self.windows[second], window)
+            else:
+                self.windows[second] = window
+        if other.endpoints is not None:
+            if self.endpoints is None:
+                self.endpoints = other.endpoints
+            else:
+                self.endpoints.merge(other.endpoints)
+        return self
+
+
+def _merge_series(target, source):
+    for key, histogram in source.items():
+        if key in target:
+            target[key].merge(histogram)
+        else:
+            target[key] = histogram
+
+
+def parse_k6_time(text):
+    """Convert a k6 RFC3339 timestamp to epoch seconds (float, sub-microsecond digits dropped)"""
+    match = _TIME_RE.match(text)
+    if match is None:
+        return datetime.fromisoformat(text).timestamp()
+
+    second, fraction, offset = match.groups()
+    cache_key = (second, offset)
+    base = _epoch_seconds.get(cache_key)
+    if base is None:
+        if offset is None or offset == 'Z':
+            moment = datetime.fromisoformat(second).replace(tzinfo=timezone.utc)
+        else:
+            moment = datetime.fromisoformat(second + offset)
+        base = _epoch_seconds[cache_key] = moment.timestamp()
+
+    return base + float(fraction[:7]) if fraction else base
+
+
+def k6_epoch_second(text):
+    """Whole epoch second of a k6 timestamp, cached per second of wall-clock time"""
+    if text[-1] == 'Z':
+        cache_key = text[:19]
+    elif text[-6] in '+-':
+        cache_key = text[:19] + text[-6:]
+    else:
+        return math.floor(parse_k6_time(text))
+
+    second = _window_seconds.get(cache_key)
+    if second is None:
+        second = _window_seconds[cache_key] = math.floor(parse_k6_time(text))
+    return second
+
+
+def _canonical_tags(tags):
+    """Hashable, order-independent form of a k6 tags object"""
+    if not isinstance(tags, dict):
+        return ()
+    return tuple(sorted((str(name), str(value)) for name, value in tags.items()))
+
+
+def _log_lines(aggregate):
+    log_progress(f"  📈 Processed {aggregate.lines:,} lines, aggregated {aggregate.points:,} points")
+
+
+def _point_from_dict(data, resolve, with_tags=False):
+    """Extract ``(key, time, value, tags)`` from a decoded line, or None to skip it"""
+    if not isinstance(data, dict) or data.get('type') != 'Point':
+        return None
+
+    key = resolve(data.get('metric', ''))
+    if key is None:
+        return None
+
+    point_data = data.get('data', {})
+    value = point_data.get('value')
+    if value is None:
+        return None
+
+    # Only http_req_duration points are attributed by their tags; app points never read theirs
+    tags = _canonical_tags(point_data.get('tags')) if with_tags and key[0] is None else None
+    return key, point_data.get('time'), value, tags
+
+
+def iter_points_json(lines, aggregate, progress=True, with_tags=False):
+    """Reference path: decode every line with ``json.loads``.
+
+    ``aggregate`` is any sink with ``lines``, ``points`` and ``dispatch``
+    attributes; its line counter is advanced as the input is consumed.
+    """
+    loads = json.loads
+    resolve = aggregate.dispatch.resolve
+    for line in lines:
+        aggregate.lines += 1
+
+        if progress and aggregate.lines % PROGRESS_INTERVAL == 0:
+            _log_lines(aggregate)
+
+        if not line.strip():
+            continue
+
+        try:
+            point = _point_from_dict(loads(line), resolve, with_tags)
+        except ValueError:
+            continue
+
+        if point is not None:
+            yield point
+
+
+def _parse_number(raw):
+    """Parse a JSON number the way ``json.loads`` would (int unless it has a fraction/exponent)"""
+    if b'.' in raw or b'e' in raw or b'E' in raw:
+        return float(raw)
+    return int(raw)
+
+
+def _slice_tags(line, tags_at):
+    """Raw bytes of the tags object starting at ``tags_at``, or None if it cannot be isolated"""
+    start = tags_at + len(_TAGS_KEY)
+    end = line.find(b'}', start) + 1
+    if end == 0:
+        return None
+    candidate = line[start:end]
+    # Without escapes, an even number of quotes means the brace is outside any string
+    if b'\\' not in candidate and candidate.count(b'"') % 2 == 0:
+        return candidate
+    match = _TAGS_RE.match(line, tags_at)
+    return match.group(1) if match else None
+
+
+def _extract_point(line, keys, resolve, tag_sets=None):
+    """Byte-level extraction of ``(key, time, value, tags)`` from a compact k6 Point line.
+
+    Returns ``False`` when the line is not an interesting Point, and None when
+    the layout is unexpected and the line must go through the JSON decoder.
+    ``keys`` caches the dispatch key (or None) per raw metric name; when
+    ``tag_sets`` is given it caches canonical tags per raw tags object and
+    the tags of http_req_duration points are extracted. The tags element of
+    every other point is None.
+    """
+    metric_start = line.find(_METRIC_KEY)
+    if metric_start == -1:
+        return None
+    metric_start += len(_METRIC_KEY)
+    metric_end = line.find(b'"', metric_start)
+    if metric_end == -1:
+        return None
+    raw_name = line[metric_start:metric_end]
+
+    if raw_name in keys:
+        key = keys[raw_name]
+    else:
+        if b'\\' in raw_name:
+            return None
+        key = keys[raw_name] = resolve(raw_name.decode('utf-8'))
+    if key is None:
+        return False
+
+    # "time" and "value" must precede the tags object so a tag can never shadow them
+    tags_at = line.find(_TAGS_KEY)
+    value_at = line.find(_VALUE_KEY)
+    time_at = line.find(_TIME_KEY)
+    if value_at == -1 or time_at == -1 or (tags_at != -1 and (value_at > tags_at or time_at > tags_at)):
+        return None
+
+    value_start = value_at + len(_VALUE_KEY)
+    comma_at = line.find(b',', value_start)
+    brace_at = line.find(b'}', value_start)
+    value_end = min(comma_at, brace_at) if comma_at != -1 and brace_at != -1 else max(comma_at, brace_at)
+    if value_end == -1:
+        return None
+    raw_value = line[value_start:value_end].strip()
+    if raw_value == b'null':
+        return False
+
+    time_start = time_at + len(_TIME_KEY)
+    timestamp = line[time_start:line.find(b'"', time_start)].decode('ascii')
+
+    tags = None
+    if tag_sets is not None and key[0] is None:
+        if tags_at == -1:
+            tags = ()
+        else:
+            raw_tags = _slice_tags(line, tags_at)
+            if raw_tags is None:
+                return None
+            tags = tag_sets.get(raw_tags)
+            if tags is None:
+                if len(tag_sets) >= TAG_CACHE_LIMIT:
+                    # Every request URL can be unique (ids in the path); keep the cache bounded
+                    tag_sets.clear()
+                try:
+                    tags = tag_sets[raw_tags] = _canonical_tags(_fast_loads(raw_tags))
+                except ValueError:
+                    return None
+
+    try:
+        return key, timestamp, _parse_number(raw_value), tags
+    except ValueError:
+        return None
+
+
+def iter_points_mapped(mm, start, end, aggregate, progress=True, with_tags=False):
+    """Fast path over a memory-mapped byte range.
+
+    Lines that are not Points, or whose metric does not resolve to an app, are
+    rejected with a couple of ``bytes.find`` calls and never decoded. Lines
+    with an unexpected layout fall back to the (optionally orjson-backed)
+    JSON decoder, so results match ``iter_points_json`` exactly.
+    """
+    return _iter_mapped_ranges(((mm, start, end),), aggregate, progress, with_tags)
+
+
+def iter_points_blocks(blocks, aggregate, progress=True, with_tags=False):
+    """Fast path over an iterable of ``bytes`` blocks of whole lines (e.g. decompressed input)"""
+    return _iter_mapped_ranges(((block, 0, len(block)) for block in blocks), aggregate, progress, with_tags)
+
+
+def _iter_mapped_ranges(ranges, aggregate, progress, with_tags):
+    # The metric and tag caches live across ranges so every block starts warm
+    keys = {}
+    tag_sets = {} if with_tags else None
+    resolve = aggregate.dispatch.resolve
+    for mm, start, end in ranges:
+        find = mm.find
+        position = start
+        while position < end:
+            line_end = find(b'\n', position, end)
+            if line_end == -1:
+                line_end = end
+            line = mm[position:line_end]
+            position = line_end + 1
+            aggregate.lines += 1
+
+            if progress and aggregate.lines % PROGRESS_INTERVAL == 0:
+                _log_lines(aggregate)
+
+            if _POINT_MARKER in line:
+                point = _extract_point(line, keys, resolve, tag_sets)
+                if point is False:
+                    continue
+                if point is not None:
+                    yield point
+                    continue
+            elif _TYPE_KEY in line or not line.strip():
+                # Metric declarations and blank lines
+                continue
+
+            try:
+                point = _point_from_dict(_fast_loads(line), resolve, with_tags)
+            except ValueError:
+                continue
+
+            if point is not None:
+                yield point
+
+
+def ingest_points(points, aggregate):
+    """Fold ``(key, time, value, tags)`` tuples into ``aggregate``"""
+    add_point = aggregate.add_point
+    for key, timestamp, value, tags in points:
+        if key[0] is None:
+            # Built-in http_req_duration, attributed to an app by its URL tag
+            aggregate.endpoints.add(tags, value)
+        else:
+            add_point(key, value, k6_epoch_second(timestamp) if timestamp else None)
+    return aggregate
+
+
+def iter_k6_range(json_file, sink, start, end, fast=True, progress=True, with_tags=False):
+    """Yield the app points of one line-aligned byte range through the fast or reference path.
+
+    A compressed file is a single range that is read from the start.
+    """
+    if end <= start:
+        return
+
+    if compression_of(json_file):
+        blocks = iter_line_blocks(json_file)
+        if fast:
+            yield from iter_points_blocks(blocks, sink, progress, with_tags)
+        else:
+            lines = (line for block in blocks for line in block.splitlines())
+            yield from iter_points_json(lines, sink, progress, with_tags)
+        return
+
+    with open(json_file, 'rb') as f:
+        if fast:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield from iter_points_mapped(mm, start, end, sink, progress, with_tags)
+        else:
+            yield from iter_points_json(_read_range(f, start, end), sink, progress, with_tags)
+
+
+def _ingest_range(json_file, aggregate, start, end, fast, progress):
+    points = iter_k6_range(json_file, aggregate, start, end, fast, progress,
+                           with_tags=aggregate.endpoints is not None)
+    return ingest_points(points, aggregate)
+
+
+def ingest_k6_file(json_file, test_name, app_ids, fast=True, endpoint_urls=None):
+    """Stream a whole k6 JSON output file into a new K6TestAggregate"""
+    aggregate = K6TestAggregate(test_name, app_ids, endpoint_urls)
+    return _ingest_range(json_file, aggregate, 0, json_file.stat().st_size, fast, progress=True)
+
+
+def split_byte_ranges(json_file, chunk_bytes=CHUNK_BYTES):
+    """Split a file into ``(start, end)`` byte ranges that begin and end on line boundaries.
+
+    A compressed file cannot be entered mid-stream and is always one range.
+    """
+    file_size = json_file.stat().st_size
+    if compression_of(json_file):
+        return [(0, file_size)]
+    chunk_count = max(1, -(-file_size // chunk_bytes))
+    boundaries = [0]
+
+    with open(json_file, 'rb') as f:
+        for i in range(1, chunk_count):
+            f.seek(max(i * file_size // chunk_count, boundaries[-1]))
+            f.readline()  # Move to the start of the next full line
+            position = f.tell()
+            if position >= file_size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+
+    boundaries.append(file_size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _read_range(f, start, end):
+    """Yield the lines of an open binary file between two line-aligned offsets"""
+    f.seek(start)
+    position = start
+    while position < end:
+        line = f.readline()
+        if not line:
+            break
+        position += len(line)
+        yield line
+
+
+def ingest_k6_range(json_file, test_name, app_ids, fast, endpoint_urls, start, end):
+    """Worker entry point: aggregate one line-aligned byte range of a k6 file"""
+    return _ingest_range(json_file, K6TestAggregate(test_name, app_ids, endpoint_urls), start, end, fast,
+                         progress=False)
+
+
+def map_k6_ranges(json_files, workers, worker, *args):
+    """Run ``worker(json_file, test_name, *args, start, end)`` over every range of every file.
+
+    ``json_files`` maps test name to path. Every file is cut into
+    newline-aligned ranges and all ranges of all files share one pool, so
+    the test files are processed concurrently. Returns the partial results
+    per test in file order; tests whose ranges fail are logged and left out.
+    """
+    partials = {test_name: {} for test_name in json_files}
+    failed = set()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for test_name, json_file in json_files.items():
+            ranges = split_byte_ranges(json_file)
+            log_progress(f"  🧩 {test_name}: {len(ranges)} range(s) queued")
+            for index, (start, end) in enumerate(ranges):
+                future = pool.submit(worker, json_file, test_name, *args, start, end)
+                futures[future] = (test_name, index)
+
+        for future in as_completed(futures):
+            test_name, index = futures[future]
+            try:
+                partials[test_name][index] = future.result()
+            except Exception as e:
+                if test_name not in failed:
+                    log_progress(f"  ❌ Error loading {json_files[test_name]}: {e}")
+                failed.add(test_name)
+
+    return {
+        test_name: [chunks[index] for index in sorted(chunks)]
+        for test_name, chunks in partials.items()
+        if test_name not in failed
+    }
+
+
+def ingest_k6_files_parallel(json_files, app_ids, workers, fast=True, endpoint_urls=None):
+    """Aggregate several k6 files at once, merging the per-range partial aggregates"""
+    results = {}
+    for test_name, chunks in map_k6_ranges(json_files, workers, ingest_k6_range, app_ids, fast,
+                                           endpoint_urls).items():
+        aggregate = K6TestAggregate(test_name, app_ids, endpoint_urls)
+        for chunk in chunks:
+            aggregate.merge(chunk)
+        results[test_name] = aggregate
+    return results
@@ -0,0 +1,262 @@
+"""Tests driven by several k6 load generators: per-node files, clock-skew alignment and merging.
+
+A test run from several generator nodes keeps one output file per node in
+``k6-results/<test>/<node>.json[.gz]``. Every node file is ingested on its
+own (under the key ``<test>@<node>``, so the existing serial, parallel and
+cached paths all apply), then its per-second windows are moved onto the
+reference node's clock and the partial aggregates are merged into one
+aggregate per test.
+
+A node's clock offset is taken from ``<session>/node_offsets.json``
+(``{"node": seconds}``) or ``--node-offset``, which always win, and
+otherwise estimated from when the node ramps up and down compared with the
+reference node: generators running the same script ramp together. The
+estimate has sub-second resolution and comes with its uncertainty, but the
+windows are per second, so they move by the offset rounded to a whole second.
+"""
+
+import json
+import statistics
+from pathlib import Path
+
+from common import log_progress
+from k6_decompress import k6_output_files
+from k6_ingest import K6TestAggregate
+from timeseries import detect_stages, load_curve, merge_by_kind
+
+NODE_SEPARATOR = '@'
+NODE_OFFSETS_FILE = "node_offsets.json"
+# Largest clock skew an estimate is trusted for, in seconds
+MAX_SKEW_S = 60
+# Seconds two load curves must share for their similarity to mean anything
+MIN_OVERLAP_S = 30
+# Below this load-curve similarity the estimate is not trusted and the node keeps its own clock
+MIN_SKEW_SIMILARITY = 0.8
+# Fractions of a node's requests, counted from either end of the test, whose times are matched across nodes
+EDGE_FRACTIONS = tuple(0.01 + 0.09 * step / 19 for step in range(20))
+# Half-width of the window the local request rate at an edge time is measured over, in seconds
+EDGE_RATE_WINDOW_S = 5
+# Estimates less certain than this (1 sigma, seconds) are flagged: merged windows may be a second or more apart
+MAX_OFFSET_UNCERTAINTY_S = 1.0
+# A node whose p99 for an app exceeds the other nodes' median by this factor is likely saturated
+NODE_SATURATION_RATIO = 1.5
+
+
+def node_key(test_name, node):
+    return f"{test_name}{NODE_SEPARATOR}{node}"
+
+
+def k6_node_files(k6_dir, extension):
+    """``{test: {node: path}}`` of the tests with one output file per load generator"""
+    tests = {}
+    k6_dir = Path(k6_dir)
+    if not k6_dir.exists():
+        return tests
+    for test_dir in sorted(path for path in k6_dir.iterdir() if path.is_dir()):
+        files = k6_output_files(test_dir, extension)
+        if files:
+            tests[test_dir.name] = files
+    return tests
+
+
+def flatten_node_files(node_files):
+    """``{<test>@<node>: path}`` so per-node files go through the single-file loaders"""
+    return {node_key(test_name, node): path for test_name, files in node_files.items() for node, path in files.items()}
+
+
+def parse_node_offset(text):
+    """``NODE=SECONDS`` -> ``(node, seconds)``"""
+    node, separator, seconds = text.partition('=')
+    if not separator or not node:
+        raise ValueError(f"expected NODE=SECONDS, got {text!r}")
+    return node, float(seconds)
+
+
+def load_node_offsets(results_dir, overrides=None):
+    """Configured clock offsets per node: the session's node_offsets.json, then ``overrides`` on top"""
+    offsets = {}
+    offsets_file = Path(results_dir) / NODE_OFFSETS_FILE
+    if offsets_file.exists():
+        try:
+            with open(offsets_file, 'r') as f:
+                offsets = {node: float(seconds) for node, seconds in json.load(f).items()}
+        except (OSError, ValueError, AttributeError) as e:
+            log_progress(f"  ⚠️ Ignoring unreadable {offsets_file}: {e}")
+    offsets.update(overrides or {})
+    return offsets
+
+
+def _edge_times(first, curve, fractions):
+    """Epoch times at which a node had sent each fraction of its requests, and their 1-sigma errors.
+
+    Requests are taken as evenly spread within each second. The error is the
+    Poisson error of the count reached, counted from the nearer end of the
+    test, divided by the local request rate.
+    """
+    import numpy as np
+
+    cumulative = np.concatenate(([0.0], np.cumsum(curve)))
+    positions = np.interp(fractions * cumulative[-1], cumulative, np.arange(cumulative.size))
+    seconds = np.minimum(positions.astype(np.int64), curve.size - 1)
+    low = np.maximum(seconds - EDGE_RATE_WINDOW_S, 0)
+    high = np.minimum(seconds + EDGE_RATE_WINDOW_S + 1, curve.size)
+    rate = (cumulative[high] - cumulative[low]) / (high - low)
+    reached = np.minimum(cumulative[seconds], cumulative[-1] - cumulative[seconds])
+    return first + positions, np.sqrt(np.maximum(reached, 1)) / np.maximum(rate, 1e-9)
+
+
+def _similarity(reference_first, reference_curve, first, curve, lag):
+    """Cosine between two per-second curves once ``lag`` seconds are added to the second one's clock"""
+    import numpy as np
+
+    start = first + lag - reference_first
+    low, high = max(0, -start), min(len(curve), len(reference_curve) - start)
+    if high - low < MIN_OVERLAP_S:
+        return None
+    norm = np.linalg.norm(reference_curve) * np.linalg.norm(curve)
+    return float(curve[low:high] @ reference_curve[low + start:high + start] / norm) if norm else None
+
+
+def estimate_offset(reference, aggregate):
+    """``(seconds, uncertainty, similarity)`` to add to ``aggregate``'s clock so its load lines up with ``reference``'s.
+
+    Both nodes' cumulative request counts are normalized to their totals and
+    the times at which they reach the same EDGE_FRACTIONS during ramp-up and
+    during ramp-down are compared; the plateau carries no timing information
+    and is left out. The offset is the mean of the ramp-up and ramp-down
+    medians, so a node sending a different share of the load, which moves
+    the two in opposite directions, does not bias it. ``uncertainty`` is its
+    1-sigma error in seconds (from Poisson counting, or half the
+    disagreement of the two edges when larger). ``similarity`` is the cosine
+    between the per-second load curves at the rounded offset, i.e. whether
+    the nodes ran the same load shape at all. Returns ``(0, None, None)``
+    when the curves are too short to compare.
+    """
+    import numpy as np
+
+    reference_first, reference_counts = load_curve(reference)
+    first, counts = load_curve(aggregate)
+    if len(reference_counts) < MIN_OVERLAP_S or len(counts) < MIN_OVERLAP_S:
+        return 0, None, None
+    reference_curve = np.asarray(reference_counts, dtype=np.float64)
+    curve = np.asarray(counts, dtype=np.float64)
+    if not reference_curve.sum() or not curve.sum():
+        return 0, None, None
+
+    edges, errors = [], []
+    ramp_up = np.asarray(EDGE_FRACTIONS)
+    for fractions in (ramp_up, 1 - ramp_up):
+        reference_times, reference_errors = _edge_times(reference_first, reference_curve, fractions)
+        times, node_errors = _edge_times(first, curve, fractions)
+        edges.append(float(np.median(reference_times - times)))
+        errors.append(float(np.median(np.hypot(reference_errors, node_errors))))
+    offset = (edges[0] + edges[1]) / 2
+    uncertainty = max(float(np.hypot(*errors)) / 2, abs(edges[0] - edges[1]) / 2)
+    return offset, uncertainty, _similarity(reference_first, reference_curve, first, curve, int(round(offset)))
+
+
+def node_summary(aggregate, app_ids):
+    """Steady-state requests, rate, latency and error rate per app of one node's own output"""
+    first_second, curve = load_curve(aggregate)
+    stages = detect_stages(curve)
+    if stages['steady'] is not None:
+        start, end = stages['steady']
+        duration = end - start + 1
+        plateau = [aggregate.windows[first_second + i] for i in range(start, end + 1)
+                   if first_second + i in aggregate.windows]
+    else:
+        duration = None
+        plateau = [aggregate.series]
+
+    merged = merge_by_kind(plateau, app_ids)
+    apps = {}
+    for app in app_ids:
+        latency, errors = merged['response_time'][app], merged['errors'][app]
+        if not latency.count:
+            continue
+        apps[app] = {
+            'requests': latency.count,
+            'rps': latency.count / duration if duration else None,
+            'p50': latency.quantile(0.50),
+            'p95': latency.quantile(0.95),
+            'p99': latency.quantile(0.99),
+            'error_rate_percent': (errors.sum / errors.count * 100) if errors.count else 0,
+        }
+    return {'lines': aggregate.lines, 'points': aggregate.points, 'steady_duration_s': duration, 'apps': apps}
+
+
+def flag_saturated_nodes(summaries):
+    """Add each node's share of an app's requests and mark nodes far slower than their peers"""
+    apps = {app for summary in summaries.values() for app in summary['apps']}
+    for app in apps:
+        per_node = {node: summary['apps'][app] for node, summary in summaries.items() if app in summary['apps']}
+        total = sum(stats['requests'] for stats in per_node.values())
+        for node, stats in per_node.items():
+            stats['share'] = stats['requests'] / total if total else None
+            others = [other['p99'] for other_node, other in per_node.items() if other_node != node]
+            stats['saturated'] = bool(others) and stats['p99'] > NODE_SATURATION_RATIO * statistics.median(others)
+
+
+def combine_nodes(k6_results, node_files, app_ids, endpoint_urls=None, offsets=None):
+    """Merge the ``<test>@<node>`` aggregates of every multi-generator test into one aggregate per test.
+
+    The first node (by name) is the reference clock: the other nodes are
+    estimated against its unshifted output and get its configured offset,
+    if any, added to theirs. Each merged aggregate keeps a per-node summary,
+    including the applied offset, in ``nodes``. Other entries pass through.
+    """
+    offsets = offsets or {}
+    owners = {node_key(test_name, node): test_name for test_name, files in node_files.items() for node in files}
+    results = {}
+    for key, aggregate in k6_results.items():
+        test_name = owners.get(key)
+        if test_name is None:
+            results[key] = aggregate
+        elif test_name not in results:
+            parts = {node: k6_results[node_key(test_name, node)] for node in node_files[test_name]
+                     if node_key(test_name, node) in k6_results}
+            results[test_name] = _merge_test(test_name, parts, app_ids, endpoint_urls, offsets)
+    return results
+
+
+def _merge_test(test_name, parts, app_ids, endpoint_urls, offsets):
+    combined = K6TestAggregate(test_name, app_ids, endpoint_urls)
+    reference_node = next(iter(parts), None)
+    reference_offset = offsets.get(reference_node, 0)
+    # Estimate every node against the reference's own clock before shifting anything: shifts are whole
+    # seconds, and the reference's rounding would otherwise leak into every other node's offset
+    for node, aggregate in parts.items():
+        summary = node_summary(aggregate, app_ids)
+        uncertainty = similarity = None
+        if node in offsets:
+            offset, source = offsets[node], 'configured'
+        elif node == reference_node:
+            offset, source = 0, 'reference'
+        else:
+            lag, uncertainty, similarity = estimate_offset(parts[reference_node], aggregate)
+            offset, source = reference_offset + lag, 'estimated'
+            if similarity is None or similarity < MIN_SKEW_SIMILARITY or abs(lag) > MAX_SKEW_S:
+                log_progress(f"  ⚠️ {test_name}: cannot estimate the clock offset of {node} "
+                             f"(estimate {offset:+.2f}s, similarity "
+                             f"{f'{similarity:.3f}' if similarity is not None else 'n/a'}); using 0s")
+                offset, uncertainty, source = 0, None, 'unaligned'
+            elif uncertainty > MAX_OFFSET_UNCERTAINTY_S:
+                log_progress(f"  ⚠️ {test_name}: clock offset of {node} is only known to ±{uncertainty:.1f}s; "
+                             f"set it in {NODE_OFFSETS_FILE} or with --node-offset {node}=SECONDS")
+
+        summary.update({'offset_s': offset, 'offset_uncertainty_s': uncertainty,
+                        'offset_shift_s': int(round(offset)), 'offset_source': source,
+                        'offset_similarity': similarity})
+        combined.nodes[node] = summary
+
+    for node, aggregate in parts.items():
+        summary = combined.nodes[node]
+        aggregate.shift_windows(summary['offset_shift_s'])
+        uncertainty = summary['offset_uncertainty_s']
+        precision = f" ±{uncertainty:.2f}s" if uncertainty is not None else ""
+        log_progress(f"  🛰️ {test_name}: node {node} offset {summary['offset_s']:+.2f}s{precision} "
+                     f"({summary['offset_source']}), windows moved {summary['offset_shift_s']:+d}s, "
+                     f"{aggregate.points:,} points")
+        combined.merge(aggregate)
+    flag_saturated_nodes(combined.nodes)
+    return combined
@@ -0,0 +1,302 @@
+"""Synthetic k6 output (NDJSON and CSV) with exact ground truth, for benchmarking the analyzer.
+
+Files mimic what ``k6 run --out json=... --out csv=...`` writes for the
+scripts in ``k6-scripts/``: metric declarations, built-in ``http_*`` points
+with request tags, and the per-app custom metrics (``go_response_time``,
+``csharp_ef_db_errors``, ``csharp_dapper_memory_operations``, ...) with the
+scenario tags k6 attaches to them. Load follows a ramp-up / steady /
+ramp-down profile. The exact values of every per-app series are kept so
+``ground-truth/<test>.json`` can hold exact counts, sums and quantiles.
+"""
+
+import json
+import re
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app_config import METRIC_KINDS
+
+# Metric infix used by each k6 script (see k6-scripts/*.js)
+TEST_SCOPES = {
+    'api-load-test': '',
+    'database-stress-test': 'db',
+    'memory-pressure-test': 'memory',
+}
+# Per-app latency model: lognormal (ms) median, shape and error probability
+APP_PROFILES = {
+    'go': (8.0, 0.55, 0.002),
+    'csharp_ef': (14.0, 0.65, 0.004),
+    'csharp_dapper': (10.0, 0.60, 0.003),
+}
+APP_PORTS = {'go': 8080, 'csharp_ef': 8081, 'csharp_dapper': 8082}
+ENDPOINTS = [
+    ('GET', '/users?limit=10', '200'),
+    ('GET', '/orders?limit=10', '200'),
+    ('POST', '/users', '201'),
+    ('POST', '/orders', '201'),
+    ('DELETE', '/users/{id}', '204'),
+]
+
+DEFAULT_DURATION_S = 420
+# Share of the test spent ramping up and ramping down
+RAMP_FRACTION = 0.15
+START_TIME = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+BATCH_REQUESTS = 50_000
+# Exact quantiles stored in the ground truth, with the rank convention of LatencyHistogram
+TRUTH_QUANTILES = (0.5, 0.95, 0.99, 0.999)
+
+CSV_COLUMNS = ("metric_name", "timestamp", "metric_value", "check", "error", "error_code", "expected_response",
+               "group", "extra_tags", "metadata", "method", "name", "proto", "scenario", "service", "status",
+               "subproto", "tls_version", "url")
+
+_SIZE_RE = re.compile(r'^\s*([0-9.]+)\s*([kmgt]?i?b?)\s*$', re.IGNORECASE)
+_SIZE_FACTORS = {'': 1, 'b': 1, 'k': 1e3, 'kb': 1e3, 'm': 1e6, 'mb': 1e6, 'g': 1e9, 'gb': 1e9, 't': 1e12, 'tb': 1e12,
+                 'kib': 2 ** 10, 'mib': 2 ** 20, 'gib': 2 ** 30, 'tib': 2 ** 40}
+
+
+def parse_byte_size(text):
+    """``10MB``, ``1.5GiB``, ``500k`` -> bytes"""
+    match = _SIZE_RE.match(text)
+    if match is None or match.group(2).lower() not in _SIZE_FACTORS:
+        raise ValueError(f"invalid size: {text!r}")
+    return int(float(match.group(1)) * _SIZE_FACTORS[match.group(2).lower()])
+
+
+def load_profile(duration_s):
+    """Relative request rate per second: linear ramp up, plateau, linear ramp down"""
+    seconds = np.arange(duration_s) + 0.5
+    ramp = max(1.0, duration_s * RAMP_FRACTION)
+    rate = np.minimum(1.0, np.minimum(seconds / ramp, (duration_s - seconds) / ramp))
+    return np.clip(rate, 0.02, 1.0)
+
+
+def expected_steady(duration_s, fraction):
+    """Inclusive ``(start, end)`` seconds where the load profile is at least ``fraction`` of its plateau"""
+    above = np.flatnonzero(load_profile(duration_s) >= fraction)
+    return int(above[0]), int(above[-1])
+
+
+def synthetic_load_curve(rate, duration_s=DEFAULT_DURATION_S, seed=1):
+    """Poisson requests per second following the load profile with a plateau of ``rate`` req/s"""
+    return np.random.default_rng(seed).poisson(rate * load_profile(duration_s)).tolist()
+
+
+def _metric_names(scope):
+    infix = f"{scope}_" if scope else ""
+    # api-load-test has no operations counters
+    kinds = METRIC_KINDS if scope else tuple(kind for kind in METRIC_KINDS if kind != 'operations')
+    return {(app, kind): f"{app}_{infix}{kind}" for app in APP_PROFILES for kind in kinds}
+
+
+def _declaration(name, metric_type, contains):
+    return json.dumps({"type": "Metric", "data": {"name": name, "type": metric_type, "contains": contains,
+                                                   "thresholds": [], "submetrics": None}, "metric": name},
+                      separators=(",", ":")) + "\n"
+
+
+def _csv_tags(**tags):
+    """The tag columns of a CSV row (everything after metric_value), newline included"""
+    return "," + ",".join(tags.get(column, "") for column in CSV_COLUMNS[3:]) + "\n"
+
+
+def _json_point(metric, time_text, value, tags):
+    return f'{{"metric":"{metric}","type":"Point","data":{{"time":"{time_text}","value":{value},"tags":{tags}}}}}\n'
+
+
+class _SeriesTruth:
+    """Exact values of the per-app series written so far"""
+
+    def __init__(self):
+        self.values = {}
+
+    def add(self, key, values):
+        self.values.setdefault(key, []).append(np.asarray(values, dtype=np.float64))
+
+    def summary(self):
+        series = {}
+        for (app, kind, scope), chunks in sorted(self.values.items()):
+            values = np.sort(np.concatenate(chunks))
+            ranks = [int(q * (values.size - 1)) for q in TRUTH_QUANTILES]
+            series[f"{app}|{kind}|{scope}"] = {
+                'count': int(values.size),
+                'sum': float(values.sum()),
+                'min': float(values[0]),
+                'max': float(values[-1]),
+                'quantiles': {str(q): float(values[rank]) for q, rank in zip(TRUTH_QUANTILES, ranks)},
+            }
+        return series
+
+
+def _bytes_per_request(scope):
+    """Approximate JSON bytes per simulated request, used to size a run before generating it"""
+    time_text = "2025-01-01T12:00:00.000000+00:00"
+    tags = json.dumps({"expected_response": "true", "group": "", "method": "GET",
+                       "name": "http://localhost:8080/api/v1/users?limit=10", "proto": "HTTP/1.1",
+                       "scenario": "default", "status": "200", "url": "http://localhost:8080/api/v1/users?limit=10"},
+                      separators=(",", ":"))
+    http_lines = 3 * len(_json_point("http_req_duration", time_text, 12.345678, tags))
+    custom_line = len(_json_point(f"csharp_ef_{scope}_response_time", time_text, 12.345678,
+                                  '{"group":"","scenario":"default"}'))
+    return http_lines + (3 if scope else 2) * custom_line
+
+
+def generate_test(json_path, csv_path, test_name, target_bytes, duration_s=DEFAULT_DURATION_S, seed=1):
+    """Write one test's k6 JSON (and CSV when ``csv_path`` is set); return its ground truth dict"""
+    scope = TEST_SCOPES[test_name]
+    rng = np.random.default_rng(seed)
+    names = _metric_names(scope)
+    apps = list(APP_PROFILES)
+    truth = _SeriesTruth()
+    endpoint_counts = {}
+
+    total_requests = max(1, int(target_bytes / _bytes_per_request(scope)))
+    profile = load_profile(duration_s)
+    per_second = rng.multinomial(total_requests, profile / profile.sum())
+
+    second_prefix = [(START_TIME + timedelta(seconds=s)).strftime('%Y-%m-%dT%H:%M:%S') for s in range(duration_s)]
+    start_epoch = int(START_TIME.timestamp())
+    request_tags = {}
+    for app in apps:
+        for method, path, status in ENDPOINTS:
+            url = f"http://localhost:{APP_PORTS[app]}/api/v1{path}"
+            for failed in (False, True):
+                code = '500' if failed else status
+                request_tags[(app, path, failed)] = (
+                    json.dumps({"expected_response": "false" if failed else "true", "group": "", "method": method,
+                                "name": url, "proto": "HTTP/1.1", "scenario": "default", "status": code,
+                                "url": url}, separators=(",", ":")),
+                    _csv_tags(expected_response="false" if failed else "true", method=method, name=url,
+                              proto="HTTP/1.1", scenario="default", status=code, url=url))
+    custom_tags = '{"group":"","scenario":"default"}'
+    custom_csv = _csv_tags(scenario="default")
+
+    json_file = open(json_path, 'w')
+    csv_file = open(csv_path, 'w') if csv_path else None
+    try:
+        json_file.write(_declaration('http_reqs', 'counter', 'default'))
+        json_file.write(_declaration('http_req_duration', 'trend', 'time'))
+        json_file.write(_declaration('http_req_failed', 'rate', 'default'))
+        json_file.write(_declaration('vus', 'gauge', 'default'))
+        for (app, kind), name in names.items():
+            metric_type = {'response_time': 'trend', 'errors': 'rate', 'operations': 'counter'}[kind]
+            json_file.write(_declaration(name, metric_type, 'time' if kind == 'response_time' else 'default'))
+        if csv_file:
+            csv_file.write(",".join(CSV_COLUMNS) + "\n")
+
+        # Requests are generated in batches of whole seconds so timestamps stay ordered
+        second = 0
+        while second < duration_s:
+            batch_end = second
+            batch = 0
+            while batch_end < duration_s and (batch == 0 or batch + per_second[batch_end] <= BATCH_REQUESTS):
+                batch += per_second[batch_end]
+                batch_end += 1
+            seconds = np.repeat(np.arange(second, batch_end), per_second[second:batch_end])
+            micros = rng.integers(0, 1_000_000, size=seconds.size)
+            order = np.lexsort((micros, seconds))
+            seconds, micros = seconds[order], micros[order]
+
+            app_index = rng.integers(0, len(apps), size=seconds.size)
+            endpoint_index = rng.integers(0, len(ENDPOINTS), size=seconds.size)
+            # Latency rises a little with load, as on a real saturated server
+            load = profile[seconds]
+            medians = np.array([APP_PROFILES[app][0] for app in apps])[app_index] * (1 + 0.5 * load)
+            shapes = np.array([APP_PROFILES[app][1] for app in apps])[app_index]
+            latency = np.round(medians * np.exp(shapes * rng.standard_normal(seconds.size)), 6)
+            failed = rng.random(seconds.size) < np.array([APP_PROFILES[app][2] for app in apps])[app_index]
+
+            for a, app in enumerate(apps):
+                mask = app_index == a
+                truth.add((app, 'response_time', scope), latency[mask])
+                truth.add((app, 'errors', scope), failed[mask].astype(np.float64))
+                if scope:
+                    truth.add((app, 'operations', scope), np.ones(int(mask.sum())))
+
+            lines = []
+            csv_lines = []
+            for s, us, a, e, value, fail in zip(seconds.tolist(), micros.tolist(), app_index.tolist(),
+                                                endpoint_index.tolist(), latency.tolist(), failed.tolist()):
+                app = apps[a]
+                time_text = f"{second_prefix[s]}.{us:06d}+00:00"
+                method, path, status = ENDPOINTS[e]
+                tags, csv_tags = request_tags[(app, path, fail)]
+                if '{id}' in path:
+                    # Every deleted user has its own URL, as in api-load-test.js
+                    user_id = str(s * 1_000_000 + us)
+                    tags, csv_tags = tags.replace('{id}', user_id), csv_tags.replace('{id}', user_id)
+                endpoint = f"{app}|{method}|/{path.split('?')[0].lstrip('/')}|{'500' if fail else status}"
+                endpoint_counts[endpoint] = endpoint_counts.get(endpoint, 0) + 1
+                error_value = 1 if fail else 0
+                lines.append(_json_point('http_reqs', time_text, 1, tags))
+                lines.append(_json_point('http_req_duration', time_text, value, tags))
+                lines.append(_json_point('http_req_failed', time_text, error_value, tags))
+                lines.append(_json_point(names[(app, 'response_time')], time_text, value, custom_tags))
+                lines.append(_json_point(names[(app, 'errors')], time_text, error_value, custom_tags))
+                if scope:
+                    lines.append(_json_point(names[(app, 'operations')], time_text, 1, custom_tags))
+                if csv_file:
+                    epoch = start_epoch + s
+                    csv_lines.append(f"http_reqs,{epoch},1{csv_tags}")
+                    csv_lines.append(f"http_req_duration,{epoch},{value}{csv_tags}")
+                    csv_lines.append(f"http_req_failed,{epoch},{error_value}{csv_tags}")
+                    csv_lines.append(f"{names[(app, 'response_time')]},{epoch},{value}{custom_csv}")
+                    csv_lines.append(f"{names[(app, 'errors')]},{epoch},{error_value}{custom_csv}")
+                    if scope:
+                        csv_lines.append(f"{names[(app, 'operations')]},{epoch},1{custom_csv}")
+
+            for s in range(second, batch_end):
+                lines.append(_json_point('vus', f"{second_prefix[s]}.999999+00:00",
+                                         int(round(profile[s] * 100)), '{}'))
+            json_file.write("".join(lines))
+            if csv_file:
+                csv_file.write("".join(csv_lines))
+            second = batch_end
+    finally:
+        json_file.close()
+        if csv_file:
+            csv_file.close()
+
+    return {
+        'test': test_name,
+        'requests': int(total_requests),
+        'duration_s': duration_s,
+        'start_epoch': start_epoch,
+        'json_bytes': json_path.stat().st_size,
+        'csv_bytes': csv_path.stat().st_size if csv_path else None,
+        'series': truth.summary(),
+        # Requests per "app|method|endpoint template|status"
+        'endpoints': dict(sorted(endpoint_counts.items())),
+    }
+
+
+def generate_session(session_dir, target_bytes, tests=tuple(TEST_SCOPES), duration_s=DEFAULT_DURATION_S,
+                     with_csv=True, seed=1):
+    """Write ``<session>/k6-results/<test>.json|.csv`` and ``<session>/ground-truth/<test>.json``.
+
+    ``target_bytes`` is the approximate JSON size per test.
+    """
+    k6_dir = session_dir / "k6-results"
+    truth_dir = session_dir / "ground-truth"
+    k6_dir.mkdir(parents=True, exist_ok=True)
+    truth_dir.mkdir(parents=True, exist_ok=True)
+
+    truths = {}
+    for offset, test_name in enumerate(tests):
+        csv_path = k6_dir / f"{test_name}.csv" if with_csv else None
+        truth = generate_test(k6_dir / f"{test_name}.json", csv_path, test_name, target_bytes, duration_s,
+                              seed + offset)
+        with open(truth_dir / f"{test_name}.json", 'w') as f:
+            json.dump(truth, f, indent=2)
+        truths[test_name] = truth
+    return truths
+
+
+def load_ground_truth(session_dir):
+    """``{test: truth}`` as written by generate_session"""
+    truths = {}
+    for truth_file in sorted((session_dir / "ground-truth").glob("*.json")):
+        with open(truth_file) as f:
+            truth = json.load(f)
+        truths[truth['test']] = truth
+    return truths
@@ -0,0 +1,141 @@
+"""Stage timing, throughput and memory instrumentation for the analysis pipeline.
+
+Every stage records wall and CPU time (including worker processes), its
+peak resident set size and, when the stage reports them, lines and points
+per second. With profiling enabled each stage also runs under cProfile and
+the stats of the slowest stage are saved for ``pstats``/snakeviz.
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+PROFILE_FILE_NAME = "analysis_profile.json"
+PSTATS_TOP_FUNCTIONS = 40
+
+
+def _kib_to_mb(kib):
+    return kib / 1024
+
+
+def max_rss_mb(who):
+    """Lifetime peak RSS of this process (RUSAGE_SELF) or of its largest waited-for child (RUSAGE_CHILDREN)"""
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    maxrss = resource.getrusage(who).ru_maxrss
+    return maxrss / (1024 * 1024) if sys.platform == 'darwin' else _kib_to_mb(maxrss)
+
+
+def _reset_peak_rss():
+    """Reset the kernel's peak RSS counter for this process (Linux >= 4.0); False when unsupported"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb():
+    """Peak RSS since the last reset (VmHWM), or the lifetime peak when /proc is unavailable"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return _kib_to_mb(int(line.split()[1]))
+    except OSError:
+        pass
+    return max_rss_mb(resource.RUSAGE_SELF)
+
+
+def _children_cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class PipelineProfile:
+    """Collects one record per pipeline stage; see ``stage``"""
+
+    def __init__(self, profile=False, imports_started=None):
+        self.profile = profile
+        self.stages = []
+        self._profilers = {}
+        self.started = time.perf_counter()
+        # Module load time of the calling script, when it noted perf_counter() before its imports
+        self.startup_s = self.started - imports_started if imports_started is not None else None
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as stage ``name``.
+
+        Yields the stage record; set ``record['lines']`` / ``record['points']``
+        inside the block to get per-second rates.
+        """
+        record = {'stage': name}
+        per_stage_peak = _reset_peak_rss()
+        profiler = cProfile.Profile() if self.profile else None
+        children_cpu = _children_cpu_seconds()
+        cpu = time.process_time()
+        wall = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler:
+                profiler.disable()
+                self._profilers[name] = profiler
+            wall = time.perf_counter() - wall
+            record['wall_s'] = wall
+            record['cpu_s'] = time.process_time() - cpu
+            record['workers_cpu_s'] = _children_cpu_seconds() - children_cpu
+            record['peak_rss_mb'] = _peak_rss_mb()
+            record['peak_rss_scope'] = 'stage' if per_stage_peak else 'process'
+            record['workers_peak_rss_mb'] = max_rss_mb(resource.RUSAGE_CHILDREN)
+            for counter in ('lines', 'points'):
+                if counter in record:
+                    record[f'{counter}_per_s'] = record[counter] / wall if wall > 0 else None
+            self.stages.append(record)
+
+    def hottest_stage(self):
+        return max(self.stages, key=lambda record: record['wall_s'])['stage'] if self.stages else None
+
+    def write(self, output_dir):
+        """Write analysis_profile.json (and the hottest stage's pstats when profiling); return the JSON path"""
+        output_dir = Path(output_dir)
+        summary = {
+            'total_wall_s': time.perf_counter() - self.started,
+            'startup_s': self.startup_s,
+            'peak_rss_mb': max_rss_mb(resource.RUSAGE_SELF),
+            'hottest_stage': self.hottest_stage(),
+            'stages': self.stages,
+        }
+
+        hottest = summary['hottest_stage']
+        if self.profile and hottest in self._profilers:
+            pstats_file = output_dir / f"analysis_profile_{hottest}.pstats"
+            self._profilers[hottest].dump_stats(str(pstats_file))
+            text = io.StringIO()
+            pstats.Stats(str(pstats_file), stream=text).sort_stats('cumulative').print_stats(PSTATS_TOP_FUNCTIONS)
+            pstats_file.with_suffix('.txt').write_text(text.getvalue())
+            summary['pstats_file'] = pstats_file.name
+
+        profile_file = output_dir / PROFILE_FILE_NAME
+        with open(profile_file, 'w') as f:
+            json.dump(summary, f, indent=2)
+        return profile_file
+
+    def summary_lines(self):
+        """One human-readable line per stage"""
+        lines = []
+        for record in self.stages:
+            rates = ", ".join(f"{record[f'{counter}_per_s']:,.0f} {counter}/s" for counter in ('lines', 'points')
+                              if record.get(f'{counter}_per_s'))
+            lines.append(f"  {record['stage']:<28} {record['wall_s']:8.2f}s wall  {record['cpu_s']:8.2f}s cpu  "
+                         f"{record['peak_rss_mb']:8.1f} MB peak" + (f"  ({rates})" if rates else ""))
+        return lines
@@ -0,0 +1,313 @@
+"""Prometheus text-format parsing and snapshot time series for the app /metrics dumps.
+
+``collect-metrics.sh`` saves ``<test>_<app>_metrics_<YYYYmmdd_HHMMSS>.txt``
+every 15 seconds. Each file is parsed into labeled samples, histograms are
+rebuilt from their ``_bucket`` series, and consecutive snapshots of a test
+are turned into per-interval counter rates and latency quantiles.
+"""
+
+import math
+import re
+
+from common import file_stamp_to_epoch
+
+_SAMPLE_RE = re.compile(r'([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)(?:\s+(-?\d+))?\s*$')
+_LABEL_RE = re.compile(r'\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*=\s*"((?:[^"\\]|\\.)*)"\s*,?')
+_ESCAPE_RE = re.compile(r'\\(.)')
+_SNAPSHOT_RE = re.compile(r'(?P<test>.+)_(?P<app>[a-z]+)_metrics_(?P<stamp>\d{8}_\d{6})$')
+
+QUANTILES = (0.50, 0.95, 0.99)
+
+# Parsed label sets, shared across snapshots (label strings repeat in every dump)
+_label_cache = {}
+_bound_cache = {}
+
+
+def parse_labels(raw):
+    """Parse ``a="x",b="y"`` into a sorted tuple of ``(name, value)`` pairs"""
+    labels = _label_cache.get(raw)
+    if labels is None:
+        pairs = []
+        for name, value in _LABEL_RE.findall(raw):
+            if '\\' in value:
+                value = _ESCAPE_RE.sub(lambda m: '\n' if m.group(1) == 'n' else m.group(1), value)
+            pairs.append((name, value))
+        labels = _label_cache[raw] = tuple(sorted(pairs))
+    return labels
+
+
+def _upper_bound(labels):
+    """``le`` label of a histogram bucket as a float, or None"""
+    upper = _bound_cache.get(labels, False)
+    if upper is False:
+        le = dict(labels).get('le')
+        try:
+            upper = float(le) if le is not None else None
+        except ValueError:
+            upper = None
+        _bound_cache[labels] = upper
+    return upper
+
+
+def parse_exposition(text):
+    """Parse Prometheus text exposition into ``(samples, types)``.
+
+    ``samples`` maps ``(metric_name, labels)`` to a float value, where
+    ``labels`` is a sorted tuple of pairs; sample timestamps are ignored in
+    favour of the snapshot time. ``types`` maps metric family to its
+    ``# TYPE`` (counter, gauge, histogram, summary, untyped).
+    """
+    samples = {}
+    types = {}
+    for line in text.splitlines():
+        if not line or line.isspace():
+            continue
+        if line[0] == '#':
+            parts = line.split(None, 3)
+            if len(parts) >= 4 and parts[1] == 'TYPE':
+                types[parts[2]] = parts[3].strip()
+            continue
+
+        brace = line.find('{')
+        if brace < 0:
+            # Unlabeled sample: "name value [timestamp]"
+            parts = line.split()
+            if len(parts) < 2:
+                continue
+            name, labels, raw_value = parts[0], (), parts[1]
+        else:
+            close = line.rfind('}')
+            parts = line[close + 1:].split()
+            if close < brace or not parts:
+                match = _SAMPLE_RE.match(line)
+                if match is None:
+                    continue
+                name, raw_labels, raw_value, _timestamp = match.groups()
+                labels = parse_labels(raw_labels) if raw_labels else ()
+            else:
+                name, labels, raw_value = line[:brace].strip(), parse_labels(line[brace + 1:close]), parts[0]
+
+        try:
+            samples[(name, labels)] = float(raw_value)
+        except ValueError:
+            continue
+
+    return samples, types
+
+
+class PrometheusSnapshot:
+    """One scrape of an application's /metrics endpoint"""
+
+    __slots__ = ('timestamp', 'samples', 'types')
+
+    def __init__(self, timestamp, samples, types):
+        self.timestamp = timestamp
+        self.samples = samples
+        self.types = types
+
+    def family_type(self, name):
+        """Declared type of the family a sample belongs to (``untyped`` if unknown)"""
+        if name in self.types:
+            return self.types[name]
+        for suffix in ('_bucket', '_sum', '_count', '_total'):
+            if name.endswith(suffix) and name[:-len(suffix)] in self.types:
+                return self.types[name[:-len(suffix)]]
+        return 'counter' if name.endswith('_total') else 'untyped'
+
+    def counter_series(self, is_counter=None):
+        """Value of every labeled counter sample, keyed like ``samples``.
+
+        ``is_counter`` caches name classification and can be shared across
+        snapshots of the same app, whose families do not change between scrapes.
+        """
+        series = {}
+        if is_counter is None:
+            is_counter = {}
+        for key, value in self.samples.items():
+            name = key[0]
+            counter = is_counter.get(name)
+            if counter is None:
+                counter = is_counter[name] = self.family_type(name) == 'counter'
+            if counter:
+                series[key] = value
+        return series
+
+    def histograms(self):
+        """Every histogram family as ``{family: {bucket labels: cumulative count}}``, one entry per bucket series"""
+        families = {}
+        for (name, labels), value in self.samples.items():
+            if not name.endswith('_bucket'):
+                continue
+            family = name[:-len('_bucket')]
+            if self.types.get(family, 'histogram') != 'histogram':
+                continue
+            if _upper_bound(labels) is None:
+                continue
+            families.setdefault(family, {})[labels] = value
+        return families
+
+
+def parse_snapshot_file(file_path, timestamp):
+    with open(file_path, 'r') as f:
+        samples, types = parse_exposition(f.read())
+    return PrometheusSnapshot(timestamp, samples, types)
+
+
+def snapshot_time(file_path):
+    """Epoch time encoded in a snapshot file name (the collector stamps UTC)"""
+    match = _SNAPSHOT_RE.match(file_path.stem)
+    if match is None:
+        return file_path.stat().st_mtime
+    return file_stamp_to_epoch(match.group('stamp'))
+
+
+def snapshot_pattern(metrics_names=None):
+    """Snapshot file name pattern; with the collector's ``metrics_names`` an app name may contain ``_``"""
+    if not metrics_names:
+        return _SNAPSHOT_RE
+    # The shortest test prefix wins, so csharp_dapper is never read as test <test>_csharp, app dapper
+    names = '|'.join(re.escape(name) for name in sorted(metrics_names, key=len, reverse=True))
+    return re.compile(rf'(?P<test>.+?)_(?P<app>{names})_metrics_(?P<stamp>\d{{8}}_\d{{6}})$')
+
+
+def group_snapshot_files(metrics_dir, metrics_names=None):
+    """Map ``(test, app)`` to that app's snapshot files in time order"""
+    pattern = snapshot_pattern(metrics_names)
+    groups = {}
+    for file_path in metrics_dir.glob("*_metrics_*.txt"):
+        match = pattern.match(file_path.stem)
+        if match is None:
+            continue
+        groups.setdefault((match.group('test'), match.group('app')), []).append(file_path)
+    for files in groups.values():
+        files.sort(key=lambda file_path: file_path.stem)
+    return groups
+
+
+def histogram_quantile(q, buckets):
+    """Quantile from ``{le: cumulative count}`` with Prometheus' linear interpolation"""
+    bounds = sorted(buckets)
+    if not bounds:
+        return None
+    total = buckets[bounds[-1]]
+    if total <= 0:
+        return None
+
+    rank = q * total
+    previous_bound = 0.0
+    previous_count = 0.0
+    for bound in bounds:
+        count = buckets[bound]
+        if count >= rank:
+            if math.isinf(bound):
+                return previous_bound
+            in_bucket = count - previous_count
+            if in_bucket <= 0:
+                return bound
+            return previous_bound + (bound - previous_bound) * (rank - previous_count) / in_bucket
+        previous_bound, previous_count = bound, count
+    return previous_bound
+
+
+def _delta(current, previous):
+    """Counter increase between two samples, treating a drop as a process restart.
+
+    A series without a previous sample has no known increase yet; its
+    cumulative value covers the process lifetime, not the interval.
+    """
+    if previous is None:
+        return 0.0
+    return current - previous if current >= previous else current
+
+
+def _counter_increases(current, previous):
+    """Per-family counter increase between two snapshots, taken series by series and summed over labels"""
+    increases = {}
+    for key, value in current.items():
+        increases[key[0]] = increases.get(key[0], 0.0) + _delta(value, previous.get(key))
+    return increases
+
+
+def _histogram_delta(current, previous):
+    """``{le: count}`` observed between two snapshots of a family, taken bucket series by bucket series"""
+    previous = previous or {}
+    buckets = {}
+    for labels, count in current.items():
+        le = _upper_bound(labels)
+        buckets[le] = buckets.get(le, 0.0) + _delta(count, previous.get(labels))
+    return buckets
+
+
+def _cumulative_buckets(series):
+    """``{le: cumulative count}`` of a family, summed over labels"""
+    buckets = {}
+    for labels, count in series.items():
+        le = _upper_bound(labels)
+        buckets[le] = buckets.get(le, 0.0) + count
+    return buckets
+
+
+def _quantiles(buckets, scale):
+    values = {}
+    for q in QUANTILES:
+        value = histogram_quantile(q, buckets)
+        values[f"p{round(q * 100)}"] = value * scale if value is not None else None
+    return values
+
+
+def _unit_scale(family):
+    # Report second-based histograms in milliseconds, like the k6 figures
+    return 1000.0 if family.endswith('_seconds') else 1.0
+
+
+def analyze_snapshots(snapshots):
+    """Per-interval counter rates and histogram quantiles for one app during one test.
+
+    Returns ``intervals`` (one entry per pair of consecutive snapshots) and a
+    ``summary`` covering first to last snapshot.
+    """
+    is_counter = {}
+    counters = [snapshot.counter_series(is_counter) for snapshot in snapshots]
+    histograms = [snapshot.histograms() for snapshot in snapshots]
+
+    intervals = []
+    for i in range(1, len(snapshots)):
+        elapsed = snapshots[i].timestamp - snapshots[i - 1].timestamp
+        if elapsed <= 0:
+            continue
+        intervals.append({
+            'start': snapshots[i - 1].timestamp,
+            'end': snapshots[i].timestamp,
+            'counter_rates': {name: increase / elapsed
+                              for name, increase in _counter_increases(counters[i], counters[i - 1]).items()},
+            'latency': {family: _quantiles(_histogram_delta(series, histograms[i - 1].get(family)),
+                                           _unit_scale(family))
+                        for family, series in histograms[i].items()},
+        })
+
+    summary = {'snapshots': len(snapshots), 'duration_s': 0, 'counter_rates': {}, 'latency': {}, 'latest': {}}
+    if snapshots:
+        first, last = snapshots[0], snapshots[-1]
+        summary['latest'] = last.samples
+        elapsed = last.timestamp - first.timestamp
+        summary['duration_s'] = elapsed
+        if elapsed > 0:
+            # Sum per-interval increases so restarts between scrapes are not lost
+            for interval in intervals:
+                span = interval['end'] - interval['start']
+                for name, rate in interval['counter_rates'].items():
+                    summary['counter_rates'][name] = summary['counter_rates'].get(name, 0.0) + rate * span
+            summary['counter_rates'] = {name: total / elapsed for name, total in summary['counter_rates'].items()}
+
+        total_buckets = {}
+        for i in range(1, len(histograms)):
+            for family, series in histograms[i].items():
+                target = total_buckets.setdefault(family, {})
+                for le, count in _histogram_delta(series, histograms[i - 1].get(family)).items():
+                    target[le] = target.get(le, 0.0) + count
+        if len(histograms) == 1:
+            total_buckets = {family: _cumulative_buckets(series) for family, series in histograms[0].items()}
+        summary['latency'] = {family: _quantiles(buckets, _unit_scale(family))
+                              for family, buckets in total_buckets.items()}
+
+    return {'intervals': intervals, 'summary': summary}
@@ -0,0 +1,163 @@
+"""SQLite index of aggregated results across benchmark sessions, and regression checks.
+
+Each analyzed session stores one row per ``(test, app, metric)`` so new
+metrics need no schema change. Sessions are ordered by the start of their
+k6 data, which lets a session be compared with the rolling median of the
+runs that preceded it.
+"""
+
+import os
+import sqlite3
+import statistics
+import time
+from pathlib import Path
+
+INDEX_FILE_NAME = "benchmark_index.sqlite"
+INDEX_ENV = "BENCHMARK_RESULTS_INDEX"
+# <repo>/results, where run-benchmarks.sh keeps the sessions (/results inside the analysis image)
+DEFAULT_RESULTS_DIR = Path(__file__).resolve().parent.parent.parent / "results"
+SCHEMA_VERSION = 1
+
+# Metrics checked by default: for latency higher is worse, for throughput lower is worse
+REGRESSION_METRICS = {'p95': 'higher', 'p99': 'higher', 'rps': 'lower'}
+DEFAULT_THRESHOLD_PERCENT = 10.0
+DEFAULT_ROLLING_WINDOW = 5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session TEXT PRIMARY KEY,
+    started_at REAL NOT NULL,
+    recorded_at REAL NOT NULL,
+    results_dir TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stats (
+    session TEXT NOT NULL REFERENCES sessions(session) ON DELETE CASCADE,
+    test TEXT NOT NULL,
+    app TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (session, test, app, metric)
+);
+CREATE INDEX IF NOT EXISTS stats_by_key ON stats (test, app, metric);
+"""
+
+
+def default_index_file(results_dir=None):
+    """$BENCHMARK_RESULTS_INDEX, or benchmark_index.sqlite next to the session directories.
+
+    Without a session directory the index of DEFAULT_RESULTS_DIR is used.
+    """
+    configured = os.environ.get(INDEX_ENV)
+    if configured:
+        return Path(configured)
+    if results_dir is None:
+        return DEFAULT_RESULTS_DIR / INDEX_FILE_NAME
+    return Path(results_dir).resolve().parent / INDEX_FILE_NAME
+
+
+def connect(index_file):
+    conn = sqlite3.connect(str(index_file))
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(_SCHEMA)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return conn
+
+
+def session_rows(response_times, throughput, efficiency):
+    """Flatten the analysis results into ``(test, app, metric, value)`` rows"""
+    rows = []
+    for test_name, per_app in response_times.items():
+        for app, stats in per_app.items():
+            if 'error' in stats:
+                continue
+            for metric in ('count', 'mean', 'median', 'p95', 'p99', 'p999', 'min', 'max'):
+                rows.append((test_name, app, metric, stats[metric]))
+
+    for test_name, per_app in throughput.items():
+        for app, stats in per_app.items():
+            for metric in ('rps', 'ops_per_sec', 'error_rate_percent', 'requests', 'errors'):
+                rows.append((test_name, app, metric, stats[metric]))
+
+    for test_name, per_app in efficiency.items():
+        for app, stats in per_app.items():
+            for metric in ('cpu_cores', 'memory_mb', 'requests_per_cpu_second', 'mb_per_1k_rps',
+                           'network_bytes_per_request'):
+                if stats[metric] is not None:
+                    rows.append((test_name, app, metric, stats[metric]))
+
+    return [(test, app, metric, float(value)) for test, app, metric, value in rows if value is not None]
+
+
+def record_session(index_file, session, results_dir, started_at, rows):
+    """Store (or replace) one session's rows"""
+    conn = connect(index_file)
+    try:
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE session = ?", (session,))
+            conn.execute("INSERT INTO sessions (session, started_at, recorded_at, results_dir) VALUES (?, ?, ?, ?)",
+                         (session, started_at, time.time(), str(results_dir)))
+            conn.executemany("INSERT INTO stats (session, test, app, metric, value) VALUES (?, ?, ?, ?, ?)",
+                             [(session, *row) for row in rows])
+    finally:
+        conn.close()
+
+
+def list_sessions(conn):
+    """Indexed sessions as ``[(session, started_at)]``, oldest first"""
+    return conn.execute("SELECT session, started_at FROM sessions ORDER BY started_at, session").fetchall()
+
+
+def session_stats(conn, session):
+    """``{(test, app, metric): value}`` for one session"""
+    rows = conn.execute("SELECT test, app, metric, value FROM stats WHERE session = ?", (session,))
+    return {(test, app, metric): value for test, app, metric, value in rows}
+
+
+def rolling_baseline(conn, session, window=DEFAULT_ROLLING_WINDOW):
+    """Per-key median over the ``window`` sessions that started before ``session``.
+
+    Returns ``(stats, sessions_used)``.
+    """
+    started = conn.execute("SELECT started_at FROM sessions WHERE session = ?", (session,)).fetchone()
+    if started is None:
+        return {}, []
+
+    previous = [name for (name,) in conn.execute(
+        "SELECT session FROM sessions WHERE started_at < ? AND session != ? ORDER BY started_at DESC LIMIT ?",
+        (started[0], session, window))]
+    if not previous:
+        return {}, []
+
+    placeholders = ",".join("?" * len(previous))
+    values = {}
+    for test, app, metric, value in conn.execute(
+            f"SELECT test, app, metric, value FROM stats WHERE session IN ({placeholders})", previous):
+        values.setdefault((test, app, metric), []).append(value)
+    return {key: statistics.median(samples) for key, samples in values.items()}, previous
+
+
+def find_regressions(current, baseline, metrics=REGRESSION_METRICS, threshold_percent=DEFAULT_THRESHOLD_PERCENT):
+    """Compare two ``{(test, app, metric): value}`` dicts.
+
+    Returns one entry per compared key with the relative change and whether
+    it is a regression (worse than the baseline by more than the threshold).
+    """
+    results = []
+    for (test, app, metric), value in sorted(current.items()):
+        direction = metrics.get(metric)
+        base = baseline.get((test, app, metric))
+        if direction is None or base is None:
+            continue
+
+        change = (value - base) / base * 100 if base else 0.0
+        worse = change if direction == 'higher' else -change
+        results.append({
+            'test': test,
+            'app': app,
+            'metric': metric,
+            'baseline': base,
+            'current': value,
+            'change_percent': change,
+            'regression': worse > threshold_percent,
+        })
+    return results
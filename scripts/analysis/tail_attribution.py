@@ -0,0 +1,158 @@
+"""Attribution of k6 tail-latency windows to the server-side signals sampled at the same time.
+
+The per-second k6 windows of an app are ranked by p99 and the slowest
+TAIL_WINDOW_FRACTION of them are its outliers. Every server-side signal (a
+gauge or the GC time rate of the app's /metrics snapshots, or the CPU and
+memory of its container from docker stats) is a series of ``(time, value)``
+samples, and every k6 second takes the value of the nearest sample through
+one sorted as-of merge per signal. A signal spikes with the tail when its
+mean over the outlier seconds is well above its mean over the other seconds.
+"""
+
+import numpy as np
+
+# Share of an app's seconds, slowest p99 first, treated as the tail
+TAIL_WINDOW_FRACTION = 0.05
+# Seconds with fewer requests have no meaningful p99
+MIN_WINDOW_REQUESTS = 5
+# collect-metrics.sh samples every 15 seconds; farther samples say nothing about a second
+ASOF_TOLERANCE_S = 15
+# A spike is an outlier mean both SPIKE_LIFT times and SPIKE_SIGMA deviations above the baseline
+SPIKE_LIFT = 1.2
+SPIKE_SIGMA = 1.0
+# Slowest seconds listed per app
+SLOWEST_WINDOWS_LIMIT = 5
+
+# Gauges of the Go and C# apps' /metrics (database_connections is Go's, *_active is C#'s)
+GAUGE_SIGNALS = ('benchmark_goroutines_active', 'benchmark_threads_active', 'database_connections',
+                 'database_connections_active', 'http_active_connections')
+# Histogram or summary families whose _sum is seconds spent in GC
+GC_SIGNALS = ('benchmark_gc_duration_seconds', 'go_gc_duration_seconds')
+DOCKER_SIGNALS = ('cpu_percent', 'memory_bytes')
+
+
+def _signal_name(name, labels):
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{label}="{value}"' for label, value in labels) + "}"
+
+
+def prometheus_signals(snapshots):
+    """``{signal: (times, values)}`` of the gauges and GC time rates in one app's /metrics snapshots.
+
+    Each labeled gauge series is its own signal. A GC signal is the GC
+    seconds per second of each interval between consecutive snapshots,
+    placed at the interval midpoint.
+    """
+    series = {}
+    for snapshot in snapshots:
+        for (name, labels), value in snapshot.samples.items():
+            if name in GAUGE_SIGNALS:
+                times, values = series.setdefault(_signal_name(name, labels), ([], []))
+                times.append(snapshot.timestamp)
+                values.append(value)
+
+    for family in GC_SIGNALS:
+        sum_name = f"{family}_sum"
+        totals = [(snapshot.timestamp, sum(value for (name, _labels), value in snapshot.samples.items()
+                                           if name == sum_name))
+                  for snapshot in snapshots
+                  if any(name == sum_name for name, _labels in snapshot.samples)]
+        times, values = [], []
+        for (start, previous), (end, current) in zip(totals, totals[1:]):
+            if end <= start:
+                continue
+            # A drop means the process restarted and its counter began again from zero
+            spent = current - previous if current >= previous else current
+            times.append((start + end) / 2)
+            values.append(spent / (end - start))
+        if times:
+            series[f"{family} (s/s)"] = (times, values)
+
+    return {name: (np.asarray(times, dtype=np.float64), np.asarray(values, dtype=np.float64))
+            for name, (times, values) in series.items()}
+
+
+def docker_signals(samples):
+    """``{signal: (times, values)}`` of one container's docker stats samples"""
+    times = np.asarray([sample['timestamp'] for sample in samples], dtype=np.float64)
+    return {f"container {field}": (times, np.asarray([sample[field] for sample in samples], dtype=np.float64))
+            for field in DOCKER_SIGNALS}
+
+
+def asof_nearest(sample_times, sample_values, times, tolerance=ASOF_TOLERANCE_S):
+    """Value of the sample nearest to each of ``times`` (sorted as-of merge), NaN beyond ``tolerance``"""
+    matched = np.full(times.shape, np.nan)
+    if not sample_times.size:
+        return matched
+    order = np.argsort(sample_times, kind='stable')
+    sample_times, sample_values = sample_times[order], sample_values[order]
+
+    right = np.clip(np.searchsorted(sample_times, times), 0, sample_times.size - 1)
+    left = np.clip(right - 1, 0, sample_times.size - 1)
+    nearest = np.where(np.abs(sample_times[left] - times) <= np.abs(sample_times[right] - times), left, right)
+    close = np.abs(sample_times[nearest] - times) <= tolerance
+    matched[close] = sample_values[nearest[close]]
+    return matched
+
+
+def tail_windows(windows, app, fraction=TAIL_WINDOW_FRACTION, min_requests=MIN_WINDOW_REQUESTS):
+    """``(rows, outliers)``: one app's per-second rows with enough requests and a mask of the slowest ones"""
+    rows = [row for row in windows if row['app'] == app and row['rps'] >= min_requests]
+    if not rows:
+        return rows, np.zeros(0, dtype=bool)
+    p99 = np.asarray([row['p99'] for row in rows])
+    tail_count = max(1, int(round(fraction * len(rows))))
+    threshold = np.sort(p99)[-tail_count]
+    return rows, p99 >= threshold
+
+
+def attribute_tail(windows, app, signals, tolerance=ASOF_TOLERANCE_S):
+    """Compare every signal over an app's slowest seconds with the rest of its test.
+
+    Returns None without enough windows, otherwise the tail threshold, the
+    slowest seconds and one row per signal that has samples both inside and
+    outside the tail, spiking signals first.
+    """
+    rows, outliers = tail_windows(windows, app)
+    if len(rows) < 2 or outliers.all():
+        return None
+
+    seconds = np.asarray([row['timestamp'] for row in rows], dtype=np.float64) + 0.5
+    p99 = np.asarray([row['p99'] for row in rows])
+    results = []
+    for name, (sample_times, sample_values) in signals.items():
+        matched = asof_nearest(sample_times, sample_values, seconds, tolerance)
+        known = ~np.isnan(matched)
+        tail, baseline = matched[known & outliers], matched[known & ~outliers]
+        if not tail.size or not baseline.size:
+            continue
+
+        tail_mean, baseline_mean, baseline_std = float(tail.mean()), float(baseline.mean()), float(baseline.std())
+        lift = tail_mean / baseline_mean if baseline_mean > 0 else None
+        correlation = None
+        if np.ptp(matched[known]) > 0 and np.ptp(p99[known]) > 0:
+            correlation = float(np.corrcoef(p99[known], matched[known])[0, 1])
+        results.append({
+            'signal': name,
+            'tail_mean': tail_mean,
+            'baseline_mean': baseline_mean,
+            'lift': lift,
+            'correlation': correlation,
+            'spikes': bool(tail_mean > baseline_mean + SPIKE_SIGMA * baseline_std
+                           and (lift is None or lift >= SPIKE_LIFT)),
+            'matched_windows': int(known.sum()),
+        })
+    results.sort(key=lambda result: (not result['spikes'], -(result['lift'] or 0)))
+
+    slowest = sorted((row for row, outlier in zip(rows, outliers) if outlier), key=lambda row: row['p99'],
+                     reverse=True)
+    return {
+        'windows': len(rows),
+        'tail_windows': int(outliers.sum()),
+        'p99_threshold': float(p99[outliers].min()),
+        'baseline_p99': float(np.median(p99[~outliers])),
+        'slowest': [{key: row[key] for key in ('second', 'timestamp', 'rps', 'p99')}
+                    for row in slowest[:SLOWEST_WINDOWS_LIMIT]],
+        'signals': results,
+    }
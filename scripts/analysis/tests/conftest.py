@@ -0,0 +1,26 @@
+"""Make the flat analysis modules and the hyphenated scripts importable from the tests."""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+ANALYSIS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ANALYSIS_DIR))
+
+
+def load_script(file_name):
+    """Import a hyphenated script such as ``benchmark-analyzer.py`` as a module"""
+    name = file_name.removesuffix('.py').replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, ANALYSIS_DIR / file_name)
+    module = importlib.util.module_from_spec(spec)
+    # Registered so process pools can pickle the script's functions by reference
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def script():
+    return load_script
@@ -0,0 +1,19 @@
+import json
+import sys
+
+
+def test_default_mode_writes_results_and_exit_code(script, monkeypatch, tmp_path):
+    """The default run (end to end included) finishes, writes its results and returns its status"""
+    benchmark = script("benchmark-analyzer.py")
+    output = tmp_path / "analyzer_benchmark.json"
+    # Smallest size and one path keep it quick; everything else is the default mode
+    monkeypatch.setattr(sys, 'argv', ["benchmark-analyzer.py", "--sizes", "10MB", "--paths", "json_fast",
+                                      "--work-dir", str(tmp_path), "--output", str(output)])
+
+    status = benchmark.main()
+
+    assert status in (benchmark.EXIT_OK, benchmark.EXIT_FAILED)
+    results = json.loads(output.read_text())
+    assert results['stage_detection']['passed']
+    assert set(results['end_to_end']['10MB']) == set(benchmark.END_TO_END_MODES)
+    assert status == benchmark.EXIT_OK
@@ -0,0 +1,60 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from common import file_stamp_to_epoch
+from docker_stats import load_docker_stats
+from prometheus import snapshot_time
+
+STAMP = "20250101_120000"
+STAMP_EPOCH = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc).timestamp()
+
+
+@pytest.fixture
+def non_utc(monkeypatch):
+    """Run under a time zone three hours behind UTC, like a benchmark host in São Paulo"""
+    monkeypatch.setenv('TZ', 'America/Sao_Paulo')
+    time.tzset()
+    assert time.timezone != 0
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_file_stamp_is_utc_whatever_the_local_zone(non_utc):
+    assert file_stamp_to_epoch(STAMP) == STAMP_EPOCH
+
+
+def test_docker_stats_samples_use_utc_stamps(non_utc, tmp_path):
+    (tmp_path / f"api-load-test_docker_stats_{STAMP}.json").write_text(
+        "CONTAINER,CPU %,MEM USAGE / LIMIT,NET I/O,BLOCK I/O\n"
+        "benchmark_go_app,12.5%,45.6MiB / 1GiB,1.2MB / 3.4MB,0B / 0B\n")
+
+    stats = load_docker_stats(tmp_path)
+
+    [sample] = stats['api-load-test']['benchmark_go_app']
+    assert sample['timestamp'] == STAMP_EPOCH
+
+
+def test_prometheus_snapshot_time_is_utc(non_utc, tmp_path):
+    assert snapshot_time(tmp_path / f"api-load-test_go_metrics_{STAMP}.txt") == STAMP_EPOCH
+
+
+def test_tail_attribution_warns_when_no_sample_matches(script, capsys, tmp_path):
+    analyzer = script('analyze-results.py')
+    metrics_dir = tmp_path / "prometheus-metrics"
+    metrics_dir.mkdir()
+    # Three hours off the k6 seconds, as a local-time stamp on a UTC-3 host would be
+    (metrics_dir / f"api-load-test_docker_stats_{STAMP}.json").write_text(
+        "CONTAINER,CPU %,MEM USAGE / LIMIT,NET I/O,BLOCK I/O\n"
+        "benchmark_go_app,12.5%,45.6MiB / 1GiB,1.2MB / 3.4MB,0B / 0B\n")
+    start = int(STAMP_EPOCH) + 3 * 3600
+    windows = [{'app': 'go', 'second': second, 'timestamp': start + second, 'rps': 50, 'p99': 10.0 + second}
+               for second in range(60)]
+    apps = [{'id': 'go', 'metrics_name': 'go', 'container': 'benchmark_go_app'}]
+
+    attribution = analyzer.attribute_tail_latency(tmp_path, {'api-load-test': {'windows': windows}}, {}, apps)
+
+    assert attribution == {}
+    assert "no /metrics or docker stats sample within 15s" in capsys.readouterr().out
@@ -0,0 +1,35 @@
+import shutil
+from pathlib import Path
+
+from app_config import app_ids, endpoint_urls, load_apps
+from k6_cache import (ENDPOINT_APP_ID, NO_TAG_ID, cache_dir_for, cache_signature, iter_column_blocks,
+                      load_k6_cached, read_cache)
+from k6_ingest import ingest_k6_file
+
+FIXTURE = Path(__file__).resolve().parent.parent / "fixtures" / "k6-edge-cases.json"
+
+
+def test_only_endpoint_points_carry_tags(tmp_path):
+    apps = load_apps()
+    ids, urls = app_ids(apps), endpoint_urls(apps)
+    (tmp_path / "k6-results").mkdir()
+    json_file = tmp_path / "k6-results" / "api-load-test.json"
+    shutil.copyfile(FIXTURE, json_file)
+
+    built = load_k6_cached(tmp_path, {'api-load-test': json_file}, ids, endpoint_urls=urls)['api-load-test']
+
+    cache_dir = cache_dir_for(tmp_path, 'api-load-test')
+    meta = read_cache(cache_dir, cache_signature(json_file, ids, urls))
+    [block] = iter_column_blocks(cache_dir, meta['points'])
+    endpoint = block['app_id'] == ENDPOINT_APP_ID
+    assert endpoint.any() and not endpoint.all()
+    assert (block['tag_id'][~endpoint] == NO_TAG_ID).all()
+    # The tag table holds the endpoint groups and nothing else
+    groups = sorted(tuple(value for _field, value in tags) for tags in meta['tags'])
+    assert groups == sorted(built.endpoints.interner.groups)
+
+    reference = ingest_k6_file(FIXTURE, 'api-load-test', ids, fast=False, endpoint_urls=urls)
+    cached = load_k6_cached(tmp_path, {'api-load-test': json_file}, ids, endpoint_urls=urls)['api-load-test']
+    assert sorted(cached.endpoints.interner.groups) == sorted(reference.endpoints.interner.groups)
+    assert {key: histogram.count for key, histogram in cached.series.items()} == \
+        {key: histogram.count for key, histogram in reference.series.items()}
@@ -0,0 +1,42 @@
+import pytest
+
+from k6_ingest import K6TestAggregate
+from k6_nodes import combine_nodes, node_key
+
+APPS = ['go']
+START = 1_735_732_800  # 2025-01-01 12:00:00 UTC
+
+
+def load_profile():
+    """Requests per second of a 30 s ramp-up, 60 s plateau and 30 s ramp-down"""
+    return [3 * (second + 1) for second in range(30)] + [90] * 60 + [3 * (30 - second) for second in range(30)]
+
+
+def node_aggregate(test_name, first_second):
+    """A node whose clock reads ``first_second`` when it starts sending load_profile()"""
+    aggregate = K6TestAggregate(test_name, APPS)
+    for offset, requests in enumerate(load_profile()):
+        for _ in range(requests):
+            aggregate.add_point(('go', 'response_time', ''), 10.0, first_second + offset)
+    return aggregate
+
+
+def test_nodes_are_estimated_against_the_unshifted_reference():
+    # node-b's clock is 5 s behind node-a's, whose clock is 2.6 s behind the true time
+    k6_results = {
+        node_key('api-load-test', 'node-a'): node_aggregate('api-load-test', START),
+        node_key('api-load-test', 'node-b'): node_aggregate('api-load-test', START - 5),
+    }
+    node_files = {'api-load-test': {'node-a': None, 'node-b': None}}
+
+    combined = combine_nodes(k6_results, node_files, APPS, offsets={'node-a': 2.6})['api-load-test']
+
+    reference, other = combined.nodes['node-a'], combined.nodes['node-b']
+    assert (reference['offset_source'], reference['offset_shift_s']) == ('configured', 3)
+    assert other['offset_source'] == 'estimated'
+    assert other['offset_s'] == pytest.approx(7.6, abs=0.2)
+    assert other['offset_shift_s'] == 8
+    # Both nodes land on the same seconds, so the merged load is the profile doubled
+    assert min(combined.windows) == START + 3
+    assert [sum(histogram.count for histogram in combined.windows[second].values())
+            for second in sorted(combined.windows)] == [2 * requests for requests in load_profile()]
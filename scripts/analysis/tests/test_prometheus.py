@@ -0,0 +1,54 @@
+from prometheus import PrometheusSnapshot, analyze_snapshots, parse_exposition
+
+TYPES = """# TYPE http_requests_total counter
+# TYPE http_request_duration_seconds histogram
+"""
+
+
+def snapshot(timestamp, text):
+    samples, types = parse_exposition(TYPES + text)
+    return PrometheusSnapshot(timestamp, samples, types)
+
+
+def test_series_first_seen_later_adds_nothing_to_that_interval():
+    snapshots = [
+        snapshot(0, 'http_requests_total{path="/users"} 100\n'),
+        # /orders has served 5000 requests over its lifetime before its first scrape here
+        snapshot(15, 'http_requests_total{path="/users"} 130\n'
+                     'http_requests_total{path="/orders"} 5000\n'),
+        snapshot(30, 'http_requests_total{path="/users"} 160\n'
+                     'http_requests_total{path="/orders"} 5060\n'),
+    ]
+
+    analysis = analyze_snapshots(snapshots)
+
+    rates = [interval['counter_rates']['http_requests_total'] for interval in analysis['intervals']]
+    assert rates == [30 / 15, 90 / 15]
+    assert analysis['summary']['counter_rates']['http_requests_total'] == 120 / 30
+
+
+def test_histogram_first_seen_later_has_no_interval_quantiles():
+    snapshots = [
+        snapshot(0, 'http_requests_total 10\n'),
+        snapshot(15, 'http_request_duration_seconds_bucket{le="0.1"} 900\n'
+                     'http_request_duration_seconds_bucket{le="+Inf"} 1000\n'),
+        snapshot(30, 'http_request_duration_seconds_bucket{le="0.1"} 900\n'
+                     'http_request_duration_seconds_bucket{le="+Inf"} 1010\n'),
+    ]
+
+    first, second = analyze_snapshots(snapshots)['intervals']
+
+    assert first['latency']['http_request_duration_seconds']['p50'] is None
+    # Only the ten requests of the second interval, all above 100 ms
+    assert second['latency']['http_request_duration_seconds']['p50'] == 100.0
+
+
+def test_counter_drop_is_a_restart():
+    snapshots = [
+        snapshot(0, 'http_requests_total{path="/users"} 500\n'),
+        snapshot(10, 'http_requests_total{path="/users"} 40\n'),
+    ]
+
+    [interval] = analyze_snapshots(snapshots)['intervals']
+
+    assert interval['counter_rates']['http_requests_total'] == 4.0
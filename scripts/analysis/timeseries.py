@@ -0,0 +1,142 @@
+"""Per-second k6 windows, load-stage detection and steady-state selection."""
+
+import math
+
+from app_config import METRIC_KINDS
+from histogram import LatencyHistogram
+
+# A second belongs to the plateau when its smoothed load reaches this share of the peak
+STEADY_STATE_FRACTION = 0.8
+SMOOTHING_SECONDS = 5
+# At low rates the smoother widens until each window holds this many requests (about ±5% Poisson noise)
+MIN_SMOOTHED_REQUESTS = 400
+MAX_SMOOTHING_SECONDS = 60
+# Percentile of the smoothed load used as "peak", so a single burst does not set the bar
+PEAK_PERCENTILE = 0.95
+
+
+def load_curve(aggregate, kind='response_time'):
+    """Return ``(first_second, counts)``: points of ``kind`` per second across all apps.
+
+    Seconds without any point inside the test span count as zero load.
+    """
+    if not aggregate.windows:
+        return None, []
+
+    first = min(aggregate.windows)
+    last = max(aggregate.windows)
+    counts = [0] * (last - first + 1)
+    for second, window in aggregate.windows.items():
+        counts[second - first] = sum(histogram.count for (_app, series_kind, _scope), histogram in window.items()
+                                     if series_kind == kind)
+    return first, counts
+
+
+def moving_average(values, width):
+    """Centered moving average that shrinks its window at the edges"""
+    if width <= 1 or not values:
+        return list(values)
+
+    half = width // 2
+    prefix = [0]
+    for value in values:
+        prefix.append(prefix[-1] + value)
+
+    smoothed = []
+    for i in range(len(values)):
+        lo = max(0, i - half)
+        hi = min(len(values), i + half + 1)
+        smoothed.append((prefix[hi] - prefix[lo]) / (hi - lo))
+    return smoothed
+
+
+def _peak(smoothed):
+    ranked = sorted(smoothed)
+    return ranked[int(PEAK_PERCENTILE * (len(ranked) - 1))]
+
+
+def smoothing_width(counts, smoothing=SMOOTHING_SECONDS):
+    """Moving-average width for a load curve: ``smoothing`` seconds, or wider when the peak rate is low"""
+    peak = _peak(moving_average(counts, smoothing))
+    if peak <= 0:
+        return smoothing
+    return max(smoothing, min(MAX_SMOOTHING_SECONDS, math.ceil(MIN_SMOOTHED_REQUESTS / peak)))
+
+
+def detect_stages(counts, fraction=STEADY_STATE_FRACTION, smoothing=SMOOTHING_SECONDS):
+    """Split a load curve into ramp-up, steady-state and ramp-down index ranges.
+
+    The load is smoothed over ``smoothing_width`` seconds, so a low request
+    rate does not make the plateau noisy. The steady state is the longest
+    stretch of seconds whose smoothed load is at least ``fraction`` of the
+    (95th percentile) peak, where dips shorter than twice the smoothing width do
+    not end a stretch. Everything before it is ramp-up and everything after
+    it is ramp-down. Ranges are inclusive ``(start, end)`` indexes into
+    ``counts``, or None when empty.
+    """
+    if not counts:
+        return {'ramp_up': None, 'steady': None, 'ramp_down': None, 'peak': 0}
+
+    width = smoothing_width(counts, smoothing)
+    smoothed = moving_average(counts, width)
+    peak = _peak(smoothed)
+    if peak <= 0:
+        return {'ramp_up': None, 'steady': (0, len(counts) - 1), 'ramp_down': None, 'peak': 0}
+
+    threshold = fraction * peak
+    runs = []
+    run_start = None
+    for i, value in enumerate(smoothed + [float('-inf')]):
+        if value >= threshold:
+            if run_start is None:
+                run_start = i
+        elif run_start is not None:
+            if runs and run_start - runs[-1][1] - 1 < 2 * width:
+                runs[-1] = (runs[-1][0], i - 1)
+            else:
+                runs.append((run_start, i - 1))
+            run_start = None
+
+    start, end = max(runs, key=lambda run: run[1] - run[0])
+    return {
+        'ramp_up': (0, start - 1) if start > 0 else None,
+        'steady': (start, end),
+        'ramp_down': (end + 1, len(counts) - 1) if end < len(counts) - 1 else None,
+        'peak': peak,
+    }
+
+
+def merge_by_kind(series_dicts, app_ids):
+    """Merge ``{(app, kind, scope): histogram}`` dicts into ``{kind: {app: histogram}}`` in one pass"""
+    merged = {kind: {app: LatencyHistogram() for app in app_ids} for kind in METRIC_KINDS}
+    for series in series_dicts:
+        for (app, kind, _scope), histogram in series.items():
+            per_app = merged.get(kind)
+            if per_app is not None and app in per_app:
+                per_app[app].merge(histogram)
+    return merged
+
+
+def window_rows(aggregate, app_ids, first_second, length):
+    """Per-second, per-app RPS, error rate and latency percentiles for the whole test"""
+    rows = []
+    for offset in range(length):
+        second = first_second + offset
+        window = aggregate.windows.get(second, {})
+        merged = merge_by_kind([window], app_ids)
+        latency = merged['response_time']
+        errors = merged['errors']
+        for app in app_ids:
+            requests = latency[app]
+            error_samples = errors[app]
+            rows.append({
+                'second': offset,
+                'timestamp': second,
+                'app': app,
+                'rps': requests.count,
+                'error_rate_percent': (error_samples.sum / error_samples.count * 100) if error_samples.count else 0,
+                'p50': requests.quantile(0.50),
+                'p95': requests.quantile(0.95),
+                'p99': requests.quantile(0.99),
+            })
+    return rows
@@ -29,7 +29,7 @@ QUERIES=(
 )
 
 collect_prometheus_metrics() {
-    local timestamp=$(date +"%Y%m%d_%H%M%S")
+    local timestamp=$(date -u +"%Y%m%d_%H%M%S")
     local output_file="${METRICS_DIR}/${TEST_NAME}_metrics_${timestamp}.json"
     
     echo "{"\"timestamp\"": "\"$(date -Iseconds)\"", "\"metrics\"": {" > "$output_file"
@@ -50,13 +50,14 @@ collect_prometheus_metrics() {
 }
 
 collect_app_metrics() {
-    local timestamp=$(date +"%Y%m%d_%H%M%S")
+    local timestamp=$(date -u +"%Y%m%d_%H%M%S")
     
     # Collect Go app metrics
     curl -s http://localhost:8080/metrics > "${METRICS_DIR}/${TEST_NAME}_go_metrics_${timestamp}.txt" 2>/dev/null || true
     
-    # Collect C# app metrics  
+    # Collect C# app metrics (the EF app keeps the "csharp" name, see metrics_name in apps.json)
     curl -s http://localhost:8081/metrics > "${METRICS_DIR}/${TEST_NAME}_csharp_metrics_${timestamp}.txt" 2>/dev/null || true
+    curl -s http://localhost:8082/metrics > "${METRICS_DIR}/${TEST_NAME}_csharp_dapper_metrics_${timestamp}.txt" 2>/dev/null || true
 }
 
 # Main collection loop
@@ -88,12 +89,12 @@ collect_metrics_continuously() {
 }
 
 collect_docker_stats() {
-    local timestamp=$(date +"%Y%m%d_%H%M%S")
+    local timestamp=$(date -u +"%Y%m%d_%H%M%S")
     local stats_file="${METRICS_DIR}/${TEST_NAME}_docker_stats_${timestamp}.json"
     
     # Get container stats for Go and C# apps
     docker stats --no-stream --format "table {{.Container}},{{.CPUPerc}},{{.MemUsage}},{{.NetIO}},{{.BlockIO}}" \
-        benchmark_go_app benchmark_csharp_app > "${stats_file}" 2>/dev/null || true
+        benchmark_go_app benchmark_csharp_ef_app benchmark_csharp_dapper_app > "${stats_file}" 2>/dev/null || true
 }
 
 collect_final_summary() {
@@ -112,6 +113,7 @@ collect_final_summary() {
     "prometheus_queries": $(printf '%s\n' "${QUERIES[@]}" | jq -R . | jq -s .),
     "go_app_health": $(curl -s http://localhost:8080/health 2>/dev/null || echo '{"status": "unavailable"}'),
     "csharp_app_health": $(curl -s http://localhost:8081/health 2>/dev/null || echo '{"status": "unavailable"}'),
+    "csharp_dapper_app_health": $(curl -s http://localhost:8082/health 2>/dev/null || echo '{"status": "unavailable"}'),
     "prometheus_health": $(curl -s http://localhost:9090/-/healthy 2>/dev/null && echo '{"status": "healthy"}' || echo '{"status": "unavailable"}')
 }
 EOF
@@ -3,6 +3,9 @@
 RESULTS_DIR="./results"
 TIMESTAMP=$(date +"%Y%m%d_%H%M%S")
 BENCHMARK_SESSION="benchmark_${TIMESTAMP}"
+# Exit status of the analysis container; analyze-results.py exits 4 when a performance budget fails
+ANALYSIS_STATUS=0
+EXIT_BUDGET_FAILED=4
 
 echo "🚀 Starting Go vs C# Benchmark Suite - Session: ${BENCHMARK_SESSION}"
 echo "============================================================"
@@ -77,10 +80,10 @@ run_benchmark_test() {
     ./scripts/collect-metrics.sh "${BENCHMARK_SESSION}" "${test_name}" &
     local metrics_pid=$!
     
-    # Run k6 test
+    # Run k6 test (k6 gzips the JSON output because of the .gz suffix)
     echo "Starting k6 test: ${test_file}"
     k6 run \
-        --out json="${RESULTS_DIR}/${BENCHMARK_SESSION}/k6-results/${test_name}.json" \
+        --out json="${RESULTS_DIR}/${BENCHMARK_SESSION}/k6-results/${test_name}.json.gz" \
         --out csv="${RESULTS_DIR}/${BENCHMARK_SESSION}/k6-results/${test_name}.csv" \
         "${test_file}"
     
@@ -144,8 +147,16 @@ generate_reports() {
     echo "📈 Generating analysis reports..."
     
     if [ -f "./scripts/analysis/analyze-results.py" ]; then
-        docker run --rm -v "$(pwd)/${RESULTS_DIR}/${BENCHMARK_SESSION}:/results" benchmark_analysis
-        echo "✅ Analysis report generated"
+        # Mount the whole results directory so the cross-session index (benchmark_index.sqlite) persists
+        docker run --rm -v "$(pwd)/${RESULTS_DIR}:/sessions" benchmark_analysis "/sessions/${BENCHMARK_SESSION}"
+        ANALYSIS_STATUS=$?
+        if [ "${ANALYSIS_STATUS}" -eq 0 ]; then
+            echo "✅ Analysis report generated"
+        elif [ "${ANALYSIS_STATUS}" -eq "${EXIT_BUDGET_FAILED}" ]; then
+            echo "❌ Performance budgets failed, see ${RESULTS_DIR}/${BENCHMARK_SESSION}/reports/performance_budgets.xml"
+        else
+            echo "❌ Analysis failed with exit status ${ANALYSIS_STATUS}"
+        fi
     else
         echo "⚠️  Analysis script not found, skipping detailed analysis"
     fi
@@ -153,7 +164,13 @@ generate_reports() {
 
 print_summary() {
     echo ""
-    echo "🎉 Benchmark Suite Completed!"
+    if [ "${ANALYSIS_STATUS}" -eq 0 ]; then
+        echo "🎉 Benchmark Suite Completed!"
+    elif [ "${ANALYSIS_STATUS}" -eq "${EXIT_BUDGET_FAILED}" ]; then
+        echo "❌ Benchmark Suite Completed with failed performance budgets"
+    else
+        echo "❌ Benchmark Suite Completed but the analysis failed"
+    fi
     echo "=============================="
     echo "Session ID: ${BENCHMARK_SESSION}"
     echo "Results location: ${RESULTS_DIR}/${BENCHMARK_SESSION}"
@@ -194,6 +211,7 @@ main() {
     collect_final_metrics
     generate_reports
     print_summary
+    exit "${ANALYSIS_STATUS}"
 }
 
 # Execute main function